@@ -2,11 +2,8 @@
 # TODO: Fix Leaderboards
 # TODO: Create Bot Start Scripts (bat/sh)
 # TODO: Move database to API and away from bot
-# TODO: Fix update-divisions command
 # TODO: Add dynamic cog loader/unloader/reloader
 # TODO: Create custom logging solution
-# TODO: Add argument to disable cacheing
-# TODO: Add argument to change cache entry lifetime
 # TODO: Fix invalid logic (main.py: 129)
 # TODO: Add different logging outputs (cache, network, etc) and make it configurable)
 
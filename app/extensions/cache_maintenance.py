@@ -0,0 +1,71 @@
+"""
+This cog keeps the UUID cache bounded.
+
+Tasks:
+- maintain_cache_task
+This task periodically evicts the UUID cache
+entries exceeding the age and size bounds
+(least recently accessed first) and returns
+the freed pages of the file in small
+incremental vacuum steps, so the cache file
+stays flat over months of uptime.
+The interval is set with
+`[uuid_cache] maintenance_minutes`.
+
+Author: illyum
+"""
+
+import logging
+
+from discord.ext import tasks, commands
+from util.local import LOCAL_DATA
+
+DEFAULT_MAINTENANCE_MINUTES: float = 60
+
+
+class CacheMaintenance(commands.Cog):
+    """
+    Cog class for the UUID cache maintenance task.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        """
+        Initialize the CacheMaintenance cog.
+
+        Parameters:
+            bot (commands.Bot): The instance of the bot.
+        """
+        self.bot = bot
+        minutes = LOCAL_DATA.config.get("uuid_cache", "maintenance_minutes") or DEFAULT_MAINTENANCE_MINUTES
+        self.maintain_cache_task.change_interval(minutes=float(minutes))
+        self.maintain_cache_task.start()
+
+    async def cog_unload(self) -> None:
+        """
+        Stops the maintenance task when the cog is unloaded.
+
+        Returns:
+            None
+        """
+        self.maintain_cache_task.cancel()
+
+    @tasks.loop(minutes=DEFAULT_MAINTENANCE_MINUTES)
+    async def maintain_cache_task(self) -> None:
+        """
+        Background task that evicts and compacts the UUID cache.
+
+        Returns:
+            None
+        """
+        try:
+            evicted = await self.bot.db.uuid_cache.evict()
+            freed_pages = await self.bot.db.uuid_cache.compact()
+        except Exception as e:
+            logging.error(f"CacheMaintenance: Could not maintain the UUID cache -> {e}")
+            return
+        logging.debug(f"UUID cache maintenance: {evicted} evicted, {freed_pages} free pages returned")
+
+
+async def setup(bot: commands.Bot):
+    logging.debug("Adding cog: CacheMaintenance")
+    await bot.add_cog(CacheMaintenance(bot))
@@ -0,0 +1,70 @@
+"""
+This cog handles all the logic and functionality
+for the update-divisions command.
+
+Commands:
+- /update-divisions (Admin Only)
+This command gives every linked member the role
+of their lifetime GEXP division and the weekly
+rank role (Champion, Celestial or Legend) of
+last week's leaderboard, and removes the ones
+they no longer earn
+
+Author: illyum
+"""
+import discord
+import logging
+
+from util import local
+from discord.ext import commands
+from discord import app_commands
+from util.role_reconciler import RoleReconciler, WEEKLY_RANK_ROLES
+from util.command_helper import ensure_bot_perms
+from util.embed_lib import DivisionUpdateFinishWebhookEmbed, UnknownErrorEmbed
+
+
+class DivisionCommand(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.local_data: local.LocalDataSingleton = local.LOCAL_DATA
+
+    def get_reconciler(self) -> RoleReconciler:
+        """
+        Create a reconciler from the current division data and config (both can be reloaded).
+
+        Returns:
+            RoleReconciler: The reconciler.
+        """
+        weekly_role_ids = {key: self.local_data.config.get("role_ids", key) for _, key in WEEKLY_RANK_ROLES}
+        return RoleReconciler(self.local_data.xp_division_data.xp_data, weekly_role_ids)
+
+    @app_commands.command(name="update-divisions", description="Update the division roles of every member (Admin Only)")
+    async def update_divisions_command(self, interaction: discord.Interaction) -> None:
+        logging.debug(f"User {interaction.user.id} ran command '/update-divisions'")
+        is_allowed = await ensure_bot_perms(interaction, send_denied_response=True)
+        if not is_allowed:
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        server_id = int(self.local_data.config.get("bot", "server_id"))
+        guild = self.bot.get_guild(server_id)
+        if guild is None:
+            logging.error(f"Could not update divisions: not connected to server {server_id}")
+            await interaction.edit_original_response(embed=UnknownErrorEmbed())
+            return
+
+        links = await self.bot.db.links.get_links()
+        result = await self.get_reconciler().reconcile(guild, links, self.bot.leaderboards)
+        logging.info(f"Division update finished: {result}")
+        finish_embed = DivisionUpdateFinishWebhookEmbed(result.updated, result.errors)
+        await interaction.edit_original_response(embed=finish_embed)
+
+        log_channel_id = self.local_data.config.get("channel_ids", "log_channel")
+        log_channel = guild.get_channel(int(log_channel_id)) if log_channel_id is not None else None
+        if log_channel is not None:
+            await log_channel.send(embed=finish_embed)
+
+
+async def setup(bot: commands.Bot):
+    logging.debug("Adding cog: DivisionCommand")
+    await bot.add_cog(DivisionCommand(bot))
@@ -1,14 +1,14 @@
 import logging
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 import discord
 
 from discord.ext import commands
 from discord import app_commands
 
-from util import embed_lib, mcign
-from util.mcign import MCIGN
+from util import embed_lib
 from util.local import LOCAL_DATA
+from util.command_helper import resolve_player_uuid
 
 
 class GexpCommand(commands.GroupCog, name="gexp"):
@@ -22,29 +22,13 @@ class GexpCommand(commands.GroupCog, name="gexp"):
         logging.debug(f"User {interaction.user.id} ran command '/gexp daily'")
         await interaction.response.defer()
 
-        if player is None:
-            discord_link = self.local_data.discord_link.get_link(interaction.user.id)
-            player = mcign.dash_uuid(discord_link.uuid)
-            if discord_link is None:
-                await interaction.edit_original_response(embed=embed_lib.InvalidArgumentEmbed())
-                return
-
-        uuid = None
-        cache_player = self.local_data.uuid_cache.get_entry(player)
-        if cache_player.is_alive:
-            uuid = mcign.dash_uuid(cache_player.uuid)
-        else:
-            mojang_player = MCIGN(player).uuid
-            if mojang_player is None:
-                await interaction.edit_original_response(embed=embed_lib.InvalidMojangUserEmbed(player=player))
-                return
-            uuid = mcign.dash_uuid(mojang_player)
+        uuid = await resolve_player_uuid(self.bot, interaction, player)
+        if uuid is None:
+            return
 
         date_today = datetime.today().strftime("%Y-%m-%d")
-        cursor = self.local_data.gexp_db.cursor
-        cmd = "SELECT date, amount FROM expHistory WHERE (uuid = ?) AND (date = ?)"
-        query = cursor.execute(cmd, (uuid, date_today))
-        result = query.fetchone()
+        result = await self.bot.gexp_results.fetch(
+            ("daily", uuid, date_today), lambda: self.bot.db.gexp.get_daily_gexp(uuid, date_today))
         if result is None:
             await interaction.edit_original_response(
                 embed=embed_lib.PlayerGexpDataNotFoundEmbed(player=uuid))
@@ -53,6 +37,118 @@ class GexpCommand(commands.GroupCog, name="gexp"):
         await interaction.edit_original_response(
             embed=embed_lib.DailyGexpEmbed(uuid, uuid, result[1], result[0]))
 
+    @app_commands.command(name="weekly", description="GEXP a player has earned this week")
+    @app_commands.describe(player="Player to query data for")
+    async def weekly_command(self, interaction: discord.Interaction, player: str = None) -> None:
+        logging.debug(f"User {interaction.user.id} ran command '/gexp weekly'")
+        await interaction.response.defer()
+
+        uuid = await resolve_player_uuid(self.bot, interaction, player)
+        if uuid is None:
+            return
+
+        today = date.today()
+        # ISO weeks start on Monday, like the weekly leaderboard
+        first_date = today - timedelta(days=today.weekday())
+        history = await self.bot.gexp_results.fetch(
+            ("weekly", uuid, today), lambda: self.bot.db.gexp.get_gexp_days(uuid, first_date, today))
+        if not history:
+            await interaction.edit_original_response(
+                embed=embed_lib.PlayerGexpDataNotFoundEmbed(player=uuid))
+            return
+        await interaction.edit_original_response(
+            embed=embed_lib.WeeklyGexpEmbed(uuid, uuid, history, first_date))
+
+    @app_commands.command(name="monthly", description="GEXP a player has earned this month")
+    @app_commands.describe(player="Player to query data for")
+    async def monthly_command(self, interaction: discord.Interaction, player: str = None) -> None:
+        logging.debug(f"User {interaction.user.id} ran command '/gexp monthly'")
+        await interaction.response.defer()
+
+        uuid = await resolve_player_uuid(self.bot, interaction, player)
+        if uuid is None:
+            return
+
+        today = date.today()
+        history = await self.bot.gexp_results.fetch(
+            ("monthly", uuid, today), lambda: self.bot.db.gexp.get_gexp_days(uuid, today.replace(day=1), today))
+        if not history:
+            await interaction.edit_original_response(
+                embed=embed_lib.PlayerGexpDataNotFoundEmbed(player=uuid))
+            return
+        await interaction.edit_original_response(
+            embed=embed_lib.MonthlyGexpEmbed(uuid, uuid, history, today))
+
+    @app_commands.command(name="yearly", description="GEXP a player has earned this year")
+    @app_commands.describe(player="Player to query data for")
+    async def yearly_command(self, interaction: discord.Interaction, player: str = None) -> None:
+        logging.debug(f"User {interaction.user.id} ran command '/gexp yearly'")
+        await interaction.response.defer()
+
+        uuid = await resolve_player_uuid(self.bot, interaction, player)
+        if uuid is None:
+            return
+
+        today = date.today()
+        gexp = await self.bot.gexp_results.fetch(
+            ("yearly", uuid, today.year), lambda: self.bot.db.gexp.get_period_gexp(uuid, "year", today))
+        if gexp is None:
+            await interaction.edit_original_response(
+                embed=embed_lib.PlayerGexpDataNotFoundEmbed(player=uuid))
+            return
+        await interaction.edit_original_response(
+            embed=embed_lib.YearlyGexpEmbed(uuid, uuid, gexp, today.year))
+
+    @app_commands.command(name="lifetime", description="GEXP a player has earned in total")
+    @app_commands.describe(player="Player to query data for")
+    async def lifetime_command(self, interaction: discord.Interaction, player: str = None) -> None:
+        logging.debug(f"User {interaction.user.id} ran command '/gexp lifetime'")
+        await interaction.response.defer()
+
+        uuid = await resolve_player_uuid(self.bot, interaction, player)
+        if uuid is None:
+            return
+
+        gexp = await self.bot.gexp_results.fetch(
+            ("lifetime", uuid, None), lambda: self.bot.db.gexp.get_period_gexp(uuid, "lifetime"))
+        if gexp is None:
+            await interaction.edit_original_response(
+                embed=embed_lib.PlayerGexpDataNotFoundEmbed(player=uuid))
+            return
+        await interaction.edit_original_response(
+            embed=embed_lib.LifetimeGexpEmbed(uuid, uuid, gexp))
+
+    @app_commands.command(name="range", description="GEXP a player has earned between two dates")
+    @app_commands.describe(player="Player to query data for", start="First day (YYYY-MM-DD)",
+                           end="Last day (YYYY-MM-DD)")
+    async def range_command(self, interaction: discord.Interaction, player: str, start: str, end: str) -> None:
+        logging.debug(f"User {interaction.user.id} ran command '/gexp range'")
+        await interaction.response.defer()
+
+        try:
+            first_date = date.fromisoformat(start)
+            last_date = date.fromisoformat(end)
+        except ValueError:
+            await interaction.edit_original_response(embed=embed_lib.InvalidArgumentEmbed())
+            return
+        if first_date > last_date:
+            await interaction.edit_original_response(embed=embed_lib.InvalidArgumentEmbed())
+            return
+
+        uuid = await resolve_player_uuid(self.bot, interaction, player)
+        if uuid is None:
+            return
+
+        gexp = await self.bot.gexp_results.fetch(
+            ("range", uuid, (first_date, last_date)),
+            lambda: self.bot.db.gexp.get_range_gexp(uuid, first_date, last_date))
+        if gexp is None:
+            await interaction.edit_original_response(
+                embed=embed_lib.PlayerGexpDataNotFoundEmbed(player=uuid))
+            return
+        await interaction.edit_original_response(
+            embed=embed_lib.RangeGexpEmbed(uuid, uuid, gexp, first_date, last_date))
+
 
 async def setup(bot: commands.Bot):
     logging.debug("Adding Cog: Gexp Command")
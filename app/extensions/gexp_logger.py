@@ -9,31 +9,33 @@ This command will trigger the gexp sync/logger
 Tasks:
 - sync_gexp_task
 This task will automatically trigger
-the gexp sync/logger every 15 minutes.
-By default, the sync/logger will only
-trigger after the 15-minute mark as to
-not run on startup.
+the gexp sync/logger for every configured
+Hypixel guild. The interval adapts
+to how much changed in the last syncs
+(see util.sync_schedule). On startup the
+sync only runs right away if it is overdue.
 
 Author: illyum
 """
 
 import time
 import uuid
-import aiohttp
 import asyncio
 import discord
 import logging
 
-from typing import Union, Dict
-
+from typing import List
 from discord import app_commands
 
 import util.command_helper
-from util.local import LOCAL_DATA
+from util.local import LOCAL_DATA, IngestResult
 from discord.ext import tasks, commands
-from util.uuider import add_hyphens_to_uuid
+from util.sync_schedule import AdaptiveSyncSchedule
+from util.gexp_writer import GexpWriter, DEFAULT_QUEUE_SIZE
 from util.embed_lib import GexpLoggerStartEmbed, GexpLoggerFinishEmbed
 
+DEFAULT_FETCH_CONCURRENCY: int = 3
+
 
 class GexpLogger(commands.Cog):
     """
@@ -52,46 +54,127 @@ class GexpLogger(commands.Cog):
         super().__init__(*args, **kwargs)
         self.bot = bot
         self.local_data = LOCAL_DATA.local_data
-        self.has_run: bool = False
         self.start_message = None
         self.start_time = None
         self.end_time = None
         self.task_id = None
         self.is_running: bool = False
+        self.failed_guilds: List[str] = []
         self.server_id: int = int(self.local_data.config.get("bot", "server_id"))
         self.log_channel: int = int(self.local_data.config.get("channel_ids", "log_channel"))
-        self.cursor = self.local_data.gexp_db.cursor
+        writer_queue_size = self.local_data.config.get("gexp_logger", "writer_queue_size") or DEFAULT_QUEUE_SIZE
+        self.writer = GexpWriter(self.local_data.gexp_db, queue_size=int(writer_queue_size))
+        self.writer.start()
+        self.schedule = AdaptiveSyncSchedule(self.local_data.config, self.bot.db.gexp)
+
+    async def cog_load(self) -> None:
+        """
+        Restores the sync schedule and starts the sync task when the cog is loaded.
+
+        Parameters:
+            self
+
+        Returns:
+            None
+        """
+        await self.schedule.load()
+        self.sync_gexp_task.change_interval(seconds=self.schedule.interval)
         self.sync_gexp_task.start()
 
-    async def fetch_guild_data(self) -> Union[Dict, None]:
+    async def cog_unload(self) -> None:
+        """
+        Stops the sync task and the database writer thread when the cog is unloaded.
+
+        Parameters:
+            self
+
+        Returns:
+            None
+        """
+        self.sync_gexp_task.cancel()
+        await asyncio.to_thread(self.writer.stop)
+
+    def get_guild_ids(self) -> List[str]:
+        """
+        Gets the Hypixel guilds to sync.
+
+        Uses the `bot.guild_ids` list (e.g. partner and alt guilds) when it is set,
+        otherwise only the `bot.guild_id` guild.
+
+        Parameters:
+            self
+
+        Returns:
+            List[str]: The Hypixel guild IDs.
+        """
+        guild_ids = self.local_data.config.get("bot", "guild_ids")
+        if not guild_ids:
+            guild_ids = [self.local_data.config.get("bot", "guild_id")]
+        # Keep the configured order, but never sync a guild twice
+        return list(dict.fromkeys(str(guild_id) for guild_id in guild_ids))
+
+    async def stream_guild(self, guild_id: str, semaphore: asyncio.Semaphore) -> IngestResult:
+        """
+        Streams the data of one guild from the Hypixel API into the GexpWriter.
+
+        Only the download happens here: every chunk of the body is handed to the writer
+        thread as soon as it arrives, where it is parsed and ingested.
+
+        Parameters:
+            self
+            guild_id (str): The Hypixel guild ID.
+            semaphore (asyncio.Semaphore): Limits the amount of concurrent downloads.
+
+        Returns:
+            IngestResult: The result of the ingestion.
+
+        Raises:
+            GuildDataError: If the API returned an unsuccessful payload.
         """
-        Fetches guild data from the Hypixel API.
+        async with semaphore:
+            logging.debug(f"Fetching guild data (guild: {guild_id})")
+            # Rate-limiting and caching are handled by the client
+            return await self.writer.ingest_stream(self.bot.hypixel.iter_body("/guild", id=guild_id),
+                                                   guild_id=guild_id)
+
+    async def stream_guild_data(self) -> IngestResult:
+        """
+        Streams the data of every configured guild into the GexpWriter.
+
+        The guilds are downloaded concurrently (up to `gexp_logger.fetch_concurrency` at a
+        time) and share the client's rate-limit budget. A guild that fails is logged and
+        recorded in `failed_guilds`, the others are still ingested.
 
         Parameters:
             self
 
         Returns:
-            Union[Dict, None]: The guild data if successful, None otherwise. AKA response.json()
+            IngestResult: The combined result of every successfully ingested guild.
+
+        Raises:
+            Exception: The error of the first guild if every guild failed.
         """
-        logging.debug("Fetching guild data")
-        key = self.local_data.config.get("bot", "api_key")
-        guild_id = self.local_data.config.get("bot", "guild_id")
-        url = f"https://api.hypixel.net/guild?key={key}&id={guild_id}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logging.warning(f"Unknown status code: {response.status} (GexpLogger)")
-                if int(response.headers.get('ratelimit-remaining', 0)) <= 0:
-                    logging.warning("Key is being rate-limited. Check log file for more details")
-                    logging.debug(f"Response Headers: {response.headers}")
-                    time_to_sleep = int(response.headers.get('ratelimit-reset', 0)) + 2
-                    await asyncio.sleep(time_to_sleep)
-
-                guild_data = await response.json()
-                if not guild_data["success"]:
-                    logging.fatal(f"Unsuccessful in scraping API data: {response.headers} | {guild_data}")
-                    return None
-                return guild_data
+        guild_ids = self.get_guild_ids()
+        concurrency = int(self.local_data.config.get("gexp_logger", "fetch_concurrency") or DEFAULT_FETCH_CONCURRENCY)
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        results = await asyncio.gather(*[self.stream_guild(guild_id, semaphore) for guild_id in guild_ids],
+                                       return_exceptions=True)
+
+        ingest_result = IngestResult()
+        fetch_time = 0.0
+        self.failed_guilds = []
+        for guild_id, result in zip(guild_ids, results):
+            if isinstance(result, BaseException):
+                logging.error(f"Could not sync guild {guild_id}: {result}")
+                self.failed_guilds.append(guild_id)
+                continue
+            # Downloads overlap, the fetch phase of the whole sync is the slowest download
+            fetch_time = max(fetch_time, result.timings.pop("fetch", 0.0))
+            ingest_result.add(result)
+        if len(self.failed_guilds) == len(guild_ids):
+            raise results[0]
+        ingest_result.timings["fetch"] = fetch_time
+        return ingest_result
 
     async def send_starting_message(self) -> None:
         """
@@ -116,11 +199,12 @@ class GexpLogger(commands.Cog):
         except Exception as e:
             logging.warning(e)
 
-    async def send_finish_message(self, members_synced) -> None:
+    async def send_finish_message(self, ingest_result: IngestResult) -> None:
         """
         Sends the finishing message for the GexpLogger task.
 
-        The finishing message includes the task ID, start time, end time, and number of members synced in an embed.
+        The finishing message includes the task ID, start time, end time, number of members synced
+        and the inserted/updated/unchanged row counts in an embed.
 
         Deletes the starting message and sends the finishing message to the log channel.
 
@@ -128,7 +212,7 @@ class GexpLogger(commands.Cog):
 
         Parameters:
             self
-            members_synced (int): The number of members synced during the task.
+            ingest_result (IngestResult): The result of the expHistory ingestion.
 
         Returns:
             None
@@ -140,56 +224,12 @@ class GexpLogger(commands.Cog):
                     task_id=self.task_id,
                     start_time=self.start_time,
                     end_time=self.end_time,
-                    members_synced=members_synced
+                    members_synced=ingest_result.members,
+                    ingest_result=ingest_result
                 ))
         except Exception as e:
             logging.warning(e)
 
-    def sync_member_exp_history(self, member) -> bool:
-        """
-        Synchronizes the experience history of a guild member.
-
-        Retrieves the UUID and experience history of the member.
-        Updates the database with the member's experience history, checking for any changes.
-
-        Parameters:
-            self
-            member (dict): guild member info from guild endpoint
-
-
-        Returns:
-            bool: True if synchronization is successful, False otherwise.
-        """
-        try:
-            _uuid = add_hyphens_to_uuid(member["uuid"])
-            xp_history = member["expHistory"]
-
-            for date, amount in xp_history.items():
-                self.cursor.execute("SELECT * FROM expHistory WHERE uuid=? AND date=?", (_uuid, date))
-                result = self.cursor.fetchone()
-                # Result Example:
-                # (293237, 1686528186, '2023-06-11', '5328930e-d411-49cb-90ad-4e5c7b27dd86', 0)
-                # If result does not exist, result will be None
-                time_now = int(time.time())
-                if result is None:
-                    # Create Data
-                    self.cursor.execute("INSERT INTO expHistory (timestamp, date, uuid, amount) VALUES (?, ?, ?, ?)", (
-                            time_now, date, _uuid, amount))
-                else:
-                    # Ensure data is correct
-                    recorded_amount = result[4]
-                    if recorded_amount != amount:
-                        # Fix un-synced data
-                        self.cursor.execute("UPDATE expHistory SET timestamp=?, amount=? WHERE uuid=? AND date=?", (
-                            time_now, amount, _uuid, date))
-                    else:
-                        # Do nothing because data is correct
-                        pass
-        except Exception as e:
-            logging.fatal(f"Encountered fatal exception syncing exp history for {member}: {e}")
-            return False
-        return True
-
     async def run_sync(self, interaction: discord.Interaction = None) -> None:
         """
         Runs the synchronization process. (Syncs ALL guild members)
@@ -210,6 +250,7 @@ class GexpLogger(commands.Cog):
         logging.debug("Running GEXP Sync")
 
         self.is_running = True
+        started_at = time.time()
         self.start_time = time.perf_counter()
         self.task_id = uuid.uuid4()
         if interaction is None:
@@ -217,32 +258,37 @@ class GexpLogger(commands.Cog):
         else:
             await interaction.response.send_message(embed=GexpLoggerStartEmbed(self.task_id, self.start_time))
 
-        guild_data = await self.fetch_guild_data()
-        logging.debug("Guild data retrieved")
-        if guild_data is None:
-            logging.critical("Unknown error fetching guild data")
-            await self.send_finish_message(0)
+        logging.debug("Syncing members")
+        try:
+            ingest_result = await self.stream_guild_data()
+        except Exception as e:
+            logging.fatal(f"Encountered fatal exception syncing exp history: {e}")
+            self.end_time = time.perf_counter()
+            await self.bot.db.gexp.record_sync_run(
+                self.task_id, started_at, self.end_time - self.start_time, IngestResult(), success=False)
+            await self.send_finish_message(IngestResult())
             await self.alert_staff_of_error()
             return
-        members_synced = 0
-        logging.debug("Syncing members")
-        guild_members = guild_data.get("guild").get("members")
-        for member in guild_members:
-            successful = self.sync_member_exp_history(member)
-            if successful:
-                members_synced += 1
-            else:
-                logging.error(f"Unknown error syncing member: '{member}'")
-        logging.debug("Finished syncing members")
-        self.cursor.connection.commit()
+        logging.debug(f"Finished syncing members: {ingest_result}")
         self.end_time = time.perf_counter()
-        await self.send_finish_message(members_synced)
+        await self.bot.db.gexp.record_sync_run(
+            self.task_id, started_at, self.end_time - self.start_time, ingest_result, success=True)
+        if ingest_result.inserted or ingest_result.updated:
+            # Cached leaderboards and /gexp results are outdated now
+            self.bot.sync_generation.bump()
+        # Refresh the names of the members in the background, so commands don't wait on Mojang
+        self.bot.players.prewarm(ingest_result.roster)
+        self.sync_gexp_task.change_interval(seconds=await self.schedule.record_success(ingest_result))
+        await self.send_finish_message(ingest_result)
+        if self.failed_guilds:
+            await self.alert_staff_of_error()
         if interaction is not None:
             await interaction.edit_original_response(embed=GexpLoggerFinishEmbed(
                 task_id=self.task_id,
                 start_time=self.start_time,
                 end_time=self.end_time,
-                members_synced=members_synced
+                members_synced=ingest_result.members,
+                ingest_result=ingest_result
             ))
 
     async def alert_staff_of_error(self) -> None:
@@ -276,7 +322,6 @@ class GexpLogger(commands.Cog):
         """
         Background task for periodically running the synchronization process.
 
-        Skips the first run to avoid immediate execution upon starting the task.
         Runs the synchronization process, handling any exceptions that may occur.
         Sets the `is_running` flag accordingly.
 
@@ -289,11 +334,6 @@ class GexpLogger(commands.Cog):
         if self.is_running:
             return
 
-        if not self.has_run:
-            self.has_run = True
-            logging.debug("GexpLogger: Skipping first run")
-            return
-
         try:
             await self.run_sync()
         except Exception as e:
@@ -306,7 +346,8 @@ class GexpLogger(commands.Cog):
         """
         Setup function for the sync_gexp_task loop.
 
-        Waits until the bot is ready before starting the task.
+        Waits until the bot is ready, then until the next sync is due. A sync that
+        is overdue (or never ran) starts right away.
 
         Parameters:
             self
@@ -315,6 +356,12 @@ class GexpLogger(commands.Cog):
             None
         """
         await self.bot.wait_until_ready()
+        # Re-checked after every wait, a manual sync in the meantime postpones the first run
+        delay = self.schedule.seconds_until_due()
+        while delay > 0:
+            logging.debug(f"GexpLogger: Next sync due in {delay / 60:.1f} minutes")
+            await asyncio.sleep(delay)
+            delay = self.schedule.seconds_until_due()
 
     @app_commands.command(name="sync-gexp", description="Runs sync gexp task (Admin Only)")
     async def sync_gexp_command(self, interaction: discord.Interaction) -> None:
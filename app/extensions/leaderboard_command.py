@@ -0,0 +1,98 @@
+"""
+This cog handles all the logic and functionality
+for the leaderboard command.
+
+Commands:
+- /leaderboard
+This command shows the top 10 players of the
+daily, weekly, monthly, yearly or lifetime
+GEXP leaderboard, and the rank of a player
+(defaults to the user's linked player)
+
+Author: illyum
+"""
+import asyncio
+import datetime
+import discord
+import logging
+
+from typing import Union
+
+from discord import app_commands
+from discord.ext import commands
+from util.embed_lib import LeaderboardEmbed
+from util.leaderboard import BOARDS
+from util.command_helper import resolve_player_uuid
+
+LEADERBOARD_SIZE: int = 10
+
+
+def format_period(board: str, date: datetime.date) -> str:
+    """
+    Get the display name of the period of a board.
+
+    Parameters:
+        board (str): The board.
+        date (datetime.date): A day of the period.
+
+    Returns:
+        str: The display name, e.g. "Week 42, 2023".
+    """
+    if board == "daily":
+        return date.strftime("%B %d, %Y")
+    if board == "weekly":
+        iso_year, iso_week, _ = date.isocalendar()
+        return f"Week {iso_week}, {iso_year}"
+    if board == "monthly":
+        return date.strftime("%B %Y")
+    if board == "yearly":
+        return str(date.year)
+    return "All Time"
+
+
+class LeaderboardCommand(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def get_player_name(self, uuid: str) -> str:
+        """
+        Get the name of a player from the UUID cache (names rarely change, so expired entries are used too).
+
+        Parameters:
+            uuid (str): The dashed UUID of the player.
+
+        Returns:
+            str: The name of the player, or the UUID if it isn't cached.
+        """
+        entry = await self.bot.db.uuid_cache.get_entry(uuid)
+        return entry.name or uuid
+
+    @app_commands.command(name="leaderboard", description="Shows a GEXP leaderboard")
+    @app_commands.describe(board="The leaderboard to show", player="Player to show the rank of")
+    @app_commands.choices(board=[app_commands.Choice(name=board.capitalize(), value=board) for board in BOARDS])
+    async def leaderboard_command(self, interaction: discord.Interaction, board: str = "weekly",
+                                  player: str = None) -> None:
+        logging.debug(f"User {interaction.user.id} ran command '/leaderboard'")
+        await interaction.response.defer()
+
+        today = datetime.date.today()
+        leaderboard = await self.bot.leaderboards.get(board, today)
+        top = leaderboard.top[:LEADERBOARD_SIZE]
+        names = await asyncio.gather(*[self.get_player_name(uuid) for uuid, _ in top])
+        entries = [(leaderboard.rank(uuid)[0], name, amount) for (uuid, amount), name in zip(top, names)]
+
+        player_rank: Union[tuple, None] = None
+        if player is not None or await self.bot.db.links.get_link(interaction.user.id) is not None:
+            uuid = await resolve_player_uuid(self.bot, interaction, player)
+            if uuid is None:
+                return
+            rank = leaderboard.rank(uuid)
+            if rank is not None:
+                player_rank = (await self.get_player_name(uuid), *rank)
+        await interaction.edit_original_response(
+            embed=LeaderboardEmbed(board, format_period(board, today), entries, player_rank))
+
+
+async def setup(bot: commands.Bot):
+    logging.debug("Adding cog: LeaderboardCommand")
+    await bot.add_cog(LeaderboardCommand(bot))
@@ -14,10 +14,7 @@ Author: illyum
 
 import discord
 import logging
-import requests
 
-from typing import Union
-from util.mcign import MCIGN
 from discord import app_commands
 from discord.ext import commands
 from util import local, embed_lib
@@ -40,20 +37,13 @@ class LinkCommand(commands.Cog):
         self.bot = bot
         self.local_data: local.LocalDataSingleton = local.LOCAL_DATA
 
-    def get_player(self, player_id) -> Union[local._CacheEntry | None]:
-        player = self.local_data.uuid_cache.get_entry(player_id)
-        if player is None:
-            player = MCIGN(player_id)
-            self.local_data.uuid_cache.add_entry(player.uuid, player.name)
-        return player
-
     @app_commands.command(name="link", description="Link your discord and minecraft account")
     @app_commands.describe(username="Your minecraft username to link!")
     async def link(self, interaction: discord.Interaction, username: str):
         await interaction.response.defer()
 
         # Make sure their account isn't already linked
-        link = self.local_data.discord_link.get_link(interaction.user.id)
+        link = await self.bot.db.links.get_link(interaction.user.id)
         if link is not None:  # AKA Their account IS linked
             already_linked_embed = discord.Embed(colour=discord.Colour(0x820529))
             already_linked_embed.description = "You've already linked your account! If you need to unlink your discord " \
@@ -62,9 +52,13 @@ class LinkCommand(commands.Cog):
             return
 
         # Get hypixel player data
-        key = self.local_data.config.get("bot", "api_key")
-        uuid = MCIGN(player_id=username).uuid
-        player_data = requests.get("https://api.hypixel.net/player?key={}&uuid={}".format(key, uuid)).json()
+        mojang_player = await self.bot.players.resolve(username)
+        if mojang_player is None:
+            await interaction.edit_original_response(embed=embed_lib.InvalidMojangUserEmbed(player=username))
+            return
+        # Links store the trimmed UUID
+        uuid = mojang_player.uuid.replace("-", "")
+        player_data = (await self.bot.hypixel.player(uuid)).json()
         hypixel_discord_record = player_data.get('player', {}).get("socialMedia", {}).get("links", {})\
             .get("DISCORD", None)
         if hypixel_discord_record is None:
@@ -80,7 +74,7 @@ class LinkCommand(commands.Cog):
 
         # Everything worked out! Add the link
         discord_id = interaction.user.id
-        self.local_data.discord_link.register_link(uuid, discord_id, senders_discord_username)
+        await self.bot.db.links.register_link(uuid, discord_id, senders_discord_username)
         successful_embed = embed_lib.SuccessfullyLinkedEmbed(username, interaction.user)
         await interaction.edit_original_response(embed=successful_embed)
 
@@ -94,7 +88,7 @@ class UnlinkCommand(commands.Cog):
     async def unlink(self, interaction: discord.Interaction):
         await interaction.response.defer()
 
-        link = self.local_data.discord_link.get_link(interaction.user.id)
+        link = await self.bot.db.links.get_link(interaction.user.id)
         if link is None:  # AKA Their account IS linked
             response_embed = discord.Embed(colour=discord.Colour(embed_lib.to_hex("#eb4034")))
             response_embed.description = "Your account is not linked!"
@@ -105,7 +99,7 @@ class UnlinkCommand(commands.Cog):
             await interaction.edit_original_response(embed=InsufficientPermissionsEmbed())
             return
 
-        self.local_data.discord_link.remove_link(link.row_id, link.uuid)
+        await self.bot.db.links.remove_link(link.row_id, link.uuid)
         await interaction.edit_original_response(embed=SuccessfullyUnlinkedEmbed(interaction.user.mention))
 
 
@@ -114,13 +108,6 @@ class ForceLinkCommand(commands.Cog):
         self.bot = bot
         self.local_data: local.LocalDataSingleton = local.LOCAL_DATA
 
-    def get_player(self, player_id):
-        player = self.local_data.uuid_cache.get_entry(player_id)
-        if player is None:
-            player = MCIGN(player_id)
-            local.LOCAL_DATA.uuid_cache.add_entry(player.uuid, player.name)
-        return player
-
     @app_commands.command(name="forcelink", description="Force Link a discord user and ign/uuid")
     @app_commands.describe(discord_id="Discord ID associated with minecraft username")
     @app_commands.describe(player="Uuid/Name of player to force link")
@@ -135,14 +122,14 @@ class ForceLinkCommand(commands.Cog):
         except Exception as e:
             await interaction.edit_original_response(embed=embed_lib.InvalidArgumentEmbed())
 
-        mojang_player = MCIGN(player)
+        mojang_player = await self.bot.players.resolve(player)
 
         # Make sure their account isn't already linked
         server_id = int(local.LOCAL_DATA.config.get("bot", "server_id"))
         force_linked_discord_user = self.bot.get_guild(server_id).get_member(discord_id)
         if force_linked_discord_user is None:
             await interaction.edit_original_response(embed=embed_lib.InvalidArgumentEmbed())
-        link = local.LOCAL_DATA.discord_link.get_link(discord_id)
+        link = await self.bot.db.links.get_link(discord_id)
         if link is not None:  # AKA Their account IS linked
             already_linked_embed = discord.Embed(colour=discord.Colour(0x820529))
             already_linked_embed.description = "This account is already linked"
@@ -150,13 +137,14 @@ class ForceLinkCommand(commands.Cog):
             return
 
         # Make API call to make sure username is linked to a valid Mojang account
-        if mojang_player.uuid is None or mojang_player.name is None:
+        if mojang_player is None:
             await interaction.edit_original_response(embed=embed_lib.InvalidMojangUserEmbed(player=player))
             return
 
         # Bypass api security check
         forced_discord_user_discrim = f"{force_linked_discord_user.name}#{force_linked_discord_user.discriminator}"
-        local.LOCAL_DATA.discord_link.register_link(mojang_player.uuid, discord_id, forced_discord_user_discrim)
+        await self.bot.db.links.register_link(mojang_player.uuid.replace("-", ""), discord_id,
+                                              forced_discord_user_discrim)
         successful_embed = embed_lib.SuccessfullyForceLinkedEmbed(mojang_player.name, force_linked_discord_user)
         await interaction.edit_original_response(embed=successful_embed)
 
@@ -166,13 +154,6 @@ class ForceUnlinkCommand(commands.Cog):
         self.bot = bot
         self.local_data: local.LocalDataSingleton = local.LOCAL_DATA
 
-    def get_player(self, player_id):
-        player = self.local_data.uuid_cache.get_entry(player_id)
-        if player is None:
-            player = MCIGN(player_id)
-            local.LOCAL_DATA.uuid_cache.add_entry(player.uuid, player.name)
-        return player
-
     @app_commands.command(name="forceunlink", description="Force Unlink a discord user and ign/uuid")
     @app_commands.describe(id="Discord ID or UUID of a player to remove")
     async def force_unlink(self, interaction: discord.Interaction, id: str):
@@ -181,12 +162,12 @@ class ForceUnlinkCommand(commands.Cog):
         if not is_allowed:
             return
 
-        link = self.local_data.discord_link.get_link(id)
+        link = await self.bot.db.links.get_link(id)
         if link is None:
             await interaction.edit_original_response(embed=InvalidArgumentEmbed())
             return
 
-        self.local_data.discord_link.remove_link(link.uuid)
+        await self.bot.db.links.remove_link(uuid=link.uuid)
         await interaction.edit_original_response(embed=SuccessfullyForceUnlinkedEmbed(link.discord_username))
 
 
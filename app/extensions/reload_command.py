@@ -6,16 +6,23 @@ Commands:
 - /reload config (Admin Only)
 This command reloads the config
 
+- /reload rollups (Admin Only)
+This command rebuilds the weekly, monthly,
+yearly and lifetime GEXP totals from the
+daily GEXP history
+
 Author: illyum
 """
 import datetime
 
+import sqlite3
 import discord
 import logging
 
 from util import local
 from discord.ext import commands
 from discord import app_commands
+from util.embed_lib import UnknownErrorEmbed
 from util.command_helper import ensure_bot_perms
 
 
@@ -52,6 +59,39 @@ class ReloadCommandCog(commands.GroupCog, name="reload"):
         )
         await interaction.edit_original_response(embed=response_embed)
 
+    @app_commands.command(name="rollups", description="Rebuild the GEXP totals from the daily history (Admin Only)")
+    async def rollups(self, interaction: discord.Interaction):
+        """
+        Handle the 'rollups' command to rebuild the GEXP rollup tables.
+
+        The weekly, monthly, yearly and lifetime totals are kept up to date by every sync,
+        this recomputes them from the daily rows in case they ever get out of sync.
+
+        Parameters:
+            interaction (discord.Interaction): The interaction from the command.
+
+        Returns:
+            None
+        """
+        is_allowed = await ensure_bot_perms(interaction, send_denied_response=True)
+        if not is_allowed:
+            return
+        await interaction.response.defer(ephemeral=True)
+        try:
+            await self.bot.db.gexp.rebuild_rollups()
+        except sqlite3.Error as e:
+            # E.g. the database stayed locked by a running sync
+            logging.error(f"Could not rebuild the GEXP rollup tables: {e}")
+            await interaction.edit_original_response(embed=UnknownErrorEmbed())
+            return
+        self.bot.sync_generation.bump()
+        response_embed = discord.Embed(
+            colour=discord.Colour.gold(),
+            timestamp=datetime.datetime.now(),
+            title="GEXP Totals Rebuilt!"
+        )
+        await interaction.edit_original_response(embed=response_embed)
+
 
 async def setup(bot: commands.Bot):
     logging.debug("Adding cog: ReloadCommand")
@@ -0,0 +1,153 @@
+"""
+This cog handles all the logic and functionality
+for the stats command and subcommands.
+
+Commands:
+- /stats sync (Admin Only)
+This command shows the p50/p95 timing of
+every GEXP sync phase over the last runs
+
+- /stats cache (Admin Only)
+This command shows the hits and misses of
+the /gexp result cache, the Hypixel API
+response cache and the UUID cache
+
+- /stats uuid-cache (Admin Only)
+This command shows the size, hit rate
+and entry age distribution of the
+UUID cache
+
+Author: illyum
+"""
+import math
+import discord
+import logging
+
+from typing import List
+
+from util import local
+from discord import app_commands
+from discord.ext import commands
+from util.embed_lib import SyncStatsEmbed, CacheStatsEmbed, UuidCacheStatsEmbed
+from util.command_helper import ensure_bot_perms
+
+DEFAULT_RUN_COUNT: int = 20
+MAX_RUN_COUNT: int = 500
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Get a percentile of a list of values (nearest-rank method).
+
+    Parameters:
+        values (List[float]): The values, in any order.
+        fraction (float): The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        float: The percentile, or 0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class StatsCommandCog(commands.GroupCog, name="stats"):
+    """
+    Admin commands that report the bot's internal statistics.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        """
+        Initializes the StatsCommandCog instance.
+
+        Parameters:
+            bot (commands.Bot): The instance of the bot.
+        """
+        super().__init__()
+        self.bot = bot
+        self.local_data: local.LocalDataSingleton = local.LOCAL_DATA
+
+    @app_commands.command(name="sync", description="Shows p50/p95 timings of the GEXP sync phases (Admin Only)")
+    @app_commands.describe(runs="The amount of recent sync runs to include")
+    async def sync_stats_command(self, interaction: discord.Interaction, runs: int = DEFAULT_RUN_COUNT) -> None:
+        """
+        Shows the p50/p95 duration of every sync phase over the most recent successful runs.
+
+        Parameters:
+            self
+            interaction (discord.Interaction): The interaction object representing the user's interaction.
+            runs (int, optional): The amount of recent runs to include.
+
+        Returns:
+            None
+        """
+        is_allowed = await ensure_bot_perms(interaction, send_denied_response=True)
+        if not is_allowed:
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        sync_runs = await self.bot.db.gexp.get_sync_runs(min(max(runs, 1), MAX_RUN_COUNT))
+        phase_percentiles = {}
+        for phase in (*local.SYNC_PHASES, "total"):
+            timings = [run[f"{phase}Ms"] for run in sync_runs]
+            phase_percentiles[phase] = (percentile(timings, 0.5), percentile(timings, 0.95))
+        average_rows = {}
+        for column in ("inserted", "updated", "unchanged", "skipped"):
+            average_rows[column] = sum(run[column] for run in sync_runs) / max(len(sync_runs), 1)
+        await interaction.edit_original_response(
+            embed=SyncStatsEmbed(len(sync_runs), phase_percentiles, average_rows))
+
+    @app_commands.command(name="cache", description="Shows the hit/miss counts of the caches (Admin Only)")
+    async def cache_stats_command(self, interaction: discord.Interaction) -> None:
+        """
+        Shows the hits, misses and size of the /gexp result, Hypixel API response and UUID caches.
+
+        Parameters:
+            self
+            interaction (discord.Interaction): The interaction object representing the user's interaction.
+
+        Returns:
+            None
+        """
+        is_allowed = await ensure_bot_perms(interaction, send_denied_response=True)
+        if not is_allowed:
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        results = self.bot.gexp_results
+        responses = self.bot.hypixel.cache
+        uuids = self.bot.db.uuid_cache
+        caches = {
+            "GEXP Results": (results.hits, results.misses, len(results)),
+            "Hypixel Responses": (responses.hits, responses.misses, len(responses)),
+            "UUIDs (Memory)": (uuids.hits, uuids.misses, len(uuids)),
+        }
+        await interaction.edit_original_response(embed=CacheStatsEmbed(caches, results.generation))
+
+    @app_commands.command(name="uuid-cache", description="Shows the size and entry ages of the UUID cache (Admin Only)")
+    async def uuid_cache_stats_command(self, interaction: discord.Interaction) -> None:
+        """
+        Shows the size, memory hit rate and entry age distribution of the UUID cache.
+
+        Parameters:
+            self
+            interaction (discord.Interaction): The interaction object representing the user's interaction.
+
+        Returns:
+            None
+        """
+        is_allowed = await ensure_bot_perms(interaction, send_denied_response=True)
+        if not is_allowed:
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        uuids = self.bot.db.uuid_cache
+        stats = await uuids.get_stats()
+        await interaction.edit_original_response(
+            embed=UuidCacheStatsEmbed(stats, uuids.hits, uuids.misses, len(uuids)))
+
+
+async def setup(bot: commands.Bot):
+    logging.debug("Adding cog: StatsCommand")
+    await bot.add_cog(StatsCommandCog(bot))
@@ -11,10 +11,8 @@ returns an embed full of data
 Author: illyum
 """
 import datetime
-import time
 import discord
 import logging
-import requests
 
 from util import local
 
@@ -57,15 +55,12 @@ class TestCommandsCog(commands.GroupCog, name="test"):
         if not is_allowed:
             return
 
-        key = self.local_data.config.get("bot", "api_key")
-        test_url = f"https://api.hypixel.net/key?key={key}"
         logging.debug("Testing API key...")
-        start_time = time.time()
-        request = requests.get(test_url)
-        elapsed_time = int((time.time() - start_time) * 1000)
+        response = await self.bot.hypixel.key()
+        elapsed_time = int(response.elapsed * 1000)
         logging.debug("API Test response received")
-        headers = request.headers
-        content = request.json()
+        headers = response.headers
+        content = response.json()
         content_success = content.get('success', False)
 
         header_details = ""
@@ -79,7 +74,7 @@ class TestCommandsCog(commands.GroupCog, name="test"):
 
         headers_embed = discord.Embed()
         headers_embed.colour = discord.Colour.from_str("#ffffff")
-        headers_embed.add_field(name="Status Code: ", value=f"`{request.status_code}`", inline=False)
+        headers_embed.add_field(name="Status Code: ", value=f"`{response.status}`", inline=False)
         headers_embed.add_field(name="Elapsed Time: ", value=f"`{elapsed_time}ms`", inline=False)
         headers_embed.add_field(name="Headers: ", value=f"{header_details}", inline=True)
 
@@ -9,6 +9,11 @@ import argparse
 
 from util import local
 from discord.ext import commands
+from util.hypixel import HypixelClient
+from util.repository import Repositories
+from util.player_resolver import PlayerResolver
+from util.leaderboard import LeaderboardEngine
+from util.result_cache import ResultCache, SyncGeneration, DEFAULT_CAPACITY
 from util.local import LOCAL_DATA, LocalDataSingleton
 from logging.handlers import RotatingFileHandler
 
@@ -27,11 +32,22 @@ default_bot_intents.messages = True
 class ProudCircleDiscordBot(commands.Bot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.hypixel: HypixelClient = HypixelClient(LOCAL_DATA.config)
+        self.db: Repositories = Repositories(LOCAL_DATA.config)
+        # Bumped by every sync that changed GEXP rows, the leaderboards and /gexp results are cached per generation
+        self.sync_generation: SyncGeneration = SyncGeneration()
+        self.leaderboards: LeaderboardEngine = LeaderboardEngine(self.db.gexp, self.sync_generation)
+        self.gexp_results: ResultCache = ResultCache(
+            self.sync_generation, int(LOCAL_DATA.config.get("result_cache", "capacity") or DEFAULT_CAPACITY))
+        self.players: PlayerResolver = PlayerResolver(self.hypixel, self.db.uuid_cache, LOCAL_DATA.config)
 
     async def on_ready(self):
         logging.info(f"Logged in as {self.user}")
 
     async def setup_hook(self) -> None:
+        # Shared HTTP clients have to be created inside the bot's event loop
+        await self.hypixel.start()
+
         # Load all extensions: commands, events, tasks, etc.
         ext = LOCAL_DATA.local_data.get_all_extensions()
         for extension in ext:
@@ -42,6 +58,14 @@ class ProudCircleDiscordBot(commands.Bot):
         # Sync app commands
         await self.tree.sync()
 
+    async def close(self) -> None:
+        await super().close()
+        await self.players.close()
+        await self.hypixel.close()
+        await asyncio.to_thread(self.db.close)
+        # Extensions (and the GEXP writer) have been unloaded, nothing uses the databases anymore
+        LOCAL_DATA.local_data.close()
+
 
 def setup_logger(stdout_level=logging.INFO):
     discord_log_filename = os.path.join(local.LOGS_FOLDER, "discord.log")
@@ -1,8 +1,11 @@
 import discord
 import logging
 
+from typing import Union
+
+from util import mcign
 from util.local import LOCAL_DATA
-from util.embed_lib import InsufficientPermissionsEmbed
+from util.embed_lib import InsufficientPermissionsEmbed, InvalidArgumentEmbed, InvalidMojangUserEmbed
 
 
 async def ensure_bot_perms(interaction: discord.Interaction, send_denied_response: bool = False) -> bool:
@@ -24,20 +27,61 @@ async def ensure_bot_perms(interaction: discord.Interaction, send_denied_respons
 	if user.guild_permissions.administrator:
 		return True
 
-	admin_role_id = int(LOCAL_DATA.local_data.config.get("role_ids", "bot_admin"))
+	admin_role_id = LOCAL_DATA.local_data.config.get("role_ids", "bot_admin")
 	if admin_role_id is None:
 		if send_denied_response:
-			await interaction.response.send_message(embed=InsufficientPermissionsEmbed())
+			await send_denied(interaction)
 		return False
 
 	user_role_ids = [role.id for role in user.roles]
-	if admin_role_id in user_role_ids:
+	if int(admin_role_id) in user_role_ids:
 		return True
 
 	else:
 		if send_denied_response:
-			await interaction.response.send_message(embed=InsufficientPermissionsEmbed())
+			await send_denied(interaction)
 		return False
 
 
+async def send_denied(interaction: discord.Interaction) -> None:
+	"""
+	Sends the insufficient permissions embed as the response of an interaction.
+	A deferred interaction can't be responded to again, its original response is edited instead.
+
+	Parameters:
+		interaction (discord.interaction): the interaction from a command or event
+
+	Returns:
+		None
+	"""
+	if interaction.response.is_done():
+		await interaction.edit_original_response(embed=InsufficientPermissionsEmbed())
+	else:
+		await interaction.response.send_message(embed=InsufficientPermissionsEmbed())
+
+
+async def resolve_player_uuid(bot, interaction: discord.Interaction, player: Union[str, None]) -> Union[str, None]:
+	"""
+	Resolves the player argument of a command (defaults to the user's linked player).
+	An error embed is sent if the player can't be resolved.
+
+	Parameters:
+		bot (ProudCircleDiscordBot): the instance of the bot
+		interaction (discord.interaction): the (deferred) interaction of the command
+		player (str | None): the player name or UUID given to the command
+
+	Returns:
+		The dashed UUID of the player, or None if it couldn't be resolved.
+	"""
+	if player is None:
+		discord_link = await bot.db.links.get_link(interaction.user.id)
+		if discord_link is None:
+			await interaction.edit_original_response(embed=InvalidArgumentEmbed())
+			return None
+		player = mcign.dash_uuid(discord_link.uuid)
 
+	resolved_player = await bot.players.resolve(player)
+	if resolved_player is None:
+		await interaction.edit_original_response(embed=InvalidMojangUserEmbed(player=player))
+		return None
+	return resolved_player.uuid
@@ -0,0 +1,11 @@
+"""
+Constants shared with modules that must not import util.local.
+
+util.local opens the databases and loads the config as soon as it is imported, so
+modules like util.embed_lib read their constants from here instead.
+"""
+
+from typing import Tuple
+
+# The timed stages of a GEXP sync, in pipeline order (see IngestResult.timings)
+SYNC_PHASES: Tuple[str, ...] = ("fetch", "parse", "diff", "write", "commit")
@@ -1,6 +1,8 @@
 import discord
 import datetime
 
+from util.constants import SYNC_PHASES
+
 
 def to_hex(color):
     if isinstance(color, str):
@@ -69,7 +71,7 @@ class GexpLoggerStartEmbed(discord.Embed):
 
 
 class GexpLoggerFinishEmbed(discord.Embed):
-    def __init__(self, task_id, start_time, end_time, members_synced):
+    def __init__(self, task_id, start_time, end_time, members_synced, ingest_result=None):
         super().__init__()
         self.colour = discord.Colour(0x009900)
         self.title = f"GexpLogger Report ({task_id})"
@@ -78,6 +80,64 @@ class GexpLoggerFinishEmbed(discord.Embed):
         elapsed_time = end_time - start_time
         self.add_field(name="Elapsed Time: ", value=f"Elapsed time: {elapsed_time:.4f} seconds")
         self.add_field(name="Members Synced: ", value=f"{members_synced}")
+        if ingest_result is not None:
+            self.add_field(name="Rows: ", value=f"Inserted: `{ingest_result.inserted}`\n"
+                                                f"Updated: `{ingest_result.updated}`\n"
+                                                f"Unchanged: `{ingest_result.unchanged}`")
+            self.add_field(name="Members Skipped: ", value=f"{ingest_result.skipped} (unchanged or empty history)")
+            self.add_field(name="Payload: ", value=f"{ingest_result.payload_bytes / 1024:,.1f} KiB")
+            if ingest_result.timings:
+                phases = [f"{phase.capitalize()}: `{ingest_result.timings.get(phase, 0.0) * 1000:,.1f}ms`"
+                          for phase in SYNC_PHASES]
+                self.add_field(name="Phases: ", value="\n".join(phases))
+
+
+class SyncStatsEmbed(discord.Embed):
+    def __init__(self, run_count: int, phase_percentiles: dict, average_rows: dict):
+        super().__init__()
+        self.colour = discord.Colour(0x326e32)
+        self.title = f"GEXP Sync Statistics (last {run_count} runs)"
+        if run_count == 0:
+            self.description = "No successful sync runs recorded yet"
+            return
+        timings = [f"`{phase.capitalize():<7}` p50 `{p50:,.1f}ms` · p95 `{p95:,.1f}ms`"
+                   for phase, (p50, p95) in phase_percentiles.items()]
+        self.add_field(name="Phase Timings:", value="\n".join(timings), inline=False)
+        rows = [f"{name.capitalize()}: `{average:,.1f}`" for name, average in average_rows.items()]
+        self.add_field(name="Average per Run:", value="\n".join(rows), inline=False)
+
+
+class CacheStatsEmbed(discord.Embed):
+    def __init__(self, caches: dict, generation: int):
+        super().__init__()
+        self.colour = discord.Colour(0x326e32)
+        self.title = "Cache Statistics"
+        self.description = f"Sync generation: `{generation}`"
+        for name, (hits, misses, size) in caches.items():
+            lookups = hits + misses
+            hit_rate = hits / lookups * 100 if lookups else 0
+            self.add_field(name=f"{name}:", value=f"Hits: `{hits:,}`\n"
+                                                  f"Misses: `{misses:,}`\n"
+                                                  f"Hit Rate: `{hit_rate:.1f}%`\n"
+                                                  f"Entries: `{size:,}`")
+
+
+class UuidCacheStatsEmbed(discord.Embed):
+    def __init__(self, stats, hits: int, misses: int, memory_entries: int):
+        super().__init__()
+        self.colour = discord.Colour(0x326e32)
+        self.title = "UUID Cache Statistics"
+        lookups = hits + misses
+        hit_rate = hits / lookups * 100 if lookups else 0
+        self.add_field(name="Size:", value=f"Players: `{stats.entries:,}`\n"
+                                           f"Unknown Names: `{stats.unknown_names:,}`\n"
+                                           f"File: `{stats.file_bytes / 1024:,.1f} KiB`\n"
+                                           f"Free: `{stats.free_bytes / 1024:,.1f} KiB`")
+        self.add_field(name="Memory:", value=f"Hits: `{hits:,}`\n"
+                                             f"Misses: `{misses:,}`\n"
+                                             f"Hit Rate: `{hit_rate:.1f}%`\n"
+                                             f"Entries: `{memory_entries:,}`")
+        self.add_field(name="Age:", value="\n".join(f"{label}: `{count:,}`" for label, count in stats.ages.items()))
 
 
 class PlayerGexpDataNotFoundEmbed(discord.Embed):
@@ -104,55 +164,84 @@ class DailyGexpEmbed(discord.Embed):
 
 
 class WeeklyGexpEmbed(discord.Embed):
-    def __init__(self, player_name: str, player_uuid: str, gexp: dict, todays_date: datetime.datetime):
+    def __init__(self, player_name: str, player_uuid: str, gexp: list, first_date: datetime.date):
         super().__init__()
         player_name = player_name.replace("_", "\\_")
         self.colour = discord.Colour(0xe80560)
-        self.title = f"{player_name}'s Weekly Gexp for {(todays_date - datetime.timedelta(days=7)).strftime('%B %d, %Y')}"
-        gexp_history = []
-        weekly_gexp = 0
-        for day_gexp_date, day_gexp_amount in gexp.items():
-            date = datetime.datetime.strptime(day_gexp_date, "%Y-%m-%d")
-            formatted_date = date.strftime("%B %d, %Y")
-            gexp_history.append(f"`{formatted_date}`: {day_gexp_amount:,}")
-            weekly_gexp = weekly_gexp + day_gexp_amount
-        self.add_field(name=f"7 Day Gexp History", value='\n'.join(gexp_history))
+        iso_year, iso_week, _ = first_date.isocalendar()
+        self.title = f"{player_name}'s Weekly Gexp for the week of {first_date.strftime('%B %d, %Y')}"
+        gexp_history = [f"`{formatted_date}`: {day_gexp_amount:,}" for formatted_date, day_gexp_amount in gexp]
+        weekly_gexp = sum(day_gexp_amount for _, day_gexp_amount in gexp)
+        self.add_field(name=f"Week {iso_week}, {iso_year} Gexp History", value='\n'.join(gexp_history))
         self.set_thumbnail(url=f"https://mc-heads.net/avatar/{player_uuid}/64")
         self.description = f"That's a total of {weekly_gexp:,} gexp this week!"
 
 
 class MonthlyGexpEmbed(discord.Embed):
-    def __init__(self, player_name: str, player_uuid: str, gexp: dict, todays_date: datetime.datetime):
+    def __init__(self, player_name: str, player_uuid: str, gexp: list, todays_date: datetime.date):
         super().__init__()
         player_name = player_name.replace("_", "\\_")
         self.colour = discord.Colour(0xe80560)
         month_name = todays_date.strftime('%B')
         self.title = f"{player_name}'s Monthly Gexp for {month_name}"
-        gexp_history = []
-        monthly_gexp = 0
-        for day_gexp_date, day_gexp_amount in gexp.items():
-            date = datetime.datetime.strptime(day_gexp_date, "%Y-%m-%d")
-            formatted_date = date.strftime("%B %d, %Y")
-            gexp_history.append(f"`{formatted_date}`: {day_gexp_amount:,}")
-            monthly_gexp = monthly_gexp + day_gexp_amount
+        gexp_history = [f"`{formatted_date}`: {day_gexp_amount:,}" for formatted_date, day_gexp_amount in gexp]
+        monthly_gexp = sum(day_gexp_amount for _, day_gexp_amount in gexp)
         self.add_field(name=f"{month_name}'s Gexp History", value='\n'.join(gexp_history))
         self.set_thumbnail(url=f"https://mc-heads.net/avatar/{player_uuid}/64")
         self.description = f"That's a total of {monthly_gexp:,} gexp this month!"
 
 
 class YearlyGexpEmbed(discord.Embed):
-    def __init__(self, player_name: str, player_uuid: str, player_head, gexp: int):
+    def __init__(self, player_name: str, player_uuid: str, gexp: int, year: int):
         super().__init__()
         player_name = player_name.replace("_", "\\_")
-        player_uuid = player_uuid
-        player_head = player_head
-        gexp = gexp
         self.colour = discord.Colour(0xe80560)
-        self.title = player_name + "'s GEXP 2023"
+        self.title = f"{player_name}'s GEXP {year}"
         self.set_thumbnail(url=f"https://mc-heads.net/avatar/{player_uuid}/64")
         self.description = f"**{player_name}** has earned a grand total of {gexp:,} gexp this year!"
 
 
+class LifetimeGexpEmbed(discord.Embed):
+    def __init__(self, player_name: str, player_uuid: str, gexp: int):
+        super().__init__()
+        player_name = player_name.replace("_", "\\_")
+        self.colour = discord.Colour(0xe80560)
+        self.title = f"{player_name}'s Lifetime GEXP"
+        self.set_thumbnail(url=f"https://mc-heads.net/avatar/{player_uuid}/64")
+        self.description = f"**{player_name}** has earned a grand total of {gexp:,} gexp in the guild!"
+
+
+class RangeGexpEmbed(discord.Embed):
+    def __init__(self, player_name: str, player_uuid: str, gexp: int, first_date: datetime.date,
+                 last_date: datetime.date):
+        super().__init__()
+        player_name = player_name.replace("_", "\\_")
+        self.colour = discord.Colour(0xe80560)
+        self.title = f"{player_name}'s Gexp from {first_date.strftime('%B %d, %Y')} " \
+                     f"to {last_date.strftime('%B %d, %Y')}"
+        self.set_thumbnail(url=f"https://mc-heads.net/avatar/{player_uuid}/64")
+        days = (last_date - first_date).days + 1
+        self.description = f"**{player_name}** has earned a grand total of {gexp:,} gexp " \
+                           f"in {days:,} day{'s' if days != 1 else ''}!"
+
+
+class LeaderboardEmbed(discord.Embed):
+    def __init__(self, board: str, period: str, entries: list, player_rank: tuple = None):
+        super().__init__()
+        self.colour = discord.Colour(0xe80560)
+        self.title = f"{board.capitalize()} Gexp Leaderboard ({period})"
+        lines = []
+        # entries: (rank, player name, gexp) per listed player
+        for rank, player_name, gexp in entries:
+            player_name = player_name.replace("_", "\\_")
+            lines.append(f"`#{rank}` **{player_name}**: {gexp:,}")
+        self.description = "\n".join(lines) if lines else "No gexp has been recorded yet!"
+        if player_rank is not None:
+            player_name, rank, gexp = player_rank
+            player_name = player_name.replace("_", "\\_")
+            self.add_field(name="Rank:", value=f"**{player_name}** is `#{rank}` with {gexp:,} gexp", inline=False)
+
+
 class SuccessfullyLinkedEmbed(discord.Embed):
     def __init__(self, username, member: discord.Member):
         super().__init__()
@@ -0,0 +1,238 @@
+"""
+Background writer for the GEXP database.
+
+The GexpWriter owns a dedicated thread and its own sqlite3 connection
+to the GEXP database. Guild payloads are streamed to it chunk by chunk
+through a bounded queue and parsed, diffed and written on that thread,
+so the asyncio event loop only ever awaits a completion future and never
+runs sqlite3. Ingestion starts before the download has finished.
+
+Several payloads (e.g. of different guilds) may be streamed at the same
+time. They are parsed as their chunks arrive, but only one job at a time
+owns the writer's transaction; the others keep their parsed members until
+it is their turn, so every job is committed or rolled back on its own.
+"""
+
+import time
+import queue
+import asyncio
+import logging
+import sqlite3
+import threading
+import collections
+import concurrent.futures
+
+from typing import AsyncIterable, Deque, Dict, List, Union
+
+from util.local import GexpDatabase, IngestResult, close_database
+from util.guild_parser import GuildPayloadParser, GuildDataError, MemberRecord
+
+DEFAULT_QUEUE_SIZE: int = 4
+# Sentinels sent through the queue after the last chunk of a job
+_END = object()
+_ABORT = object()
+
+
+class _WriteJob:
+    """
+    A single guild payload being ingested by the GexpWriter.
+
+    Attributes:
+        guild_id (str | None): The Hypixel guild the payload belongs to.
+        parser (GuildPayloadParser): The streaming parser of the payload.
+        result (IngestResult): The combined result of every ingested batch.
+        future (concurrent.futures.Future): Resolved with the IngestResult once the job is committed.
+        pending (List[MemberRecord]): Parsed members that haven't been written yet.
+        ended (bool): Whether the whole payload has been received and parsed.
+        failed (bool): Whether the job failed (later chunks are ignored).
+    """
+
+    def __init__(self, guild_id: str = None):
+        self.guild_id = guild_id
+        self.parser: GuildPayloadParser = GuildPayloadParser()
+        self.result: IngestResult = IngestResult()
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.pending: List[MemberRecord] = []
+        self.ended: bool = False
+        self.failed: bool = False
+
+
+class GexpWriter(threading.Thread):
+    """
+    Dedicated writer thread for the GEXP database.
+
+    Each job is a guild payload that arrives as a sequence of chunks. Every chunk is
+    parsed into member records which are diffed and written with
+    GexpDatabase.ingest_guild_members; the job's transaction is committed after the
+    last chunk. A failing or aborted job is rolled back and its future receives the exception.
+
+    Jobs may be streamed concurrently. The first job to send a chunk becomes the
+    active job and is written chunk by chunk; members of the other jobs are buffered
+    and written once the active job has been committed (in order of arrival).
+
+    The writer keeps the expHistory fingerprint of every member in memory (loaded from
+    the database on start), members whose history didn't change are never written.
+
+    Attributes:
+        gexp_db (GexpDatabase): The database whose ingestion logic and path are used.
+        jobs (queue.Queue): The bounded queue of (job, chunk) messages feeding the writer thread.
+        connection (sqlite3.Connection): The writer's own connection (created on the writer thread).
+        fingerprints (Dict[str, int]): The last committed expHistory fingerprint per member.
+    """
+
+    def __init__(self, gexp_db: GexpDatabase, queue_size: int = DEFAULT_QUEUE_SIZE):
+        super().__init__(name="GexpWriter", daemon=True)
+        self.gexp_db = gexp_db
+        self.jobs: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.connection: Union[sqlite3.Connection, None] = None
+        self.fingerprints: Dict[str, int] = {}
+        # The job owning the writer's transaction, and the jobs waiting for it (writer thread only)
+        self._active: Union[_WriteJob, None] = None
+        self._waiting: Deque[_WriteJob] = collections.deque()
+
+    def run(self) -> None:
+        logging.debug("GexpWriter: Starting writer thread")
+        self.connection = self.gexp_db.connect()
+        self.fingerprints = self.gexp_db.load_fingerprints(connection=self.connection)
+        try:
+            while True:
+                message = self.jobs.get()
+                if message is None:
+                    break
+                self._process(*message)
+        finally:
+            close_database(self.connection)
+            logging.debug("GexpWriter: Writer thread stopped")
+
+    def _process(self, job: _WriteJob, chunk) -> None:
+        if job.failed:
+            return
+        try:
+            if chunk is _ABORT:
+                raise GuildDataError("Guild payload download was aborted")
+            # Stage 1: Parse
+            parse_start = time.perf_counter()
+            if chunk is _END:
+                job.parser.close()
+                job.result.payload_bytes = job.parser.bytes_received
+                job.ended = True
+            else:
+                job.pending.extend(job.parser.feed(chunk))
+            job.result.add_timing("parse", time.perf_counter() - parse_start)
+
+            if self._active is None and not self._waiting:
+                self._active = job
+            if job is self._active:
+                self._write(job)
+            elif job not in self._waiting:
+                self._waiting.append(job)
+        except Exception as e:
+            self._fail(job, e)
+        self._promote()
+
+    def _write(self, job: _WriteJob) -> None:
+        """Write the pending members of the active job, and commit it once its payload has ended."""
+        # Stage 2: Diff & Write
+        if job.pending:
+            members, job.pending = job.pending, []
+            job.result.add(self.gexp_db.ingest_guild_members(
+                members, guild_id=job.guild_id, connection=self.connection, fingerprints=self.fingerprints))
+        if not job.ended:
+            return
+        # Stage 3: Commit
+        commit_start = time.perf_counter()
+        self.connection.commit()
+        job.result.add_timing("commit", time.perf_counter() - commit_start)
+        self.fingerprints.update(job.result.fingerprints)
+        self._active = None
+        job.future.set_result(job.result)
+
+    def _fail(self, job: _WriteJob, exception: Exception) -> None:
+        job.failed = True
+        job.pending = []
+        if job is self._active:
+            self.connection.rollback()
+            self._active = None
+        elif job in self._waiting:
+            self._waiting.remove(job)
+        job.future.set_exception(exception)
+
+    def _promote(self) -> None:
+        """Hand the transaction to the next waiting job once the active job is done."""
+        while self._active is None and self._waiting:
+            job = self._waiting.popleft()
+            self._active = job
+            try:
+                self._write(job)
+            except Exception as e:
+                self._fail(job, e)
+
+    async def _put(self, message) -> None:
+        try:
+            self.jobs.put_nowait(message)
+        except queue.Full:
+            # The writer is behind, wait for room without blocking the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.jobs.put, message)
+
+    async def ingest_stream(self, chunks: AsyncIterable[bytes], guild_id: str = None) -> IngestResult:
+        """
+        Stream a guild payload to the writer and wait for it to be committed.
+
+        Chunks are queued as they are downloaded; when the bounded queue is full the
+        download waits for the writer (backpressure). The "fetch" timing of the result is
+        the time until the last chunk was received, it overlaps with the other phases.
+
+        Parameters:
+            chunks (AsyncIterable[bytes]): The body of the guild endpoint response.
+            guild_id (str, optional): The Hypixel guild the payload belongs to (stored with every row).
+
+        Returns:
+            IngestResult: The amount of inserted, updated and unchanged rows and skipped members.
+        """
+        job = _WriteJob(guild_id)
+        fetch_start = time.perf_counter()
+        try:
+            async for chunk in chunks:
+                if job.future.done():
+                    break
+                await self._put((job, chunk))
+        except BaseException:
+            await self._put((job, _ABORT))
+            raise
+        fetch_time = time.perf_counter() - fetch_start
+        await self._put((job, _END))
+        result = await asyncio.wrap_future(job.future)
+        result.add_timing("fetch", fetch_time)
+        return result
+
+    async def ingest(self, payload: Union[bytes, str], guild_id: str = None) -> IngestResult:
+        """
+        Ingest a fully downloaded guild payload.
+
+        Parameters:
+            payload (Union[bytes, str]): The raw body of the guild endpoint response.
+            guild_id (str, optional): The Hypixel guild the payload belongs to.
+
+        Returns:
+            IngestResult: The amount of inserted, updated and unchanged rows and skipped members.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+
+        async def single_chunk():
+            yield payload
+
+        return await self.ingest_stream(single_chunk(), guild_id=guild_id)
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Stop the writer thread once every queued job has been processed.
+
+        Parameters:
+            timeout (float, optional): How long to wait for the thread to finish.
+
+        Returns:
+            None
+        """
+        self.jobs.put(None)
+        self.join(timeout)
@@ -0,0 +1,282 @@
+"""
+Incremental parser for the Hypixel `/guild` endpoint.
+
+The guild payload is mostly the "members" array. Instead of decoding the whole
+body into nested dicts, GuildPayloadParser is fed the body chunk by chunk as it
+is downloaded and yields one compact MemberRecord per member as soon as that
+member's JSON object is complete. Everything around the members array is skipped.
+"""
+
+import re
+import sys
+import json
+import uuid
+import codecs
+import datetime
+import functools
+
+from array import array
+from typing import Iterator, List, Tuple, Union
+
+EXP_HISTORY_DAYS: int = 7
+# Characters that change the parser's state, everything else is skipped in bulk
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_MEMBERS_KEY = re.compile(r'"members"\s*:\s*$')
+_MEMBER_SEPARATOR = re.compile(r'[\s,]*')
+_DECODER = json.JSONDecoder()
+# Consumed text is dropped from the buffer once it grows past this many characters
+_COMPACT_THRESHOLD: int = 1 << 16
+
+
+class GuildDataError(Exception):
+    """Raised when the guild endpoint returned an unsuccessful or malformed payload."""
+
+
+class MemberRecord:
+    """
+    A compact representation of one guild member.
+
+    Attributes:
+        uuid (bytes): The 16 raw bytes of the member's UUID.
+        rank (str): The member's guild rank (interned).
+        joined (int): When the member joined the guild (epoch milliseconds).
+        last_day (Union[datetime.date, None]): The most recent day of the expHistory, None if it is empty.
+        amounts (array): The GEXP earned per day, `amounts[i]` belongs to `last_day - i days`.
+        present (int): Bit `i` is set if `amounts[i]` was in the payload (missing days are 0 in `amounts`
+            but must not overwrite stored days).
+    """
+
+    __slots__ = ("uuid", "rank", "joined", "last_day", "amounts", "present")
+
+    def __init__(self, uuid_bytes: bytes, rank: str, joined: int, last_day: Union[datetime.date, None],
+                 amounts: array, present: int = (1 << EXP_HISTORY_DAYS) - 1):
+        self.uuid = uuid_bytes
+        self.rank = rank
+        self.joined = joined
+        self.last_day = last_day
+        self.amounts = amounts
+        self.present = present
+
+    @classmethod
+    def from_member(cls, member: dict) -> 'MemberRecord':
+        """
+        Build a record from one decoded entry of the "members" array.
+
+        Parameters:
+            member (dict): The member object of the guild endpoint.
+
+        Returns:
+            MemberRecord: The compact record.
+        """
+        xp_history = member.get("expHistory", {})
+        amounts = array("q", bytes(8 * EXP_HISTORY_DAYS))
+        present = 0
+        last_day = None
+        if xp_history:
+            # ISO dates sort lexicographically
+            last_day = _parse_day(max(xp_history))
+            last_ordinal = last_day.toordinal()
+            for date, amount in xp_history.items():
+                index = last_ordinal - _parse_day(date).toordinal()
+                if 0 <= index < EXP_HISTORY_DAYS:
+                    amounts[index] = int(amount)
+                    present |= 1 << index
+        return cls(
+            uuid_bytes=bytes.fromhex(member["uuid"].replace("-", "")),
+            rank=sys.intern(member.get("rank", "")),
+            joined=int(member.get("joined", 0)),
+            last_day=last_day,
+            amounts=amounts,
+            present=present
+        )
+
+    @property
+    def uuid_string(self) -> str:
+        """The lowercase, hyphenated UUID of the member."""
+        return str(uuid.UUID(bytes=self.uuid))
+
+    def exp_history(self) -> Iterator[Tuple[datetime.date, int]]:
+        """
+        Iterate over the (day, amount) pairs of the expHistory, most recent day first.
+        Days missing from the payload are left out.
+        """
+        for index, amount in enumerate(self.amounts):
+            if self.present >> index & 1:
+                yield self.last_day - datetime.timedelta(days=index), amount
+
+
+class GuildPayloadParser:
+    """
+    Streaming parser for the body of the guild endpoint.
+
+    Feed it the raw body with `feed` as it arrives, every call returns the members that
+    were completed by that chunk. Call `close` once the body has been fully received.
+
+    Only the part of the body that hasn't been consumed is kept in memory: a partially
+    received member and anything in front of the "members" array.
+
+    Attributes:
+        members_found (bool): Whether the "members" array of the guild has been reached.
+        member_count (int): The number of members parsed so far.
+        bytes_received (int): The size of the body received so far.
+    """
+
+    def __init__(self):
+        self.members_found: bool = False
+        self.member_count: int = 0
+        self.bytes_received: int = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer: str = ""
+        self._pos: int = 0
+        self._depth: int = 0
+        self._members_done: bool = False
+
+    def feed(self, chunk: bytes) -> List[MemberRecord]:
+        """
+        Feed the next chunk of the body.
+
+        Parameters:
+            chunk (bytes): The next part of the response body.
+
+        Returns:
+            List[MemberRecord]: The members completed by this chunk.
+        """
+        self.bytes_received += len(chunk)
+        if self._members_done:
+            return []
+        self._buffer += self._decoder.decode(chunk)
+        records = self._scan()
+        self._compact()
+        return records
+
+    def close(self) -> None:
+        """
+        Finish parsing once the full body has been received.
+
+        Raises:
+            GuildDataError: If the payload was unsuccessful or didn't contain a members array.
+        """
+        self._buffer += self._decoder.decode(b"", final=True)
+        if self.members_found:
+            if not self._members_done:
+                raise GuildDataError("Guild payload ended inside the members array")
+            return
+        # No members: the body is small (usually an error), decode it to find the cause
+        try:
+            guild_data = json.loads(self._buffer)
+        except ValueError:
+            raise GuildDataError(f"Malformed guild payload: {self._buffer[:200]!r}")
+        if not guild_data.get("success", False):
+            raise GuildDataError(f"Unsuccessful in scraping API data: {guild_data}")
+        if guild_data.get("guild") is None:
+            raise GuildDataError("Guild not found")
+        raise GuildDataError("Guild payload does not contain any members")
+
+    def _scan(self) -> List[MemberRecord]:
+        if not self.members_found and not self._find_members():
+            return []
+        records = []
+        buffer = self._buffer
+        while True:
+            match = _MEMBER_SEPARATOR.match(buffer, self._pos)
+            position = match.end()
+            if position >= len(buffer):
+                self._pos = position
+                break
+            if buffer[position] == "]":
+                self._members_done = True
+                break
+            try:
+                member, end = _DECODER.raw_decode(buffer, position)
+            except ValueError:
+                # The member is not complete yet (a malformed one is reported by `close`)
+                self._pos = position
+                break
+            records.append(MemberRecord.from_member(member))
+            self.member_count += 1
+            self._pos = end
+        return records
+
+    def _find_members(self) -> bool:
+        """Skip ahead to the start of the guild's members array, tracking the nesting depth."""
+        buffer = self._buffer
+        while True:
+            match = _STRUCTURE.search(buffer, self._pos)
+            if match is None:
+                self._pos = len(buffer)
+                return False
+            char = match.group()
+            index = match.start()
+            if char == '"':
+                end = _string_end(buffer, index)
+                if end is None:
+                    # Wait for the rest of the string
+                    self._pos = index
+                    return False
+                self._pos = end
+                continue
+            self._pos = index + 1
+            if char == "{" or char == "[":
+                # The members array is a key of the "guild" object, which sits at depth 2
+                if char == "[" and self._depth == 2 and _MEMBERS_KEY.search(buffer, max(index - 32, 0), index):
+                    self.members_found = True
+                    return True
+                self._depth += 1
+            else:
+                self._depth -= 1
+
+    def _compact(self) -> None:
+        if not self.members_found:
+            # Everything before the members array is kept, in case the payload turns out to be an error
+            return
+        if self._members_done:
+            self._buffer = ""
+            self._pos = 0
+            return
+        if self._pos >= _COMPACT_THRESHOLD:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_day(date: str) -> datetime.date:
+    # Every member of a payload shares the same seven dates
+    return datetime.date.fromisoformat(date)
+
+
+def _string_end(buffer: str, start: int) -> Union[int, None]:
+    """
+    Find the index right after the closing quote of the string starting at `start`.
+
+    Returns:
+        Union[int, None]: The index, or None if the string is not complete yet.
+    """
+    position = start + 1
+    while True:
+        position = buffer.find('"', position)
+        if position == -1:
+            return None
+        backslashes = 0
+        while buffer[position - 1 - backslashes] == "\\":
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return position + 1
+        position += 1
+
+
+def parse_guild_payload(payload: Union[bytes, str]) -> List[MemberRecord]:
+    """
+    Parse a fully downloaded guild payload into member records.
+
+    Parameters:
+        payload (Union[bytes, str]): The body of the guild endpoint.
+
+    Returns:
+        List[MemberRecord]: One record per guild member.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    parser = GuildPayloadParser()
+    records = parser.feed(payload)
+    parser.close()
+    return records
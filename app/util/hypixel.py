@@ -0,0 +1,223 @@
+import json
+import time
+import asyncio
+import aiohttp
+import logging
+import contextlib
+
+from multidict import CIMultiDict
+from typing import Any, AsyncIterator, Dict, Union
+
+from util.ratelimit import RateLimitScheduler
+from util.response_cache import ResponseCache
+from util.local import TomlConfig, RESPONSE_CACHE_PATH
+
+HYPIXEL_API_URL: str = "https://api.hypixel.net"
+DEFAULT_TIMEOUT_SECONDS: float = 10.0
+DEFAULT_CONNECTION_LIMIT: int = 10
+DNS_CACHE_SECONDS: int = 300
+KEEPALIVE_SECONDS: int = 60
+STREAM_CHUNK_SIZE: int = 1 << 14
+
+
+class HypixelResponse:
+    """
+    Represents a response from the Hypixel API.
+
+    Attributes:
+        status (int): The HTTP status code.
+        headers (Dict[str, str]): The response headers.
+        body (bytes): The raw response body.
+        elapsed (float): The time it took to receive the full response in seconds.
+    """
+
+    def __init__(self, status: int, headers, body: bytes, elapsed: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+
+    def json(self) -> Dict[str, Any]:
+        """
+        Decode the response body.
+
+        Returns:
+            Dict[str, Any]: The decoded JSON body, or an empty dict if the body is not valid JSON.
+        """
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            logging.warning(f"Invalid JSON body received from Hypixel (status: {self.status})")
+            return {}
+
+
+class HypixelClient:
+    """
+    Shared async client for the Hypixel API (Meant to be singleton, see ProudCircleDiscordBot.setup_hook).
+
+    The client owns one long-lived aiohttp session. Its connector keeps connections alive
+    between requests and caches DNS lookups, so repeated calls skip the TCP/TLS handshakes.
+    Every request gets its own timeout and the API key is sent as a header (never in the URL).
+
+    All requests share one RateLimitScheduler, so they wait for quota *before* they are
+    sent instead of running into the key's rate limit.
+
+    The base URL can be pointed somewhere else (e.g. the local API stand-in) with
+    `[api] hypixel_url`.
+
+    Successful responses are kept in a ResponseCache for a per-endpoint time-to-live, and
+    identical requests that are in flight at the same time share a single network request.
+
+    Attributes:
+        config (TomlConfig): The bot configuration, read on every request so reloads apply.
+        session (aiohttp.ClientSession): The pooled session (available after `start`).
+        scheduler (RateLimitScheduler): The token bucket guarding the API key's quota.
+        cache (ResponseCache): The response cache in front of the API.
+
+    Methods:
+        start: Creates the pooled session.
+        request: Sends a GET request to an API endpoint.
+        stream: Sends a GET request and streams the response body.
+        iter_body: Iterates over the body of a request as it is downloaded (not cached).
+        guild: Fetches a guild by its ID.
+        player: Fetches a player by their UUID.
+        key: Fetches information about the configured API key.
+        close: Closes the session and its connections.
+    """
+
+    def __init__(self, config: TomlConfig):
+        self.config = config
+        self.session: Union[aiohttp.ClientSession, None] = None
+        self.scheduler: RateLimitScheduler = RateLimitScheduler()
+        cache_path = RESPONSE_CACHE_PATH if self.config.get("response_cache", "persist") else None
+        self.cache: ResponseCache = ResponseCache(
+            config, factory=lambda status, headers, body: HypixelResponse(status, CIMultiDict(headers), body, 0.0),
+            path=cache_path)
+
+    def _setting(self, key: str, default):
+        value = self.config.get("hypixel", key)
+        return default if value is None else value
+
+    async def start(self) -> None:
+        """
+        Create the pooled session. Must be called from within the bot's event loop.
+
+        Returns:
+            None
+        """
+        connector = aiohttp.TCPConnector(
+            limit=int(self._setting("connection_limit", DEFAULT_CONNECTION_LIMIT)),
+            ttl_dns_cache=DNS_CACHE_SECONDS,
+            keepalive_timeout=KEEPALIVE_SECONDS
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
+        self.cache.load()
+        logging.debug("Hypixel client session started")
+
+    def _api_url(self) -> str:
+        return self.config.get("api", "hypixel_url") or HYPIXEL_API_URL
+
+    def _request_options(self) -> Dict[str, Any]:
+        headers = {}
+        key = self.config.get("bot", "api_key")
+        if key is not None:
+            headers["API-Key"] = key
+        timeout = aiohttp.ClientTimeout(total=float(self._setting("timeout_seconds", DEFAULT_TIMEOUT_SECONDS)))
+        return {"headers": headers, "timeout": timeout}
+
+    @contextlib.asynccontextmanager
+    async def stream(self, endpoint: str, **params) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Send a GET request to a Hypixel API endpoint without reading the body.
+
+        Usage:
+            async with client.stream("/guild", id=guild_id) as response:
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    ...
+
+        Parameters:
+            endpoint (str): The endpoint path, e.g. "/guild".
+            **params: The query parameters of the request.
+
+        Returns:
+            AsyncIterator[aiohttp.ClientResponse]: The response, its body is read by the caller.
+        """
+        await self.scheduler.acquire()
+        answered = False
+        try:
+            async with self.session.get(self._api_url() + endpoint, params=params,
+                                        **self._request_options()) as response:
+                self.scheduler.update(response.headers, response.status)
+                answered = True
+                if response.status != 200:
+                    logging.warning(f"Unknown status code: {response.status} (Hypixel {endpoint})")
+                yield response
+        finally:
+            if not answered:
+                self.scheduler.release()
+
+    async def request(self, endpoint: str, **params) -> HypixelResponse:
+        """
+        Send a GET request to a Hypixel API endpoint (or answer it from the cache).
+
+        Parameters:
+            endpoint (str): The endpoint path, e.g. "/guild".
+            **params: The query parameters of the request.
+
+        Returns:
+            HypixelResponse: The response with its fully read body.
+        """
+        async def fetch() -> HypixelResponse:
+            start_time = time.perf_counter()
+            async with self.stream(endpoint, **params) as response:
+                body = await response.read()
+                return HypixelResponse(response.status, response.headers, body, time.perf_counter() - start_time)
+
+        return await self.cache.fetch(ResponseCache.make_key(endpoint, params), self.cache.ttl(endpoint), fetch,
+                                      cacheable=lambda response: response.status == 200)
+
+    async def iter_body(self, endpoint: str, **params) -> AsyncIterator[bytes]:
+        """
+        Iterate over the body of a GET request while it is downloaded.
+
+        A cached body (e.g. of an earlier `request`) is yielded as a single chunk. Otherwise
+        the body is streamed from the API and is neither cached nor shared with identical
+        requests: keeping a copy of the body would defeat the point of streaming it (only
+        one chunk is held in memory at a time).
+
+        Parameters:
+            endpoint (str): The endpoint path, e.g. "/guild".
+            **params: The query parameters of the request.
+
+        Returns:
+            AsyncIterator[bytes]: The chunks of the response body.
+        """
+        cached = self.cache.lookup(ResponseCache.make_key(endpoint, params))
+        if cached is not None:
+            yield cached.body
+            return
+
+        async with self.stream(endpoint, **params) as response:
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                yield chunk
+
+    async def guild(self, guild_id: str) -> HypixelResponse:
+        return await self.request("/guild", id=guild_id)
+
+    async def player(self, uuid: str) -> HypixelResponse:
+        return await self.request("/player", uuid=uuid)
+
+    async def key(self) -> HypixelResponse:
+        return await self.request("/key")
+
+    async def close(self) -> None:
+        """
+        Close the session and all pooled connections.
+
+        Returns:
+            None
+        """
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.cache.save()
+        logging.debug("Hypixel client session closed")
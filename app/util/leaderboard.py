@@ -0,0 +1,181 @@
+"""
+GEXP leaderboards (daily, weekly, monthly, yearly and lifetime).
+
+A board is built from the rollup totals of its period (see util.rollups) and kept in
+memory. Every board is tagged with the sync generation it was built in; a GEXP sync
+that changed rows bumps the shared SyncGeneration (see util.result_cache), so boards
+are only rebuilt after the data actually changed and every read in between is a
+dictionary lookup.
+"""
+
+import heapq
+import bisect
+import datetime
+import logging
+
+from typing import Dict, List, Tuple, Union
+
+from util.single_flight import SingleFlight
+from util.result_cache import SyncGeneration
+
+BOARDS: Tuple[str, ...] = ("daily", "weekly", "monthly", "yearly", "lifetime")
+# The amount of top entries kept per board
+DEFAULT_TOP_SIZE: int = 100
+
+
+def board_period(board: str, date: datetime.date) -> Union[int, str]:
+    """
+    Get the period of a board that a date falls in (a board is rebuilt when its period changes).
+
+    Parameters:
+        board (str): The board, one of BOARDS.
+        date (datetime.date): The date.
+
+    Returns:
+        Union[int, str]: A value identifying the period.
+    """
+    if board == "daily":
+        return date.toordinal()
+    if board == "weekly":
+        iso_year, iso_week, _ = date.isocalendar()
+        return iso_year * 100 + iso_week
+    if board == "monthly":
+        return date.year * 100 + date.month
+    if board == "yearly":
+        return date.year
+    return "lifetime"
+
+
+class Leaderboard:
+    """
+    One leaderboard, built from the totals of every player in its period.
+
+    Attributes:
+        board (str): The board, one of BOARDS.
+        date (datetime.date): The date the board was built for.
+        generation (int): The sync generation the board was built in.
+        top (List[Tuple[str, int]]): The (UUID, total) of the best players, best first.
+        totals (Dict[str, int]): The total of every player on the board.
+    """
+
+    def __init__(self, board: str, date: datetime.date, generation: int, totals: List[Tuple[str, int]],
+                 top_size: int = DEFAULT_TOP_SIZE):
+        self.board = board
+        self.date = date
+        self.generation = generation
+        # Bounded heap: O(n log k) instead of sorting every player
+        self.top: List[Tuple[str, int]] = heapq.nlargest(top_size, totals, key=lambda entry: entry[1])
+        self.totals: Dict[str, int] = dict(totals)
+        self._amounts: List[int] = sorted(self.totals.values())
+
+    def __len__(self):
+        return len(self.totals)
+
+    def rank(self, uuid: str) -> Union[Tuple[int, int], None]:
+        """
+        Get the rank of a player (players with the same total share a rank).
+
+        Parameters:
+            uuid (str): The dashed UUID of the player.
+
+        Returns:
+            Union[Tuple[int, int], None]: The (rank, total), or None if the player isn't on the board.
+        """
+        amount = self.totals.get(uuid)
+        if amount is None:
+            return None
+        # 1 + the amount of players with a larger total
+        return len(self._amounts) - bisect.bisect_right(self._amounts, amount) + 1, amount
+
+
+class LeaderboardEngine:
+    """
+    Builds and caches the leaderboards.
+
+    Attributes:
+        gexp (GexpRepository): The queries of the GEXP database.
+        sync_generation (SyncGeneration): The generation of the GEXP data.
+        top_size (int): The amount of top entries kept per board.
+
+    Methods:
+        get: Gets a board (built if it isn't cached for the current generation).
+        top: Gets the best players of a board.
+        rank: Gets the rank of a player on a board.
+    """
+
+    def __init__(self, gexp, sync_generation: SyncGeneration, top_size: int = DEFAULT_TOP_SIZE):
+        self.gexp = gexp
+        self.sync_generation = sync_generation
+        self.top_size = top_size
+        self._boards: Dict[Tuple[str, Union[int, str]], Leaderboard] = {}
+        # Builds in flight by (board, period, generation)
+        self._builds: SingleFlight = SingleFlight()
+
+    @property
+    def generation(self) -> int:
+        return self.sync_generation.value
+
+    async def get(self, board: str, date: datetime.date = None) -> Leaderboard:
+        """
+        Get a board, built from the database if it isn't cached for the current generation.
+
+        Concurrent reads of a board that is being built wait for the same build.
+
+        Parameters:
+            board (str): The board, one of BOARDS.
+            date (datetime.date, optional): A day of the board's period. Defaults to today.
+
+        Returns:
+            Leaderboard: The board.
+        """
+        if board not in BOARDS:
+            raise ValueError(f"Unknown leaderboard: {board}")
+        date = date or datetime.date.today()
+        key = (board, board_period(board, date))
+        cached = self._boards.get(key)
+        if cached is not None and cached.generation == self.generation:
+            return cached
+        if cached is not None:
+            # The data changed since the boards were built, drop every outdated board
+            self._boards = {board_key: leaderboard for board_key, leaderboard in self._boards.items()
+                            if leaderboard.generation == self.generation}
+
+        generation = self.generation
+
+        async def build() -> Leaderboard:
+            totals = await self.gexp.get_board_totals(board, date)
+            leaderboard = Leaderboard(board, date, generation, totals, self.top_size)
+            # A sync committed while the board was built, don't keep the outdated board
+            if generation == self.generation:
+                self._boards[key] = leaderboard
+            return leaderboard
+
+        return await self._builds.run((*key, generation), build)
+
+    async def top(self, board: str, count: int = 10, date: datetime.date = None) -> List[Tuple[str, int]]:
+        """
+        Get the best players of a board.
+
+        Parameters:
+            board (str): The board, one of BOARDS.
+            count (int, optional): The amount of players (at most `top_size`).
+            date (datetime.date, optional): A day of the board's period. Defaults to today.
+
+        Returns:
+            List[Tuple[str, int]]: The (UUID, total) of the best players, best first.
+        """
+        return (await self.get(board, date)).top[:count]
+
+    async def rank(self, board: str, uuid: str, date: datetime.date = None) -> Union[Tuple[int, int], None]:
+        """
+        Get the rank of a player on a board.
+
+        Parameters:
+            board (str): The board, one of BOARDS.
+            uuid (str): The dashed UUID of the player.
+            date (datetime.date, optional): A day of the board's period. Defaults to today.
+
+        Returns:
+            Union[Tuple[int, int], None]: The (rank, total), or None if the player isn't on the board.
+        """
+        return (await self.get(board, date)).rank(uuid)
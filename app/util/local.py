@@ -1,13 +1,20 @@
 import os
+import re
 import toml
 import time
 import json
 import sqlite3
+import hashlib
 import logging
 
 from os import path
 from datetime import datetime
-from typing import List, Dict, Any, Tuple, Union
+from typing import List, Dict, Any, Tuple, Union, Iterable
+
+from util import schema, migrate_v2, rollups
+from util.guild_parser import MemberRecord
+from util.constants import SYNC_PHASES
+from util.uuider import is_uuid, normalize_uuid
 
 # Variables located at the bottom of this file
 DATA_FOLDER: str = "../data"
@@ -18,9 +25,25 @@ DATABASE_FOLDER: str = path.join(DATA_FOLDER, "db")
 DATABASE_PATH: str = path.join(DATABASE_FOLDER, "proudcircle.db")
 CONFIG_PATH: str = path.join(DATA_FOLDER, "settings.conf")
 CACHE_PATH: str = path.join(DATABASE_FOLDER, "uuid.cache")
+RESPONSE_CACHE_PATH: str = path.join(DATABASE_FOLDER, "responses.cache")
+# How long cached UUIDs/names and names known not to exist stay alive, overridden by
+# `[uuid_cache] lifetime` and `[uuid_cache] missing_lifetime`
 CACHE_LIFETIME_SECONDS: int = 300
+MISSING_NAME_LIFETIME_SECONDS: int = 300
+# Members whose stored days are read (and compared) per query during an ingestion
+INGEST_BATCH_SIZE: int = 500
 DIVISION_DATA: str = path.join(DATA_FOLDER, "xp_divisions_reqs.json")
 WEEKLY_POINTS_DATA: str = path.join(DATA_FOLDER, "weekly_points_reqs.json")
+# Pragmas applied to every database connection, each one can be overridden in the `database` config section
+DATABASE_PRAGMAS: Dict[str, Union[str, int]] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -16000,  # Negative values are KiB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
 
 PROGRAM_VARS = {}
 
@@ -43,6 +66,57 @@ def setup():
             os.mkdir(folder)
 
 
+def connect_database(database_path: str, config: 'TomlConfig' = None, **kwargs) -> sqlite3.Connection:
+    """
+    Open a tuned connection to an SQLite database.
+
+    Applies DATABASE_PRAGMAS (overridden by the `database` config section). In WAL mode
+    readers don't block behind a writer and a commit doesn't wait for the database file
+    to be rewritten, `synchronous=NORMAL` is still crash safe with WAL.
+
+    Parameters:
+        database_path (str): The path to the database file.
+        config (TomlConfig, optional): The bot configuration.
+        **kwargs: Passed on to `sqlite3.connect`.
+
+    Returns:
+        sqlite3.Connection: The connection.
+    """
+    connection = sqlite3.connect(database_path, **kwargs)
+    for pragma, default in DATABASE_PRAGMAS.items():
+        value = None if config is None else config.get("database", pragma)
+        if value is None:
+            value = default
+        if not _PRAGMA_VALUE.match(str(value)):
+            logging.warning(f"Ignoring invalid value for database.{pragma}: {value!r}")
+            value = default
+        connection.execute(f"PRAGMA {pragma} = {value}")
+    return connection
+
+
+def close_database(connection: sqlite3.Connection) -> None:
+    """
+    Cleanly close a connection opened with `connect_database`.
+
+    Checkpoints and truncates the write-ahead log, lets SQLite update its query planner
+    statistics (`PRAGMA optimize`) and closes the connection.
+
+    Parameters:
+        connection (sqlite3.Connection): The connection to close.
+
+    Returns:
+        None
+    """
+    try:
+        connection.commit()
+        if connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.execute("PRAGMA optimize")
+    except sqlite3.Error as e:
+        logging.warning(f"Could not optimize database before closing: {e}")
+    connection.close()
+
+
 class GexpDatabase:
     """
     Represents a GEXP Database.
@@ -59,10 +133,15 @@ class GexpDatabase:
     Methods:
         __init__: Initializes the GexpDatabase object.
         update_tables: Updates the list of tables in the database.
+        ingest_guild_members: Writes the expHistory of all guild members in a few batched statements.
+        connect: Opens another tuned connection to the database (e.g. for a worker thread).
+        close: Checkpoints, optimizes and closes the database.
+        load_fingerprints: Loads the expHistory fingerprint of every member.
+        save_fingerprints: Stores expHistory fingerprints.
 
     """
 
-    def __init__(self):
+    def __init__(self, config: 'TomlConfig' = None):
         """
         Initialize the GexpDatabase object.
 
@@ -71,6 +150,7 @@ class GexpDatabase:
 
         Parameters:
             self
+            config (TomlConfig, optional): The bot configuration (connection settings).
 
         Returns:
             None
@@ -78,8 +158,9 @@ class GexpDatabase:
         """
         logging.info("Loading GEXP Database...")
         self.path = DATABASE_PATH
+        self.config = config
         self._create_gexp_table()
-        self.connection = sqlite3.connect(self.path)
+        self.connection = self.connect()
         self.cursor = self.connection.cursor()
         self.tables: List[str] = []
         self.update_tables()
@@ -103,12 +184,30 @@ class GexpDatabase:
         command = "SELECT name FROM sqlite_master WHERE type='table';"
         self.tables = self.cursor.execute(command).fetchall()
 
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a new tuned connection to the GEXP database.
+
+        Returns:
+            sqlite3.Connection: The connection, owned by the caller.
+        """
+        return connect_database(self.path, self.config)
+
+    def close(self) -> None:
+        """
+        Checkpoint, optimize and close the database connection.
+
+        Returns:
+            None
+        """
+        close_database(self.connection)
+
     def _create_gexp_table(self) -> None:
         """
-        Create the GEXP table
+        Create the GEXP tables
 
-        This method create the GEXP table in the GEXP History Database if it doesn't exist.
-        It also creates triggers for formatting the UUID.
+        This method creates the tables of the GEXP History Database (see util.schema) that
+        don't exist yet. A legacy expHistory table is migrated to schema v2 first.
 
         Parameters:
             self
@@ -118,42 +217,307 @@ class GexpDatabase:
         """
         logging.debug("Creating Gexp Table")
 
-        create_table_command = """
-        CREATE TABLE IF NOT EXISTS expHistory (
+        connection = self.connect()
+        cursor = connection.cursor()
+        schema.create_schema(connection)
+
+        # Databases written before schema v2 still store their history in expHistory
+        if migrate_v2.has_legacy_table(connection):
+            logging.info("Found a legacy expHistory table, migrating it to schema v2")
+            migrate_v2.migrate(connection)
+        if cursor.execute("PRAGMA user_version").fetchone()[0] < schema.SCHEMA_VERSION:
+            # The rollup tables were added in version 3, the running totals in version 4
+            logging.info("Building the GEXP rollup tables")
+            rollups.rebuild(connection)
+            cursor.execute(f"PRAGMA user_version = {schema.SCHEMA_VERSION}")
+
+        # Fingerprint of the last ingested expHistory of every member, see `fingerprint_exp_history`
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS memberFingerprint (
+            uuid TEXT PRIMARY KEY NOT NULL,
+            fingerprint INTEGER NOT NULL,
+            updated INTEGER NOT NULL
+        );
+        """)
+
+        # Statistics of every sync run, phase timings are in milliseconds
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS syncRuns (
             id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
-            timestamp INTEGER NOT NULL,
-            date TEXT NOT NULL,
-            uuid TEXT NOT NULL,
-            amount INTEGER NOT NULL
+            taskId TEXT NOT NULL,
+            started INTEGER NOT NULL,
+            success INTEGER NOT NULL,
+            members INTEGER NOT NULL,
+            inserted INTEGER NOT NULL,
+            updated INTEGER NOT NULL,
+            unchanged INTEGER NOT NULL,
+            skipped INTEGER NOT NULL,
+            payloadBytes INTEGER NOT NULL,
+            fetchMs REAL NOT NULL,
+            parseMs REAL NOT NULL,
+            diffMs REAL NOT NULL,
+            writeMs REAL NOT NULL,
+            commitMs REAL NOT NULL,
+            totalMs REAL NOT NULL
         );
-        """
-        connection = sqlite3.connect(self.path)
-        cursor = connection.cursor()
-        cursor.execute(create_table_command)
-
-        create_trigger_command_uuid = """
-        CREATE TRIGGER IF NOT EXISTS format_uuid_trigger
-        AFTER INSERT ON expHistory
-        BEGIN
-            UPDATE expHistory SET uuid =
-                CASE
-                    WHEN instr(uuid, '-') = 0 THEN
-                        substr(uuid, 1, 8) || '-' ||
-                        substr(uuid, 9, 4) || '-' ||
-                        substr(uuid, 13, 4) || '-' ||
-                        substr(uuid, 17, 4) || '-' ||
-                        substr(uuid, 21)
-                    ELSE
-                        uuid
-                END
-            WHERE id = new.id;
-        END;
-        """
-        cursor.execute(create_trigger_command_uuid)
+        """)
 
         connection.commit()
         connection.close()
 
+    def ingest_guild_members(
+            self,
+            members: Iterable[MemberRecord],
+            guild_id: str = None,
+            connection: sqlite3.Connection = None,
+            fingerprints: Dict[str, int] = None) -> 'IngestResult':
+        """
+        Write the expHistory of every member of a guild in a few batched statements.
+
+        The stored days of all given members are read with one range query per batch of
+        members (on the expDaily primary key) and compared in memory. Rows that do not exist
+        yet are inserted, rows whose amount (or guild) changed are updated and rows that are
+        already correct are not written at all. The weekly, monthly, yearly and lifetime
+        totals are adjusted by the change of every written row. The changes are not committed,
+        that is left to the caller.
+
+        If `fingerprints` are given, members whose expHistory fingerprint did not change since
+        the last ingestion are skipped entirely. New fingerprints are written in the same
+        transaction and returned in `IngestResult.fingerprints`, the caller should only merge
+        them into its own mapping once the transaction has been committed.
+
+        Only the days present in a member's expHistory are written, a day missing from the
+        payload never overwrites the stored amount. Members with an empty expHistory are skipped.
+
+        Parameters:
+            members (Iterable[MemberRecord]): The parsed members of the guild endpoint payload.
+            guild_id (str, optional): The Hypixel guild of the members, stored with every row.
+            connection (sqlite3.Connection, optional): The connection to write with.
+                Defaults to the connection of this database.
+            fingerprints (Dict[str, int], optional): The last ingested fingerprint per (normalized) UUID.
+
+        Returns:
+            IngestResult: The amount of inserted, updated, unchanged rows and skipped members.
+        """
+        if connection is None:
+            connection = self.connection
+        diff_start = time.perf_counter()
+        # A member listed twice is only written once (the last entry wins)
+        ingested: Dict[bytes, MemberRecord] = {}
+        member_count = 0
+        skipped = 0
+        new_fingerprints = {}
+        roster = []
+        for member in members:
+            member_count += 1
+            roster.append(member.uuid)
+            if not member.present:
+                # Nothing to write, an empty expHistory says nothing about the stored days
+                skipped += 1
+                continue
+            if fingerprints is not None:
+                _uuid = member.uuid_string
+                fingerprint = fingerprint_exp_history(member)
+                if fingerprints.get(_uuid) == fingerprint:
+                    skipped += 1
+                    continue
+                new_fingerprints[_uuid] = fingerprint
+            ingested[member.uuid] = member
+
+        # Ids are looked up for every call: ids cached across transactions could belong to
+        # players whose insert was rolled back
+        player_ids: Dict[bytes, int] = {}
+        migrate_v2.resolve_ids(connection, "players", "uuid", ingested.keys(), player_ids)
+        guild = None
+        if guild_id is not None:
+            guild_ids: Dict[str, int] = {}
+            migrate_v2.resolve_ids(connection, "guilds", "guildId", [guild_id], guild_ids)
+            guild = guild_ids[guild_id]
+
+        inserts, updates = [], []
+        # The change of the amount per (playerId, day), added to the rollup totals
+        deltas: Dict[Tuple[int, int], int] = {}
+        unchanged = 0
+        ingested_members = list(ingested.values())
+        for offset in range(0, len(ingested_members), INGEST_BATCH_SIZE):
+            batch = ingested_members[offset:offset + INGEST_BATCH_SIZE]
+            ids = [player_ids[member.uuid] for member in batch]
+            last_day = schema.day_number(max(member.last_day for member in batch))
+            first_day = schema.day_number(min(member.last_day for member in batch)) - len(batch[0].amounts) + 1
+            command = f"""
+            SELECT playerId, day, amount, guild FROM expDaily
+            WHERE playerId IN ({", ".join("?" * len(ids))}) AND day BETWEEN ? AND ?
+            """
+            stored = {(row[0], row[1]): (row[2], row[3])
+                      for row in connection.execute(command, (*ids, first_day, last_day))}
+            for player_id, member in zip(ids, batch):
+                member_last_day = schema.day_number(member.last_day)
+                for index, amount in enumerate(member.amounts):
+                    if not member.present >> index & 1:
+                        # Missing from the payload, the stored day (if any) stays as it is
+                        continue
+                    day = member_last_day - index
+                    row = stored.get((player_id, day))
+                    if row is None:
+                        inserts.append((player_id, day, amount, guild))
+                        deltas[player_id, day] = amount
+                    elif row[0] != amount or (guild is not None and row[1] != guild):
+                        updates.append((amount, guild, player_id, day))
+                        deltas[player_id, day] = amount - row[0]
+                    else:
+                        unchanged += 1
+
+        write_start = time.perf_counter()
+        connection.executemany("INSERT INTO expDaily (playerId, day, amount, guild) VALUES (?, ?, ?, ?)", inserts)
+        connection.executemany(
+            "UPDATE expDaily SET amount = ?, guild = COALESCE(?, guild) WHERE playerId = ? AND day = ?", updates)
+        rollups.apply_deltas(connection, deltas)
+        self.save_fingerprints(new_fingerprints, connection=connection)
+        write_end = time.perf_counter()
+        return IngestResult(
+            members=member_count,
+            inserted=len(inserts),
+            updated=len(updates),
+            unchanged=unchanged,
+            skipped=skipped,
+            # New days without GEXP (a new day starts for every member at midnight) aren't activity
+            changed=sum(1 for delta in deltas.values() if delta),
+            fingerprints=new_fingerprints,
+            roster=[schema.uuid_string(uuid_bytes) for uuid_bytes in dict.fromkeys(roster)],
+            timings={"diff": write_start - diff_start, "write": write_end - write_start}
+        )
+
+    def load_fingerprints(self, connection: sqlite3.Connection = None) -> Dict[str, int]:
+        """
+        Load the fingerprint of the last ingested expHistory of every member.
+
+        Parameters:
+            connection (sqlite3.Connection, optional): The connection to read with.
+                Defaults to the connection of this database.
+
+        Returns:
+            Dict[str, int]: The fingerprint per (normalized) UUID.
+        """
+        if connection is None:
+            connection = self.connection
+        return dict(connection.execute("SELECT uuid, fingerprint FROM memberFingerprint").fetchall())
+
+    def save_fingerprints(self, fingerprints: Dict[str, int], connection: sqlite3.Connection = None) -> None:
+        """
+        Store expHistory fingerprints (without committing).
+
+        Parameters:
+            fingerprints (Dict[str, int]): The fingerprint per (normalized) UUID.
+            connection (sqlite3.Connection, optional): The connection to write with.
+                Defaults to the connection of this database.
+
+        Returns:
+            None
+        """
+        if connection is None:
+            connection = self.connection
+        time_now = int(time.time())
+        command = """
+        INSERT INTO memberFingerprint (uuid, fingerprint, updated) VALUES (?, ?, ?)
+        ON CONFLICT (uuid) DO UPDATE SET fingerprint = excluded.fingerprint, updated = excluded.updated
+        """
+        connection.executemany(command, [(_uuid, fp, time_now) for _uuid, fp in fingerprints.items()])
+
+
+def fingerprint_exp_history(member: MemberRecord) -> int:
+    """
+    Compute a compact fingerprint of a member's expHistory.
+
+    The fingerprint is a 64-bit hash of the (date, amount) pairs ordered by date (the
+    record's most recent day plus its fixed seven-slot amount array and which of its
+    slots were in the payload), so it does not depend on the order in which the API
+    returned them.
+
+    Parameters:
+        member (MemberRecord): The parsed guild member.
+
+    Returns:
+        int: A signed 64-bit integer (fits in an SQLite INTEGER column).
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(member.last_day.toordinal().to_bytes(4, "big"))
+    digest.update(member.amounts.tobytes())
+    digest.update(member.present.to_bytes(1, "big"))
+    return int.from_bytes(digest.digest(), "big", signed=True)
+
+
+class IngestResult:
+    """
+    Represents the outcome of a batched expHistory ingestion.
+
+    Attributes:
+        members (int): The number of guild members that were ingested.
+        inserted (int): The number of new (uuid, date) rows.
+        updated (int): The number of rows whose amount changed.
+        unchanged (int): The number of rows that were already up-to-date.
+        changed (int): The number of written rows whose amount changed (new rows with GEXP included,
+            new zero-amount days and guild-only updates excluded).
+        skipped (int): The number of members skipped because their expHistory is empty or its
+            fingerprint didn't change.
+        fingerprints (Dict[str, int]): The new fingerprints written by the ingestion.
+        roster (List[str]): The dashed UUID of every ingested member (skipped members included).
+        payload_bytes (int): The size of the ingested payload.
+        timings (Dict[str, float]): The seconds spent per phase (see SYNC_PHASES).
+    """
+
+    def __init__(self, members: int = 0, inserted: int = 0, updated: int = 0, unchanged: int = 0,
+                 skipped: int = 0, fingerprints: Dict[str, int] = None, payload_bytes: int = 0,
+                 timings: Dict[str, float] = None, roster: List[str] = None, changed: int = 0):
+        self.members = members
+        self.inserted = inserted
+        self.updated = updated
+        self.unchanged = unchanged
+        self.skipped = skipped
+        self.changed = changed
+        self.fingerprints = fingerprints if fingerprints is not None else {}
+        self.roster = roster if roster is not None else []
+        self.payload_bytes = payload_bytes
+        self.timings = timings if timings is not None else {}
+
+    def add_timing(self, phase: str, seconds: float) -> None:
+        """
+        Add time spent in a phase.
+
+        Parameters:
+            phase (str): The phase, one of SYNC_PHASES.
+            seconds (float): The time spent.
+
+        Returns:
+            None
+        """
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    def add(self, other: 'IngestResult') -> None:
+        """
+        Add the counts of another (partial) ingestion to this result.
+
+        Parameters:
+            other (IngestResult): The result to add.
+
+        Returns:
+            None
+        """
+        self.members += other.members
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.skipped += other.skipped
+        self.changed += other.changed
+        self.fingerprints.update(other.fingerprints)
+        self.roster.extend(other.roster)
+        self.payload_bytes += other.payload_bytes
+        for phase, seconds in other.timings.items():
+            self.add_timing(phase, seconds)
+
+    def __repr__(self):
+        return f"IngestResult(members={self.members}, inserted={self.inserted}, " \
+               f"updated={self.updated}, unchanged={self.unchanged}, skipped={self.skipped})"
+
 
 class TomlConfig:
     """
@@ -305,6 +669,27 @@ class TomlConfig:
         self._save_config()
 
 
+# Queries of the UUID cache (see CacheDatabase), UUIDs are stored dashed and lowercase
+GET_CACHE_ENTRY_BY_UUID: str = "SELECT uuid, name, born FROM cache WHERE uuid = ?"
+# Names aren't unique over time (renames), the most recently stored owner wins
+GET_CACHE_ENTRY_BY_NAME: str = "SELECT uuid, name, born FROM cache WHERE name = ? COLLATE NOCASE " \
+                               "ORDER BY born DESC LIMIT 1"
+DELETE_CACHE_ENTRY: str = "DELETE FROM cache WHERE uuid IS ? OR name = ? COLLATE NOCASE"
+# A (re)written entry counts as accessed
+UPSERT_CACHE_ENTRY: str = "INSERT INTO cache (uuid, name, born, lastAccess) VALUES (?1, ?2, ?3, ?3) " \
+                          "ON CONFLICT (uuid) DO UPDATE SET name = excluded.name, born = excluded.born, " \
+                          "lastAccess = excluded.lastAccess"
+TOUCH_CACHE_ENTRY: str = "UPDATE cache SET lastAccess = ?1 WHERE uuid = ?2 AND lastAccess < ?1"
+EVICT_IDLE_CACHE_ENTRIES: str = "DELETE FROM cache WHERE lastAccess < ?"
+EVICT_LEAST_RECENT_CACHE_ENTRIES: str = "DELETE FROM cache WHERE uuid IN " \
+                                        "(SELECT uuid FROM cache ORDER BY lastAccess LIMIT ?)"
+EVICT_UNKNOWN_NAMES: str = "DELETE FROM unknownNames WHERE born < ?"
+GET_UNKNOWN_NAME: str = "SELECT name, born FROM unknownNames WHERE name = ?"
+UPSERT_UNKNOWN_NAME: str = "INSERT INTO unknownNames (name, born) VALUES (?, ?) " \
+                           "ON CONFLICT (name) DO UPDATE SET born = excluded.born"
+DELETE_UNKNOWN_NAME: str = "DELETE FROM unknownNames WHERE name = ?"
+
+
 class _CacheEntry:
     """
     Represents a cache entry.
@@ -319,6 +704,7 @@ class _CacheEntry:
         uuid (str | None): The UUID associated with the cache entry.
         name (str | None): The name associated with the cache entry.
         born (int | None): The birth timestamp of the cache entry.
+        is_missing (bool): Indicates whether the entry records a name that doesn't exist (uuid is None).
 
     Methods:
         __init__: Initializes the _CacheEntry object.
@@ -328,7 +714,8 @@ class _CacheEntry:
     def __init__(
             self,
             raw_result: Union[Tuple[str, str, int], tuple] = (),
-            lifetime_seconds: int = CACHE_LIFETIME_SECONDS):
+            lifetime_seconds: int = CACHE_LIFETIME_SECONDS,
+            is_missing: bool = False):
         """
         Initialize the _CacheEntry object.
 
@@ -340,6 +727,7 @@ class _CacheEntry:
             raw_result (Union[Tuple[str, str, int], tuple], optional): The raw result of the cache entry. Defaults to ().
             lifetime_seconds (int, optional): The lifetime duration of the cache entry in seconds.
             Defaults to CACHE_LIFETIME_SECONDS.
+            is_missing (bool, optional): Whether the raw result records a name that doesn't exist.
 
         Returns:
             None
@@ -347,6 +735,7 @@ class _CacheEntry:
         """
         self._raw_result = raw_result
         self.is_alive: bool = False
+        self.is_missing: bool = is_missing
         self.uuid: str | None = None
         self.name: str | None = None
         self.born: int | None = None
@@ -380,10 +769,11 @@ class CacheDatabase:
     Methods:
         __init__: Initializes the CacheDatabase object.
         _create_cache_table: Creates the cache table if it doesn't exist.
+        close: Checkpoints, optimizes and closes the database.
 
     """
 
-    def __init__(self, cache_path: str):
+    def __init__(self, cache_path: str, config: 'TomlConfig' = None):
         """
         Initialize the CacheDatabase object.
 
@@ -393,6 +783,7 @@ class CacheDatabase:
 
         Parameters:
             cache_path (str): The path to the cache database file.
+            config (TomlConfig, optional): The bot configuration (connection settings).
 
         Returns:
             None
@@ -400,21 +791,36 @@ class CacheDatabase:
         """
         logging.info("Loading Cache Database")
         self.path = cache_path
+        self.config = config
         if not os.path.exists(self.path):
             logging.warning("UUID Cache not found")
-            self._create_cache_table()
+        self._create_cache_table()
 
-        self.connection = sqlite3.connect(self.path)
+        self.connection = connect_database(self.path, self.config)
         self.cursor = self.connection.cursor()
         logging.debug("Complete!")
 
+    def close(self) -> None:
+        """
+        Checkpoint, optimize and close the database connection.
+
+        Returns:
+            None
+        """
+        close_database(self.connection)
+
     def _create_cache_table(self) -> None:
         """
-        Create the cache table.
+        Create the cache tables, or bring an existing cache up to date.
 
-        This method creates the cache table in the cache database if it doesn't exist.
-        It also creates triggers for formatting the UUID and setting the 'born'
-        timestamp.
+        Entries are written with their dashed UUID and birth timestamp, the triggers
+        that used to set both after an insert are dropped (they made an existing UUID
+        fail to insert instead of being refreshed). Names are looked up case-insensitively
+        through an index, names that don't exist are remembered in `unknownNames`.
+
+        Entries are evicted least recently accessed first (`lastAccess`, see
+        UuidCacheRepository.evict), and the file is switched to incremental auto vacuum
+        once, so the pages freed by evictions can be returned in small steps.
 
         Parameters:
             self
@@ -424,50 +830,43 @@ class CacheDatabase:
 
         """
         logging.debug("Creating UUID Cache")
-        create_table_command = """
-        CREATE TABLE IF NOT EXISTS cache (
-            uuid TEXT PRIMARY KEY NOT NULL,
-            name TEXT NOT NULL,
-            born INTEGER
-        );
-        """
-        connection = sqlite3.connect(self.path)
-        cursor = connection.cursor()
-        cursor.execute(create_table_command)
-
-        create_trigger_command_uuid = """
-		CREATE TRIGGER IF NOT EXISTS format_uuid_trigger
-		AFTER INSERT ON cache
-		BEGIN
-			UPDATE cache SET uuid =
-				substr(uuid, 1, 8) || '-' ||
-				substr(uuid, 9, 4) || '-' ||
-				substr(uuid, 13, 4) || '-' ||
-				substr(uuid, 17, 4) || '-' ||
-				substr(uuid, 21)
-			WHERE rowid = new.rowid;
-		END;
-		"""
-        cursor.execute(create_trigger_command_uuid)
-
-        create_trigger_command_born = """
-		CREATE TRIGGER set_born_trigger AFTER INSERT ON cache
-		BEGIN
-			UPDATE cache SET born = strftime('%s', 'now')
-			WHERE rowid = new.rowid;
-		END;
-		"""
-        cursor.execute(create_trigger_command_born)
-
-        connection.commit()
+        connection = connect_database(self.path, self.config)
+        with connection:
+            connection.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                uuid TEXT PRIMARY KEY NOT NULL,
+                name TEXT NOT NULL,
+                born INTEGER,
+                lastAccess INTEGER
+            );
+            """)
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(cache)")]
+            if "lastAccess" not in columns:
+                connection.execute("ALTER TABLE cache ADD COLUMN lastAccess INTEGER")
+                connection.execute("UPDATE cache SET lastAccess = born")
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (lastAccess)")
+            connection.execute("DROP TRIGGER IF EXISTS format_uuid_trigger")
+            connection.execute("DROP TRIGGER IF EXISTS set_born_trigger")
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_name_nocase ON cache (name COLLATE NOCASE)")
+            connection.execute("""
+            CREATE TABLE IF NOT EXISTS unknownNames (
+                name TEXT PRIMARY KEY NOT NULL COLLATE NOCASE,
+                born INTEGER NOT NULL
+            );
+            """)
+        # 2 = INCREMENTAL, changing the mode of an existing file takes a full VACUUM (only once)
+        if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            logging.info("Switching the UUID Cache to incremental vacuum")
+            connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            connection.execute("VACUUM")
         connection.close()
 
     def add_entry(self, uuid: str, name: str) -> None:
         """
-        Add an entry to the cache.
+        Add an entry to the cache, or refresh the existing entry of the UUID.
 
-        This method adds a new entry to the cache table with the specified UUID and
-        name.
+        This method stores the specified UUID and name with the current time as its
+        birth timestamp, and forgets that the name didn't exist.
 
         Parameters:
             uuid (str): The UUID of the entry.
@@ -477,9 +876,9 @@ class CacheDatabase:
             None
 
         """
-        command = "INSERT INTO cache (uuid, name) VALUES (?, ?)"
-        self.cursor.execute(command, (uuid, name))
-        self.connection.commit()
+        with self.connection:
+            self.cursor.execute(UPSERT_CACHE_ENTRY, (normalize_uuid(uuid), name, int(time.time())))
+            self.cursor.execute(DELETE_UNKNOWN_NAME, (name,))
 
     def delete_entry(self, key: str) -> None:
         """
@@ -495,8 +894,8 @@ class CacheDatabase:
             None
 
         """
-        command = "DELETE FROM cache WHERE uuid IS ? OR name IS ?"
-        self.cursor.execute(command, (key, key))
+        uuid = normalize_uuid(key) if is_uuid(key) else None
+        self.cursor.execute(DELETE_CACHE_ENTRY, (uuid, key))
         self.connection.commit()
 
     def get_entry(self, key: str, lifetime_seconds: int = CACHE_LIFETIME_SECONDS) -> _CacheEntry:
@@ -504,8 +903,8 @@ class CacheDatabase:
         Retrieve an entry from the cache.
 
         This method retrieves the entry from the cache table based on the provided key,
-        which can be either the UUID or the name of the entry. It returns a _CacheEntry
-        object representing the retrieved entry.
+        which can be either the UUID (dashed or not) or the name (in any case) of the
+        entry. It returns a _CacheEntry object representing the retrieved entry.
 
         Parameters:
             key (str): The key (UUID or name) of the entry to retrieve.
@@ -516,16 +915,18 @@ class CacheDatabase:
             _CacheEntry: The retrieved cache entry.
 
         """
-        command = "SELECT uuid, name, born FROM cache WHERE uuid is ? OR name = ?"
-        query = self.cursor.execute(command, (key, key))
-        result = query.fetchone()
+        if is_uuid(key):
+            result = self.cursor.execute(GET_CACHE_ENTRY_BY_UUID, (normalize_uuid(key),)).fetchone()
+        else:
+            result = self.cursor.execute(GET_CACHE_ENTRY_BY_NAME, (key,)).fetchone()
         return _CacheEntry(result, lifetime_seconds=lifetime_seconds)
 
     def clear_cache(self) -> None:
         """
         Clear the cache.
 
-        This method clears all entries from the cache table.
+        This method clears all entries from the cache table and the names known
+        not to exist.
 
         Parameters:
             self
@@ -534,8 +935,9 @@ class CacheDatabase:
             None
 
         """
-        command = "DELETE FROM cache;"
-        self.cursor.execute(command)
+        with self.connection:
+            self.cursor.execute("DELETE FROM cache")
+            self.cursor.execute("DELETE FROM unknownNames")
 
 
 class _DiscordLink:
@@ -734,6 +1136,7 @@ class XpDivisionData:
         if not os.path.exists(DIVISION_DATA):
             logging.warning("No XP Division found!")
             self.xp_data = None
+            return
         with open(DIVISION_DATA, 'r', encoding='utf-8') as division_data:
             self.xp_data = json.load(division_data)
 
@@ -760,13 +1163,23 @@ class LocalData:
         local_data = LocalData()
         extensions = local_data.get_all_extensions()
         """
-        self.gexp_db: GexpDatabase = GexpDatabase()
-        self.bot_extensions = []
         self.config: TomlConfig = TomlConfig(CONFIG_PATH)
-        self.uuid_cache: CacheDatabase = CacheDatabase(CACHE_PATH)
+        self.gexp_db: GexpDatabase = GexpDatabase(self.config)
+        self.bot_extensions = []
+        self.uuid_cache: CacheDatabase = CacheDatabase(CACHE_PATH, self.config)
         self.discord_link: DiscordLink = DiscordLink(self.gexp_db.cursor)
         self.xp_division_data: XpDivisionData = XpDivisionData()
 
+    def close(self) -> None:
+        """
+        Cleanly closes the databases (checkpoint, optimize and close).
+
+        Returns:
+            None
+        """
+        self.gexp_db.close()
+        self.uuid_cache.close()
+
     def get_all_extensions(self) -> List[str]:
         """
         Retrieves all available bot extension names from the 'extensions' directory.
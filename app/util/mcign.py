@@ -1,8 +1,14 @@
 import re
 import requests
 
+from util.local import LOCAL_DATA
+
+MOJANG_API_URL: str = "https://api.mojang.com"
+MOJANG_SESSION_URL: str = "https://sessionserver.mojang.com"
+
 
 class MCIGN:
+    # Blocking (requests), async code resolves players with util.player_resolver.PlayerResolver
     def __init__(self, player_id=None):
         """
         Initialize the MCIGN object with a player ID.
@@ -55,10 +61,13 @@ class MCIGN:
 
     def _load(self):
         """Load player data from the Mojang API based on the player ID."""
+        # The base URLs can be pointed somewhere else (e.g. the local API stand-in) in the `api` config section
         if len(self._id) < 17:
-            url = f"https://api.mojang.com/users/profiles/minecraft/{self._id}"
+            base_url = LOCAL_DATA.config.get("api", "mojang_api_url") or MOJANG_API_URL
+            url = f"{base_url}/users/profiles/minecraft/{self._id}"
         else:
-            url = f"https://sessionserver.mojang.com/session/minecraft/profile/{self._id}"
+            base_url = LOCAL_DATA.config.get("api", "mojang_session_url") or MOJANG_SESSION_URL
+            url = f"{base_url}/session/minecraft/profile/{self._id}"
         r = requests.get(url)
         data = r.json()
         self._name = data.get("name", None)
@@ -0,0 +1,170 @@
+"""
+Migrates a GEXP database from the legacy `expHistory` table to schema v2 (see util.schema).
+
+The legacy rows are copied in batches ordered by their id. Every batch is written in
+its own transaction together with the id of its last row (`migration_v2_last_id` in
+syncState), so an interrupted migration continues where it stopped when it is run
+again. Rows are upserted, for a (player, day) that was stored more than once the row
+written last wins. Once every row has been copied, `expHistory` is dropped and the
+database is vacuumed to give the freed pages back to the file system.
+
+The bot runs the migration on startup when it finds a legacy table. To migrate a
+(large) database ahead of time, run from the `app` folder:
+    python -m util.migrate_v2 [--database ../data/db/proudcircle.db] [--batch-size 50000] [--no-vacuum]
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import argparse
+
+from typing import Dict, List
+
+from util.schema import create_schema, day_number, uuid_bytes
+
+# The schema version written by this migration, later versions are applied by GexpDatabase
+MIGRATED_VERSION: int = 2
+DEFAULT_BATCH_SIZE: int = 50000
+PROGRESS_KEY: str = "migration_v2_last_id"
+# Stay well below SQLite's limit of host parameters per statement
+_LOOKUP_BATCH: int = 500
+
+
+def has_legacy_table(connection: sqlite3.Connection) -> bool:
+    """
+    Check whether the database still has the legacy expHistory table.
+
+    Parameters:
+        connection (sqlite3.Connection): The connection to the GEXP database.
+
+    Returns:
+        bool: Whether there is something to migrate.
+    """
+    row = connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expHistory'").fetchone()
+    return row is not None
+
+
+def resolve_ids(connection: sqlite3.Connection, table: str, column: str, keys, known: Dict) -> None:
+    """
+    Look up (and create where needed) the integer id of every key of a dimension table.
+
+    Parameters:
+        connection (sqlite3.Connection): The connection to write with (not committed).
+        table (str): The dimension table, `players` or `guilds`.
+        column (str): The key column of the table.
+        keys: The keys to resolve.
+        known (Dict): The id per key, resolved keys are added to it.
+
+    Returns:
+        None
+    """
+    missing = [key for key in set(keys) if key not in known]
+    if not missing:
+        return
+    connection.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", [(key,) for key in missing])
+    for offset in range(0, len(missing), _LOOKUP_BATCH):
+        batch = missing[offset:offset + _LOOKUP_BATCH]
+        placeholders = ", ".join("?" * len(batch))
+        command = f"SELECT {column}, id FROM {table} WHERE {column} IN ({placeholders})"
+        known.update(connection.execute(command, batch).fetchall())
+
+
+def migrate(connection: sqlite3.Connection, batch_size: int = DEFAULT_BATCH_SIZE, vacuum: bool = True) -> int:
+    """
+    Migrate the legacy expHistory table to schema v2 (resumable).
+
+    Parameters:
+        connection (sqlite3.Connection): The connection to the GEXP database.
+        batch_size (int, optional): The amount of legacy rows copied per transaction.
+        vacuum (bool, optional): Whether to vacuum the database once the migration finished.
+
+    Returns:
+        int: The amount of legacy rows copied by this call.
+    """
+    create_schema(connection)
+    connection.commit()
+    if not has_legacy_table(connection):
+        return 0
+
+    row = connection.execute("SELECT value FROM syncState WHERE key = ?", (PROGRESS_KEY,)).fetchone()
+    last_id = 0 if row is None else int(row[0])
+    total = connection.execute("SELECT COUNT(*) FROM expHistory WHERE id > ?", (last_id,)).fetchone()[0]
+    logging.info(f"Migrating {total} expHistory rows to schema v2 (resuming after id {last_id})")
+
+    # Databases written before multiple guilds were synced have no guildId column
+    columns = [column[1] for column in connection.execute("PRAGMA table_info(expHistory)").fetchall()]
+    guild_column = "guildId" if "guildId" in columns else "NULL"
+
+    players: Dict[bytes, int] = {}
+    guilds: Dict[str, int] = {}
+    copied = 0
+    invalid = 0
+    started = time.perf_counter()
+    while True:
+        rows = connection.execute(
+            f"SELECT id, date, uuid, amount, {guild_column} FROM expHistory WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        converted: List[tuple] = []
+        for _, date, _uuid, amount, guild_id in rows:
+            try:
+                converted.append((uuid_bytes(_uuid), day_number(date), int(amount), guild_id))
+            except (ValueError, TypeError):
+                invalid += 1
+        try:
+            resolve_ids(connection, "players", "uuid", [row[0] for row in converted], players)
+            resolve_ids(connection, "guilds", "guildId", [row[3] for row in converted if row[3] is not None], guilds)
+            connection.executemany("""
+            INSERT INTO expDaily (playerId, day, amount, guild) VALUES (?, ?, ?, ?)
+            ON CONFLICT (playerId, day) DO UPDATE SET
+                amount = excluded.amount, guild = COALESCE(excluded.guild, expDaily.guild)
+            """, [(players[_uuid], day, amount, guilds.get(guild_id)) for _uuid, day, amount, guild_id in converted])
+            last_id = rows[-1][0]
+            connection.execute(
+                "INSERT INTO syncState (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (PROGRESS_KEY, str(last_id)))
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        copied += len(rows)
+        logging.info(f"Migrated {copied}/{total} expHistory rows")
+
+    if invalid:
+        logging.warning(f"Skipped {invalid} expHistory rows with an invalid UUID or date")
+    connection.execute("DROP TABLE expHistory")
+    connection.execute("DELETE FROM syncState WHERE key = ?", (PROGRESS_KEY,))
+    connection.execute(f"PRAGMA user_version = {MIGRATED_VERSION}")
+    connection.commit()
+    if vacuum:
+        logging.info("Vacuuming the GEXP database")
+        connection.execute("VACUUM")
+    logging.info(f"Schema v2 migration finished in {time.perf_counter() - started:.1f}s")
+    return copied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate a GEXP database to schema v2")
+    parser.add_argument("--database", default=os.path.join("..", "data", "db", "proudcircle.db"))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--no-vacuum", action="store_true")
+    arguments = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if not os.path.exists(arguments.database):
+        parser.error(f"No database at {arguments.database}")
+    size_before = os.path.getsize(arguments.database)
+    connection = sqlite3.connect(arguments.database)
+    connection.execute("PRAGMA busy_timeout = 5000")
+    try:
+        migrate(connection, arguments.batch_size, vacuum=not arguments.no_vacuum)
+    finally:
+        connection.close()
+    size_after = os.path.getsize(arguments.database)
+    logging.info(f"Database size: {size_before / 1024 / 1024:.1f} MiB -> {size_after / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
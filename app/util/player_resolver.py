@@ -0,0 +1,366 @@
+"""
+Async resolution of player names and UUIDs through the Mojang API.
+
+Lookups are answered from the UUID cache when possible. Otherwise they are sent on the
+pooled aiohttp session of the HypixelClient (no blocking `requests` call on the event
+loop), identical lookups that are in flight at the same time share a single request,
+and every answer is written through to the UUID cache (names that don't exist too).
+
+Name lookups are gathered for a short window (`[player_resolver] batch_window_ms`) and
+sent to Mojang's bulk profiles endpoint in groups of up to 10 names, so resolving a
+roster or a leaderboard costs a tenth of the requests. UUIDs are looked up one by one
+(there is no bulk endpoint for them). A name that can't exist is never sent, Mojang
+rejects the whole bulk request if one of its names is malformed.
+
+Expired cache entries are served right away while a background request refreshes them
+(stale-while-revalidate, up to `[player_resolver] max_stale_seconds`). After every GEXP
+sync the roster is prewarmed: members without a live cache entry are refreshed by a
+background job limited to `[player_resolver] prewarm_per_minute` requests, so commands
+about guild members almost never wait on Mojang.
+
+The base URLs can be pointed somewhere else (e.g. the local API stand-in) with
+`[api] mojang_api_url` and `[api] mojang_session_url`.
+"""
+
+import re
+import time
+import asyncio
+import aiohttp
+import logging
+
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from util.local import TomlConfig
+from util.hypixel import HypixelClient
+from util.uuider import is_uuid, normalize_uuid
+from util.repository import UuidCacheRepository
+from util.single_flight import SingleFlight
+
+MOJANG_API_URL: str = "https://api.mojang.com"
+MOJANG_SESSION_URL: str = "https://sessionserver.mojang.com"
+DEFAULT_TIMEOUT_SECONDS: float = 10.0
+DEFAULT_BATCH_WINDOW_MS: float = 25
+# Players can change their name every 30 days, a week old name is still worth showing
+DEFAULT_MAX_STALE_SECONDS: int = 7 * 24 * 60 * 60
+DEFAULT_PREWARM_PER_MINUTE: float = 60
+# The most names Mojang's bulk endpoint accepts per request
+MOJANG_BULK_LIMIT: int = 10
+# Answers of the Mojang session server for a UUID without a profile
+_NOT_FOUND_STATUSES = (204, 400, 404)
+# Minecraft names are 1 to 16 letters, digits and underscores
+_VALID_NAME = re.compile(r"^\w{1,16}$", re.ASCII)
+# Network errors and malformed answers (bad JSON, missing keys) of the Mojang API
+_LOOKUP_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError)
+
+
+class ResolvedPlayer:
+    """
+    A player resolved from the cache or the Mojang API.
+
+    Attributes:
+        uuid (str): The dashed UUID of the player.
+        name (str): The name of the player.
+    """
+
+    __slots__ = ("uuid", "name")
+
+    def __init__(self, uuid: str, name: str):
+        self.uuid = normalize_uuid(uuid)
+        self.name = name
+
+    def __repr__(self):
+        return f"ResolvedPlayer(uuid={self.uuid!r}, name={self.name!r})"
+
+
+class PlayerResolver:
+    """
+    Resolves player names and UUIDs (Meant to be singleton, see ProudCircleDiscordBot).
+
+    Attributes:
+        client (HypixelClient): The client whose pooled session the requests are sent on.
+        uuid_cache (UuidCacheRepository): The UUID cache the results are read from and written to.
+        config (TomlConfig): The bot configuration.
+        requests (int): The number of requests sent to the Mojang API.
+        stale_hits (int): The number of lookups answered with an expired entry while it was refreshed.
+
+    Methods:
+        resolve: Gets the UUID and name of a player name or UUID.
+        resolve_many: Gets the UUID and name of several players at once.
+        prewarm: Refreshes the cache entries of a roster in the background.
+        close: Stops the background requests.
+    """
+
+    def __init__(self, client: HypixelClient, uuid_cache: UuidCacheRepository, config: TomlConfig):
+        self.client = client
+        self.uuid_cache = uuid_cache
+        self.config = config
+        self.requests: int = 0
+        self.stale_hits: int = 0
+        # Lookups in flight by dashed UUID or lowercase name
+        self._lookups: SingleFlight = SingleFlight()
+        # (key, name, future) of the name lookups waiting for the next bulk request
+        self._pending: List[Tuple[str, str, asyncio.Future]] = []
+        self._flush_handle: Union[asyncio.TimerHandle, None] = None
+        # Requests belong to the resolver, not to a caller, so a cancelled command can't abort them
+        self._tasks: Set[asyncio.Task] = set()
+        # The UUIDs waiting to be prewarmed (a dict keeps the roster order)
+        self._prewarm_queue: Dict[str, None] = {}
+        self._prewarm_task: Union[asyncio.Task, None] = None
+
+    def _setting(self, key: str, default):
+        value = self.config.get("player_resolver", key)
+        return default if value is None else value
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def resolve(self, player: str) -> Union[ResolvedPlayer, None]:
+        """
+        Get the UUID and name of a player.
+
+        If the Mojang API can't be reached, an expired cache entry is used when there is one.
+
+        Parameters:
+            player (str): The name (in any case) or UUID (dashed or not) of the player.
+
+        Returns:
+            Union[ResolvedPlayer, None]: The player, or None if no player has the name or UUID.
+        """
+        entry = await self.uuid_cache.get_entry(player)
+        if entry.is_alive:
+            return None if entry.is_missing else ResolvedPlayer(entry.uuid, entry.name)
+        if not is_uuid(player) and not _VALID_NAME.fullmatch(player):
+            await self.uuid_cache.add_missing(player)
+            return None
+
+        future = self._request(player)
+        if entry.uuid is not None and time.time() - entry.born <= int(self._setting("max_stale_seconds",
+                                                                                    DEFAULT_MAX_STALE_SECONDS)):
+            # Refreshed in the background
+            self.stale_hits += 1
+            return ResolvedPlayer(entry.uuid, entry.name)
+        try:
+            return await asyncio.shield(future)
+        except _LOOKUP_ERRORS as e:
+            logging.warning(f"Could not resolve player {player!r} through Mojang: {e}")
+            if entry.uuid is not None:
+                return ResolvedPlayer(entry.uuid, entry.name)
+            return None
+
+    async def resolve_many(self, players: Iterable[str]) -> Dict[str, Union[ResolvedPlayer, None]]:
+        """
+        Get the UUID and name of several players (names are sent to Mojang in bulk).
+
+        Parameters:
+            players (Iterable[str]): The names or UUIDs of the players.
+
+        Returns:
+            Dict[str, Union[ResolvedPlayer, None]]: The player (or None if there is none) per given name or UUID.
+        """
+        players = list(dict.fromkeys(players))
+        return dict(zip(players, await asyncio.gather(*[self.resolve(player) for player in players])))
+
+    def prewarm(self, uuids: Iterable[str]) -> None:
+        """
+        Refresh the cache entries of a roster that aren't alive, in the background.
+
+        Parameters:
+            uuids (Iterable[str]): The UUIDs of the players.
+
+        Returns:
+            None
+        """
+        for uuid in uuids:
+            self._prewarm_queue[normalize_uuid(uuid)] = None
+        if self._prewarm_task is None or self._prewarm_task.done():
+            self._prewarm_task = asyncio.ensure_future(self._prewarm())
+
+    async def _prewarm(self) -> None:
+        """
+        Work through the prewarm queue, at most `prewarm_per_minute` Mojang requests per minute.
+
+        Returns:
+            None
+        """
+        loop = asyncio.get_running_loop()
+        refreshed = 0
+        while self._prewarm_queue:
+            uuid = next(iter(self._prewarm_queue))
+            del self._prewarm_queue[uuid]
+            entry = await self.uuid_cache.get_entry(uuid)
+            if entry.is_alive:
+                continue
+            interval = 60 / max(float(self._setting("prewarm_per_minute", DEFAULT_PREWARM_PER_MINUTE)), 1e-3)
+            started = loop.time()
+            try:
+                await asyncio.shield(self._request(uuid))
+                refreshed += 1
+            except _LOOKUP_ERRORS as e:
+                logging.debug(f"Could not prewarm player {uuid}: {e}")
+            await asyncio.sleep(max(interval - (loop.time() - started), 0))
+        logging.debug(f"Prewarmed {refreshed} player(s)")
+
+    def _request(self, player: str) -> asyncio.Future:
+        """
+        Start the Mojang lookup of a name or UUID, or join the identical lookup in flight.
+
+        Parameters:
+            player (str): The name or UUID of the player.
+
+        Returns:
+            asyncio.Future: The future resolved with the player (or None if there is none).
+        """
+        key = normalize_uuid(player) if is_uuid(player) else player.lower()
+        future = self._lookups.get(key)
+        if future is not None:
+            return future
+        if not is_uuid(player):
+            # Sent with the next bulk request
+            return self._enqueue(key, player)
+        future = self._lookups.begin(key)
+        self._spawn(self._send_uuid(key, player, future))
+        return future
+
+    async def _send_uuid(self, key: str, uuid: str, future: asyncio.Future) -> None:
+        """
+        Resolve a UUID lookup with one request.
+
+        Parameters:
+            key (str): The key of the lookup (the dashed UUID).
+            uuid (str): The UUID.
+            future (asyncio.Future): The future of the lookup.
+
+        Returns:
+            None
+        """
+        try:
+            self._lookups.resolve(key, future, await self._fetch(uuid))
+        except BaseException as e:
+            self._lookups.fail(key, future, e)
+            if not isinstance(e, Exception):
+                raise
+
+    def _enqueue(self, key: str, name: str) -> asyncio.Future:
+        """
+        Queue a name lookup for the next bulk request.
+
+        Returns:
+            asyncio.Future: The future the bulk request resolves with the player (or None).
+        """
+        loop = asyncio.get_running_loop()
+        future = self._lookups.begin(key)
+        self._pending.append((key, name, future))
+        if len(self._pending) >= MOJANG_BULK_LIMIT:
+            self._flush()
+        elif self._flush_handle is None:
+            window = float(self._setting("batch_window_ms", DEFAULT_BATCH_WINDOW_MS))
+            self._flush_handle = loop.call_later(window / 1000, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        """
+        Send the queued name lookups, in groups of up to MOJANG_BULK_LIMIT names.
+
+        Returns:
+            None
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch = self._pending[:MOJANG_BULK_LIMIT]
+            del self._pending[:MOJANG_BULK_LIMIT]
+            self._spawn(self._send_batch(batch))
+
+    async def _send_batch(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        """
+        Resolve a group of name lookups with one bulk request and write the answers through to the UUID cache.
+
+        Parameters:
+            batch (List[Tuple[str, str, asyncio.Future]]): The (key, name, future) of the lookups.
+
+        Returns:
+            None
+        """
+        try:
+            players = await self._fetch_names([name for _, name, _ in batch])
+            await self.uuid_cache.upsert_entries([(player.uuid, player.name) for player in players.values()])
+            for key, name, future in batch:
+                if key not in players:
+                    await self.uuid_cache.add_missing(name)
+                self._lookups.resolve(key, future, players.get(key))
+        except BaseException as e:
+            for key, _, future in batch:
+                self._lookups.fail(key, future, e)
+            if not isinstance(e, Exception):
+                raise
+
+    def _timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=float(self.config.get("hypixel", "timeout_seconds") or DEFAULT_TIMEOUT_SECONDS))
+
+    async def _fetch_names(self, names: List[str]) -> Dict[str, ResolvedPlayer]:
+        """
+        Request the profiles of up to MOJANG_BULK_LIMIT names from the bulk endpoint.
+
+        Parameters:
+            names (List[str]): The names.
+
+        Returns:
+            Dict[str, ResolvedPlayer]: The players that exist, by lowercase name.
+        """
+        base_url = self.config.get("api", "mojang_api_url") or MOJANG_API_URL
+        self.requests += 1
+        async with self.client.session.post(f"{base_url}/profiles/minecraft", json=names,
+                                            timeout=self._timeout()) as response:
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status,
+                                                  message="Unexpected Mojang API status")
+            profiles = await response.json(content_type=None)
+        return {profile["name"].lower(): ResolvedPlayer(profile["id"], profile["name"]) for profile in profiles}
+
+    async def _fetch(self, uuid: str) -> Union[ResolvedPlayer, None]:
+        """
+        Request the profile of a UUID from the Mojang session server and write it through to the UUID cache.
+
+        Parameters:
+            uuid (str): The UUID of the player.
+
+        Returns:
+            Union[ResolvedPlayer, None]: The player, or None if no player has the UUID.
+        """
+        base_url = self.config.get("api", "mojang_session_url") or MOJANG_SESSION_URL
+        url = f"{base_url}/session/minecraft/profile/{uuid.replace('-', '').lower()}"
+        self.requests += 1
+        async with self.client.session.get(url, timeout=self._timeout()) as response:
+            if response.status in _NOT_FOUND_STATUSES:
+                return None
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status,
+                                                  message="Unexpected Mojang API status")
+            profile = await response.json(content_type=None)
+        resolved = ResolvedPlayer(profile["id"], profile["name"])
+        await self.uuid_cache.upsert_entry(resolved.uuid, resolved.name)
+        return resolved
+
+    async def close(self) -> None:
+        """
+        Stop the prewarm job and the requests in flight.
+
+        Returns:
+            None
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._prewarm_queue.clear()
+        for key, _, future in self._pending:
+            self._lookups.fail(key, future, asyncio.CancelledError())
+        self._pending.clear()
+        tasks = [*self._tasks, *([self._prewarm_task] if self._prewarm_task is not None else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,148 @@
+import time
+import asyncio
+import logging
+
+from typing import Union
+
+# Wait a little past the advertised reset, our clock and Hypixel's are never perfectly in sync
+RESET_GRACE_SECONDS: float = 1.0
+# How long to wait for a response when the quota is still unknown
+UNKNOWN_QUOTA_WAIT_SECONDS: float = 5.0
+
+
+class RateLimitScheduler:
+    """
+    Token bucket for an API key, fed by the `ratelimit-*` response headers.
+
+    Every request has to `acquire` a token before it is sent. Tokens are taken from the
+    quota that the last response reported (`ratelimit-remaining`), minus the requests that
+    are still in flight. Once the bucket is empty, callers wait until the window resets
+    (`ratelimit-reset`) and the bucket is refilled to `ratelimit-limit`. Waiting callers
+    are served in FIFO order, so queued requests drain as fast as the quota allows.
+
+    Until the first response arrives the quota is unknown and only one request at a time
+    is let through to discover it.
+
+    Attributes:
+        limit (int | None): The amount of requests allowed per window.
+        tokens (int): The amount of requests that may still be sent in the current window.
+        reset_at (float | None): The monotonic time at which the current window resets.
+        in_flight (int): The amount of requests that were sent but haven't been answered.
+
+    Methods:
+        acquire: Wait for a token before sending a request.
+        update: Update the bucket from the headers of a response.
+        release: Mark a request that never got a response as finished.
+
+    A window always ends: a 429 without a reset header pauses for UNKNOWN_QUOTA_WAIT_SECONDS,
+    and requests that fail while no window is known give their tokens back.
+    """
+
+    def __init__(self):
+        self.limit: Union[int, None] = None
+        self.tokens: int = 1
+        self.reset_at: Union[float, None] = None
+        self.in_flight: int = 0
+        self._lock = asyncio.Lock()
+        self._updated = asyncio.Event()
+
+    def _refill(self) -> None:
+        if self.reset_at is None or time.monotonic() < self.reset_at:
+            return
+        # The window has reset: refill the bucket, the next response will tell us the new reset time
+        self.reset_at = None
+        if self.limit is None:
+            self.tokens = max(self.tokens, 1)
+        else:
+            self.tokens = max(self.limit - self.in_flight, 0)
+
+    async def acquire(self) -> None:
+        """
+        Wait until a request may be sent without exceeding the quota, and take its token.
+
+        Returns:
+            None
+        """
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens > 0:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                if self.reset_at is None:
+                    wait_time = UNKNOWN_QUOTA_WAIT_SECONDS
+                else:
+                    wait_time = max(self.reset_at - time.monotonic(), 0)
+                    logging.debug(f"Hypixel quota exhausted, waiting {wait_time:.1f}s for the window to reset")
+                # A response may refill the bucket (or tell us the reset time) before the timeout
+                self._updated.clear()
+                try:
+                    await asyncio.wait_for(self._updated.wait(), timeout=wait_time)
+                except asyncio.TimeoutError:
+                    pass
+
+    def update(self, headers, status: int) -> None:
+        """
+        Update the bucket with the `ratelimit-*` headers of a response.
+
+        Parameters:
+            headers: The response headers.
+            status (int): The HTTP status code of the response.
+
+        Returns:
+            None
+        """
+        self.in_flight = max(self.in_flight - 1, 0)
+        try:
+            limit = headers.get("ratelimit-limit")
+            remaining = headers.get("ratelimit-remaining")
+            reset = headers.get("ratelimit-reset", headers.get("retry-after"))
+            limit = None if limit is None else int(limit)
+            remaining = None if remaining is None else int(remaining)
+            reset = None if reset is None else float(reset)
+        except ValueError:
+            logging.warning(f"Invalid rate-limit headers: {headers}")
+            limit, remaining, reset = None, None, None
+
+        if limit is not None:
+            self.limit = limit
+        if reset is not None:
+            reset_at = time.monotonic() + reset + RESET_GRACE_SECONDS
+            new_window = self.reset_at is None or reset_at > self.reset_at + RESET_GRACE_SECONDS
+            self.reset_at = reset_at
+        else:
+            new_window = False
+
+        if status == 429:
+            if reset is None:
+                # Without a reset time nothing would ever refill the bucket, retry after a short pause
+                self.reset_at = time.monotonic() + UNKNOWN_QUOTA_WAIT_SECONDS
+            logging.warning(f"Hypixel API key was rate-limited, pausing requests for "
+                            f"{UNKNOWN_QUOTA_WAIT_SECONDS if reset is None else reset}s")
+            self.tokens = 0
+        elif remaining is not None:
+            # Requests that are still in flight have already been counted locally
+            available = max(remaining - self.in_flight, 0)
+            self.tokens = available if new_window else min(self.tokens, available)
+        elif self.limit is None:
+            # No quota information at all, keep letting single requests through
+            self.tokens = max(self.tokens, 1)
+        self._updated.set()
+
+    def release(self) -> None:
+        """
+        Mark a request that failed before a response was received as finished.
+
+        Returns:
+            None
+        """
+        self.in_flight = max(self.in_flight - 1, 0)
+        if self.reset_at is None:
+            # No window is known (e.g. every request since the last reset failed), nothing else
+            # would refill the bucket: give back what the quota allows
+            if self.limit is None:
+                self.tokens = max(self.tokens, 1)
+            else:
+                self.tokens = max(self.limit - self.in_flight, self.tokens)
+        self._updated.set()
@@ -0,0 +1,841 @@
+"""
+Async access layer for the bot's SQLite databases.
+
+Commands never touch a shared cursor. Every query runs on a small pool of worker
+threads, each holding its own tuned connection (see util.local.connect_database),
+so concurrent commands query in parallel (WAL lets readers run next to a writer)
+instead of interleaving on one cursor, and the event loop never runs sqlite3.
+
+The SQL of every query is a module-level constant. sqlite3 keeps a per-connection
+cache of prepared statements keyed by the SQL text, so repeated queries on a worker
+reuse their prepared statement instead of being parsed again.
+"""
+
+import time
+import asyncio
+import datetime
+import functools
+import logging
+import sqlite3
+import threading
+import collections
+import concurrent.futures
+
+from typing import Any, Callable, Dict, List, Tuple, TypeVar, Union
+
+from util import rollups
+from util.schema import uuid_bytes, uuid_string, day_number, day_date
+from util.uuider import is_uuid, normalize_uuid
+from util.local import TomlConfig, IngestResult, connect_database, close_database, _CacheEntry, _DiscordLink, \
+    DATABASE_PATH, CACHE_PATH, CACHE_LIFETIME_SECONDS, MISSING_NAME_LIFETIME_SECONDS, SYNC_PHASES, \
+    GET_CACHE_ENTRY_BY_UUID, GET_CACHE_ENTRY_BY_NAME, GET_UNKNOWN_NAME, UPSERT_CACHE_ENTRY, UPSERT_UNKNOWN_NAME, \
+    DELETE_UNKNOWN_NAME, DELETE_CACHE_ENTRY, TOUCH_CACHE_ENTRY, EVICT_IDLE_CACHE_ENTRIES, \
+    EVICT_LEAST_RECENT_CACHE_ENTRIES, EVICT_UNKNOWN_NAMES
+
+DEFAULT_POOL_SIZE: int = 4
+# Per-connection prepared statement cache (sqlite3's default is 128)
+STATEMENT_CACHE_SIZE: int = 256
+
+T = TypeVar("T")
+
+
+class ConnectionPool:
+    """
+    A pool of worker threads, each with its own connection to one database.
+
+    Attributes:
+        path (str): The path to the database file.
+        config (TomlConfig): The bot configuration (connection settings).
+        size (int): The amount of worker threads (and connections).
+
+    Methods:
+        run: Runs a function with a connection on a worker thread.
+        close: Stops the workers and cleanly closes their connections.
+    """
+
+    def __init__(self, path: str, config: TomlConfig, size: int = DEFAULT_POOL_SIZE, name: str = "db"):
+        self.path = path
+        self.config = config
+        self.size = size
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix=name)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Only used by this worker, `check_same_thread` is disabled so `close` can close it
+            connection = connect_database(self.path, self.config, check_same_thread=False,
+                                          cached_statements=STATEMENT_CACHE_SIZE)
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _call(self, function: Callable[..., T], args) -> T:
+        connection = self._connection()
+        try:
+            return function(connection, *args)
+        except Exception:
+            if connection.in_transaction:
+                connection.rollback()
+            raise
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        """
+        Run a function on a worker thread.
+
+        Parameters:
+            function (Callable[..., T]): Called with the worker's connection and `args`.
+            *args: The remaining arguments of the function.
+
+        Returns:
+            T: The return value of the function.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, function, args)
+
+    async def fetch_one(self, sql: str, parameters: Union[Tuple, Dict] = ()) -> Union[Tuple, None]:
+        return await self.run(lambda connection: connection.execute(sql, parameters).fetchone())
+
+    async def fetch_all(self, sql: str, parameters: Union[Tuple, Dict] = ()) -> List[Tuple]:
+        return await self.run(lambda connection: connection.execute(sql, parameters).fetchall())
+
+    async def execute(self, sql: str, parameters: Tuple = ()) -> int:
+        """
+        Execute (and commit) a writing statement.
+
+        Returns:
+            int: The amount of changed rows.
+        """
+        def execute(connection: sqlite3.Connection) -> int:
+            with connection:
+                return connection.execute(sql, parameters).rowcount
+
+        return await self.run(execute)
+
+    def close(self) -> None:
+        """
+        Wait for running queries, then cleanly close every connection.
+
+        Returns:
+            None
+        """
+        self._executor.shutdown(wait=True)
+        with self._connections_lock:
+            for connection in self._connections:
+                close_database(connection)
+            self._connections.clear()
+
+
+# Both are a lookup on the players.uuid index plus a search (or range) on the expDaily primary key
+_DAILY_GEXP = """
+SELECT day, amount FROM expDaily WHERE playerId = (SELECT id FROM players WHERE uuid = ?) AND day = ?
+"""
+_GEXP_HISTORY = """
+SELECT day, amount FROM expDaily WHERE playerId = (SELECT id FROM players WHERE uuid = ?) AND day BETWEEN ? AND ?
+ORDER BY day
+"""
+# One primary key read per period total, see util.rollups
+_PERIOD_GEXP = {
+    period: f"SELECT amount FROM {table} WHERE playerId = (SELECT id FROM players WHERE uuid = ?) AND {column} = ?"
+    for period, (table, column) in zip(("week", "month", "year"), rollups.ROLLUP_TABLES)
+}
+_LIFETIME_GEXP = "SELECT amount FROM expLifetime WHERE playerId = (SELECT id FROM players WHERE uuid = ?)"
+# Every player's total of one board period (by period column), one primary key search per player
+_BOARD_TOTALS = {
+    column: f"SELECT players.uuid, rollup.amount FROM players CROSS JOIN {table} AS rollup "
+            f"ON rollup.playerId = players.id AND rollup.{column} = ?"
+    for table, column in (("expDaily", "day"), *rollups.ROLLUP_TABLES)
+}
+_BOARD_PERIODS = {"daily": "day", "weekly": "week", "monthly": "month", "yearly": "year"}
+_LIFETIME_TOTALS = "SELECT players.uuid, expLifetime.amount FROM expLifetime JOIN players ON players.id = playerId"
+# The total of a date range is the running total at its end minus the running total in front of it,
+# two primary key searches per player
+_RANGE_TOTAL = """
+COALESCE((SELECT total FROM expCumulative WHERE playerId = players.id AND day <= :last
+          ORDER BY day DESC LIMIT 1), 0)
+- COALESCE((SELECT total FROM expCumulative WHERE playerId = players.id AND day < :first
+            ORDER BY day DESC LIMIT 1), 0)
+"""
+_PLAYER_RANGE_GEXP = f"SELECT {_RANGE_TOTAL} FROM players WHERE uuid = :uuid"
+_RANGE_GEXP = f"SELECT uuid, {_RANGE_TOTAL} AS total FROM players"
+_SYNC_RUNS = "SELECT * FROM syncRuns ORDER BY id DESC LIMIT ?"
+_SUCCESSFUL_SYNC_RUNS = "SELECT * FROM syncRuns WHERE success = 1 ORDER BY id DESC LIMIT ?"
+_GET_SYNC_STATE = "SELECT value FROM syncState WHERE key = ?"
+_SET_SYNC_STATE = "INSERT INTO syncState (key, value) VALUES (?, ?) " \
+                  "ON CONFLICT (key) DO UPDATE SET value = excluded.value"
+_INSERT_SYNC_RUN = """
+INSERT INTO syncRuns (taskId, started, success, members, inserted, updated, unchanged, skipped,
+    payloadBytes, fetchMs, parseMs, diffMs, writeMs, commitMs, totalMs)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+@functools.lru_cache(maxsize=1024)
+def _day_label(day: int) -> str:
+    # Commands show the same recent days over and over, format each of them once
+    return day_date(day).strftime("%B %d, %Y")
+
+
+class GexpRepository:
+    """
+    Queries of the GEXP database.
+
+    Methods:
+        get_daily_gexp: Gets the GEXP a player earned on a day.
+        get_gexp_history: Gets the GEXP a player earned per day in a date range.
+        get_gexp_days: Gets the GEXP a player earned per day in a date range, with display dates.
+        get_period_gexp: Gets the GEXP a player earned in a week, month, year or in total.
+        get_range_gexp: Gets the GEXP a player earned in a date range.
+        get_range_totals: Gets the GEXP every player earned in a date range.
+        get_board_totals: Gets the total of every player for a leaderboard period.
+        rebuild_rollups: Recomputes the rollup tables.
+        record_sync_run: Stores the statistics of a sync run.
+        get_sync_runs: Gets the statistics of the most recent sync runs.
+    """
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    async def get_daily_gexp(self, uuid: str, date: str) -> Union[Tuple[str, int], None]:
+        """
+        Get the GEXP a player earned on a day.
+
+        Parameters:
+            uuid (str): The dashed UUID of the player.
+            date (str): The ISO date.
+
+        Returns:
+            Union[Tuple[str, int], None]: The (date, amount), or None if there is no record.
+        """
+        result = await self.pool.fetch_one(_DAILY_GEXP, (uuid_bytes(uuid), day_number(date)))
+        return None if result is None else (day_date(result[0]).isoformat(), result[1])
+
+    async def get_gexp_history(self, uuid: str, first_date: str, last_date: str) -> List[Tuple[str, int]]:
+        """
+        Get the GEXP a player earned per day in a date range.
+
+        Parameters:
+            uuid (str): The dashed UUID of the player.
+            first_date (str): The first ISO date (inclusive).
+            last_date (str): The last ISO date (inclusive).
+
+        Returns:
+            List[Tuple[str, int]]: The (date, amount) rows, oldest first.
+        """
+        rows = await self.pool.fetch_all(_GEXP_HISTORY, (uuid_bytes(uuid), day_number(first_date),
+                                                         day_number(last_date)))
+        return [(day_date(day).isoformat(), amount) for day, amount in rows]
+
+    async def get_gexp_days(self, uuid: str, first_date: datetime.date,
+                            last_date: datetime.date) -> List[Tuple[str, int]]:
+        """
+        Get the GEXP a player earned per day in a date range, ready to be displayed.
+
+        Parameters:
+            uuid (str): The dashed UUID of the player.
+            first_date (datetime.date): The first day of the range (inclusive).
+            last_date (datetime.date): The last day of the range (inclusive).
+
+        Returns:
+            List[Tuple[str, int]]: The (date, e.g. "October 17, 2023", amount) rows, oldest first.
+        """
+        rows = await self.pool.fetch_all(_GEXP_HISTORY, (uuid_bytes(uuid), day_number(first_date),
+                                                         day_number(last_date)))
+        return [(_day_label(day), amount) for day, amount in rows]
+
+    async def get_period_gexp(self, uuid: str, period: str, date: datetime.date = None) -> Union[int, None]:
+        """
+        Get the GEXP a player earned in the week, month or year of a date, or in total.
+
+        Parameters:
+            uuid (str): The dashed UUID of the player.
+            period (str): "week" (ISO week), "month", "year" or "lifetime".
+            date (datetime.date, optional): A day of the period. Defaults to today.
+
+        Returns:
+            Union[int, None]: The total, or None if there is no record.
+        """
+        if period == "lifetime":
+            result = await self.pool.fetch_one(_LIFETIME_GEXP, (uuid_bytes(uuid),))
+        else:
+            key = rollups.period_key(period, date or datetime.date.today())
+            result = await self.pool.fetch_one(_PERIOD_GEXP[period], (uuid_bytes(uuid), key))
+        return None if result is None else result[0]
+
+    async def get_range_gexp(self, uuid: str, first_date: datetime.date,
+                             last_date: datetime.date) -> Union[int, None]:
+        """
+        Get the GEXP a player earned in a date range.
+
+        Parameters:
+            uuid (str): The dashed UUID of the player.
+            first_date (datetime.date): The first day of the range (inclusive).
+            last_date (datetime.date): The last day of the range (inclusive).
+
+        Returns:
+            Union[int, None]: The total, or None if the player has no records.
+        """
+        result = await self.pool.fetch_one(_PLAYER_RANGE_GEXP, {
+            "uuid": uuid_bytes(uuid), "first": day_number(first_date), "last": day_number(last_date)})
+        return None if result is None else result[0]
+
+    async def get_range_totals(self, first_date: datetime.date, last_date: datetime.date) -> Dict[str, int]:
+        """
+        Get the GEXP every player earned in a date range.
+
+        Parameters:
+            first_date (datetime.date): The first day of the range (inclusive).
+            last_date (datetime.date): The last day of the range (inclusive).
+
+        Returns:
+            Dict[str, int]: The total per dashed player UUID.
+        """
+        rows = await self.pool.fetch_all(_RANGE_GEXP, {"first": day_number(first_date),
+                                                       "last": day_number(last_date)})
+        return {uuid_string(player): total for player, total in rows}
+
+    async def get_board_totals(self, board: str, date: datetime.date = None) -> List[Tuple[str, int]]:
+        """
+        Get the total of every player for one leaderboard period.
+
+        Parameters:
+            board (str): "daily", "weekly" (ISO week), "monthly", "yearly" or "lifetime".
+            date (datetime.date, optional): A day of the period. Defaults to today.
+
+        Returns:
+            List[Tuple[str, int]]: The (dashed UUID, total) of every player with a record in the period.
+        """
+        date = date or datetime.date.today()
+        if board == "lifetime":
+            rows = await self.pool.fetch_all(_LIFETIME_TOTALS)
+        else:
+            period = _BOARD_PERIODS[board]
+            key = day_number(date) if period == "day" else rollups.period_key(period, date)
+            rows = await self.pool.fetch_all(_BOARD_TOTALS[period], (key,))
+        return [(uuid_string(player), amount) for player, amount in rows]
+
+    async def rebuild_rollups(self) -> None:
+        """
+        Recompute every weekly, monthly, yearly and lifetime total from the daily rows.
+
+        Returns:
+            None
+        """
+        await self.pool.run(rollups.rebuild)
+
+    async def record_sync_run(self, task_id, started: float, elapsed: float, ingest_result: IngestResult,
+                              success: bool) -> None:
+        """
+        Store the statistics of a sync run.
+
+        Parameters:
+            task_id: The ID of the sync task.
+            started (float): The epoch time at which the sync started.
+            elapsed (float): The total duration of the sync in seconds.
+            ingest_result (IngestResult): The result (row counts and phase timings) of the sync.
+            success (bool): Whether the sync completed.
+
+        Returns:
+            None
+        """
+        timings = [ingest_result.timings.get(phase, 0.0) * 1000 for phase in SYNC_PHASES]
+        await self.pool.execute(_INSERT_SYNC_RUN, (
+            str(task_id), int(started), int(success), ingest_result.members, ingest_result.inserted,
+            ingest_result.updated, ingest_result.unchanged, ingest_result.skipped, ingest_result.payload_bytes,
+            *timings, elapsed * 1000))
+
+    async def get_sync_state(self, key: str) -> Union[str, None]:
+        """
+        Get a value of the sync state.
+
+        Parameters:
+            key (str): The key of the value.
+
+        Returns:
+            Union[str, None]: The stored value, or None if it was never set.
+        """
+        row = await self.pool.fetch_one(_GET_SYNC_STATE, (key,))
+        return None if row is None else row[0]
+
+    async def set_sync_state(self, values: Dict[str, Any]) -> None:
+        """
+        Store (and commit) values of the sync state in one transaction.
+
+        Parameters:
+            values (Dict[str, Any]): The values by key, stored as text.
+
+        Returns:
+            None
+        """
+        def set_sync_state(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(_SET_SYNC_STATE, [(key, str(value)) for key, value in values.items()])
+
+        await self.pool.run(set_sync_state)
+
+    async def get_sync_runs(self, limit: int, successful_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        Get the statistics of the most recent sync runs.
+
+        Parameters:
+            limit (int): The maximum amount of runs.
+            successful_only (bool, optional): Whether to skip failed runs. Defaults to True.
+
+        Returns:
+            List[Dict[str, Any]]: One dict per run (columns of the syncRuns table), most recent first.
+        """
+        def get_sync_runs(connection: sqlite3.Connection) -> List[Dict[str, Any]]:
+            cursor = connection.execute(_SUCCESSFUL_SYNC_RUNS if successful_only else _SYNC_RUNS, (limit,))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        return await self.pool.run(get_sync_runs)
+
+
+_GET_LINK = "SELECT id, uuid, discordId, discordUsername, linkedAt FROM discordLink WHERE (uuid IS ?) OR (discordId IS ?)"
+_GET_LINKS = "SELECT id, uuid, discordId, discordUsername, linkedAt FROM discordLink WHERE (uuid IS NOT NULL) AND (discordId IS NOT NULL)"
+_REMOVE_LINK = "DELETE FROM discordLink WHERE (? IS NULL OR id = ?) AND (? IS NULL OR uuid = ?)"
+_REMOVE_PLAYER_LINK = "DELETE FROM discordLink WHERE uuid = ?"
+_INSERT_LINK = "INSERT INTO discordLink (uuid, discordId, discordUsername, linkedAt) VALUES (?, ?, ?, ?)"
+
+
+class LinkRepository:
+    """
+    Queries of the discordLink table.
+
+    Methods:
+        get_link: Gets the link of a player UUID or Discord ID.
+        get_links: Gets every link.
+        remove_link: Removes a link.
+        register_link: Links a player to a Discord account (replacing the player's old link).
+    """
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    async def get_link(self, identification) -> Union[_DiscordLink, None]:
+        """
+        Get the link of a player UUID or Discord ID.
+
+        Parameters:
+            identification: The UUID of the player or the Discord ID of the member.
+
+        Returns:
+            Union[_DiscordLink, None]: The link, or None if there is none.
+        """
+        _id = str(identification)
+        result = await self.pool.fetch_one(_GET_LINK, (_id, _id))
+        if result is None:
+            return None
+        row_id, uuid, discord_id, discord_username, linked_at = result
+        return _DiscordLink(int(row_id), uuid, discord_id, discord_username, int(linked_at))
+
+    async def get_links(self) -> List[_DiscordLink]:
+        """
+        Get every link.
+
+        Returns:
+            List[_DiscordLink]: The links.
+        """
+        rows = await self.pool.fetch_all(_GET_LINKS)
+        return [_DiscordLink(int(row_id), uuid, discord_id, discord_username, int(linked_at))
+                for row_id, uuid, discord_id, discord_username, linked_at in rows]
+
+    async def remove_link(self, row_id: int = None, uuid: str = None) -> bool:
+        """
+        Remove a link by its row ID and/or player UUID.
+
+        Parameters:
+            row_id (int, optional): The row ID of the link.
+            uuid (str, optional): The UUID of the player.
+
+        Returns:
+            bool: Whether a link was removed.
+        """
+        assert (row_id is not None) or (uuid is not None)
+        return await self.pool.execute(_REMOVE_LINK, (row_id, row_id, uuid, uuid)) > 0
+
+    async def register_link(self, player_uuid: str, discord_id, discord_username: str) -> None:
+        """
+        Link a player to a Discord account, an existing link of the player is replaced.
+
+        Parameters:
+            player_uuid (str): The UUID of the player.
+            discord_id: The Discord ID of the member.
+            discord_username (str): The Discord username of the member.
+
+        Returns:
+            None
+        """
+        def register_link(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(_REMOVE_PLAYER_LINK, (player_uuid,))
+                connection.execute(_INSERT_LINK, (player_uuid, str(discord_id), discord_username,
+                                                  str(int(time.time()))))
+
+        await self.pool.run(register_link)
+
+
+# Lookups kept in memory in front of the UUID cache, overridden by `[uuid_cache] memory_capacity`
+DEFAULT_MEMORY_CAPACITY: int = 4096
+# Bounds of the UUID cache file, overridden by `[uuid_cache] max_entries` and `[uuid_cache] max_idle_seconds`
+# (entries stay usable as a stale fallback long after their lifetime, see PlayerResolver)
+DEFAULT_MAX_ENTRIES: int = 50000
+DEFAULT_MAX_IDLE_SECONDS: int = 30 * 24 * 60 * 60
+# Free pages returned to the file system per compaction step, overridden by `[uuid_cache] vacuum_pages`
+DEFAULT_VACUUM_PAGES: int = 128
+# (label, maximum age in seconds) of the entry age buckets of the UUID cache statistics
+CACHE_AGE_BUCKETS: Tuple[Tuple[str, int], ...] = (
+    ("< 1 hour", 60 * 60), ("< 1 day", 24 * 60 * 60), ("< 1 week", 7 * 24 * 60 * 60), ("< 30 days", 30 * 24 * 60 * 60))
+_COUNT_CACHE_AGES: str = "SELECT COUNT(*), " + \
+                         ", ".join("IFNULL(SUM(born >= ?), 0)" for _ in CACHE_AGE_BUCKETS) + " FROM cache"
+_COUNT_UNKNOWN_NAMES: str = "SELECT COUNT(*) FROM unknownNames"
+_COUNT_CACHE_ENTRIES: str = "SELECT COUNT(*) FROM cache"
+
+
+class UuidCacheStats:
+    """
+    The size and age distribution of the UUID cache file.
+
+    Attributes:
+        entries (int): The amount of cached players.
+        unknown_names (int): The amount of names known not to exist.
+        file_bytes (int): The size of the database file (without the write-ahead log).
+        free_bytes (int): The size of the free pages the next compactions return.
+        ages (Dict[str, int]): The amount of entries per age bucket (time since they were refreshed).
+    """
+
+    def __init__(self, entries: int, unknown_names: int, file_bytes: int, free_bytes: int, ages: Dict[str, int]):
+        self.entries = entries
+        self.unknown_names = unknown_names
+        self.file_bytes = file_bytes
+        self.free_bytes = free_bytes
+        self.ages = ages
+
+    def __repr__(self):
+        return f"UuidCacheStats(entries={self.entries}, unknown_names={self.unknown_names}, " \
+               f"file_bytes={self.file_bytes}, free_bytes={self.free_bytes})"
+
+
+class UuidCacheRepository:
+    """
+    Queries of the UUID cache, with an in-memory LRU tier in front of the database.
+
+    Memory entries are keyed by dashed UUID and by lowercase name and expire with the
+    entry's lifetime, after which the lookup goes to the database again. Names that
+    don't exist are cached too (see `add_missing`), so a typo doesn't go to Mojang on
+    every lookup. The `uuid_cache` config section can disable the cache (`enabled`)
+    and change the lifetimes (`lifetime`, `missing_lifetime`) and `memory_capacity`.
+
+    The file is bounded by `evict` (least recently accessed first) and shrunk by
+    `compact`, both run periodically by the CacheMaintenance cog. Accesses are only
+    counted in memory and written with the next eviction, so a lookup never writes.
+
+    Attributes:
+        hits (int): The number of lookups served from memory.
+        misses (int): The number of lookups that went to the database.
+
+    Methods:
+        get_entry: Gets the entry of a UUID or name.
+        upsert_entry: Adds an entry, or refreshes the entry of its UUID.
+        upsert_entries: Adds or refreshes several entries at once.
+        add_missing: Remembers that a name doesn't exist.
+        delete_entry: Deletes the entry of a UUID or name.
+        evict: Deletes the entries exceeding the age and size bounds.
+        compact: Returns free pages of the file to the file system.
+        get_stats: Gets the size and age distribution of the file.
+    """
+
+    def __init__(self, pool: ConnectionPool, config: TomlConfig):
+        self.pool = pool
+        self.config = config
+        self.hits: int = 0
+        self.misses: int = 0
+        # Lookup key -> (raw result, is_missing)
+        self._memory: "collections.OrderedDict[str, Tuple[tuple, bool]]" = collections.OrderedDict()
+        # Dashed UUID -> last access of the entries read since the last eviction
+        self._accessed: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._memory)
+
+    def _setting(self, key: str, default):
+        value = self.config.get("uuid_cache", key)
+        return default if value is None else value
+
+    @property
+    def enabled(self) -> bool:
+        return self._setting("enabled", True) is not False
+
+    @property
+    def lifetime(self) -> int:
+        return int(self._setting("lifetime", CACHE_LIFETIME_SECONDS))
+
+    @property
+    def missing_lifetime(self) -> int:
+        return int(self._setting("missing_lifetime", MISSING_NAME_LIFETIME_SECONDS))
+
+    @staticmethod
+    def _memory_key(key: str) -> str:
+        return normalize_uuid(key) if is_uuid(key) else key.lower()
+
+    def _remember(self, raw_result: tuple, is_missing: bool) -> None:
+        uuid, name, _ = raw_result
+        previous = None if uuid is None else self._memory.get(uuid)
+        if previous is not None and previous[0][1].lower() != name.lower():
+            # The player was renamed, their old name doesn't belong to them anymore
+            self._memory.pop(previous[0][1].lower(), None)
+        for key in (uuid, name.lower()):
+            if key is not None:
+                self._memory[key] = (raw_result, is_missing)
+                self._memory.move_to_end(key)
+        capacity = int(self._setting("memory_capacity", DEFAULT_MEMORY_CAPACITY))
+        while len(self._memory) > capacity:
+            self._memory.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        item = self._memory.pop(self._memory_key(key), None)
+        if item is not None:
+            uuid, name, _ = item[0]
+            for other in (uuid, name.lower()):
+                if other is not None:
+                    self._memory.pop(other, None)
+
+    def _touch(self, raw_result: tuple) -> None:
+        if raw_result[0] is not None:
+            self._accessed[raw_result[0]] = int(time.time())
+
+    async def get_entry(self, key: str, lifetime_seconds: int = None) -> _CacheEntry:
+        """
+        Get the entry of a UUID or name (names are matched case-insensitively).
+
+        Parameters:
+            key (str): The UUID (dashed or not) or name.
+            lifetime_seconds (int, optional): How long an entry stays alive. Defaults to the configured lifetime.
+
+        Returns:
+            _CacheEntry: The entry (not alive if there is none). If it is alive and `is_missing`, the
+            name is known not to exist.
+        """
+        if not self.enabled:
+            return _CacheEntry(None)
+        lifetime = self.lifetime if lifetime_seconds is None else lifetime_seconds
+        now = time.time()
+        memory_key = self._memory_key(key)
+        item = self._memory.get(memory_key)
+        if item is not None:
+            raw_result, is_missing = item
+            if now - raw_result[2] <= (self.missing_lifetime if is_missing else lifetime):
+                self._memory.move_to_end(memory_key)
+                self.hits += 1
+                self._touch(raw_result)
+                return _CacheEntry(raw_result, lifetime_seconds=lifetime, is_missing=is_missing)
+            del self._memory[memory_key]
+
+        def get_entry(connection: sqlite3.Connection) -> Tuple[Union[tuple, None], bool]:
+            if is_uuid(memory_key):
+                return connection.execute(GET_CACHE_ENTRY_BY_UUID, (memory_key,)).fetchone(), False
+            # A name is looked up among the existing players first
+            result = connection.execute(GET_CACHE_ENTRY_BY_NAME, (memory_key,)).fetchone()
+            if result is not None:
+                return result, False
+            result = connection.execute(GET_UNKNOWN_NAME, (memory_key,)).fetchone()
+            return (None, False) if result is None else ((None, result[0], result[1]), True)
+
+        self.misses += 1
+        raw_result, is_missing = await self.pool.run(get_entry)
+        if raw_result is None:
+            return _CacheEntry(None)
+        self._touch(raw_result)
+        entry_lifetime = self.missing_lifetime if is_missing else lifetime
+        if now - raw_result[2] <= entry_lifetime:
+            self._remember(raw_result, is_missing)
+        return _CacheEntry(raw_result, lifetime_seconds=entry_lifetime, is_missing=is_missing)
+
+    async def upsert_entry(self, uuid: str, name: str) -> None:
+        """
+        Add an entry, or refresh the name and birth time of the existing entry of the UUID.
+
+        Parameters:
+            uuid (str): The UUID of the player (dashed or not).
+            name (str): The name of the player.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        raw_result = (normalize_uuid(uuid), name, int(time.time()))
+
+        def upsert_entry(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(UPSERT_CACHE_ENTRY, raw_result)
+                connection.execute(DELETE_UNKNOWN_NAME, (name,))
+
+        await self.pool.run(upsert_entry)
+        self._remember(raw_result, False)
+
+    async def upsert_entries(self, entries: List[Tuple[str, str]]) -> None:
+        """
+        Add or refresh several entries in one transaction.
+
+        Parameters:
+            entries (List[Tuple[str, str]]): The (UUID, name) of the players.
+
+        Returns:
+            None
+        """
+        if not self.enabled or not entries:
+            return
+        born = int(time.time())
+        raw_results = [(normalize_uuid(uuid), name, born) for uuid, name in entries]
+
+        def upsert_entries(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(UPSERT_CACHE_ENTRY, raw_results)
+                connection.executemany(DELETE_UNKNOWN_NAME, [(name,) for _, name, _ in raw_results])
+
+        await self.pool.run(upsert_entries)
+        for raw_result in raw_results:
+            self._remember(raw_result, False)
+
+    async def add_missing(self, name: str) -> None:
+        """
+        Remember that no player has a name.
+
+        Parameters:
+            name (str): The name.
+
+        Returns:
+            None
+        """
+        if not self.enabled or is_uuid(name):
+            return
+        born = int(time.time())
+        await self.pool.execute(UPSERT_UNKNOWN_NAME, (name, born))
+        self._remember((None, name, born), True)
+
+    async def delete_entry(self, key: str) -> None:
+        uuid = normalize_uuid(key) if is_uuid(key) else None
+        self._forget(key)
+        await self.pool.execute(DELETE_CACHE_ENTRY, (uuid, key))
+
+    async def evict(self) -> int:
+        """
+        Write the recorded accesses, then delete the entries that weren't accessed within
+        `max_idle_seconds` and the least recently accessed entries beyond `max_entries`.
+        Names known not to exist are deleted once they expired.
+
+        Returns:
+            int: The amount of deleted entries and names.
+        """
+        accessed = [(last_access, uuid) for uuid, last_access in self._accessed.items()]
+        self._accessed = {}
+        now = int(time.time())
+        max_idle = int(self._setting("max_idle_seconds", DEFAULT_MAX_IDLE_SECONDS))
+        max_entries = int(self._setting("max_entries", DEFAULT_MAX_ENTRIES))
+        missing_lifetime = self.missing_lifetime
+
+        def evict(connection: sqlite3.Connection) -> int:
+            with connection:
+                connection.executemany(TOUCH_CACHE_ENTRY, accessed)
+                deleted = connection.execute(EVICT_IDLE_CACHE_ENTRIES, (now - max_idle,)).rowcount
+                overflow = connection.execute(_COUNT_CACHE_ENTRIES).fetchone()[0] - max_entries
+                if overflow > 0:
+                    deleted += connection.execute(EVICT_LEAST_RECENT_CACHE_ENTRIES, (overflow,)).rowcount
+                deleted += connection.execute(EVICT_UNKNOWN_NAMES, (now - missing_lifetime,)).rowcount
+            return deleted
+
+        deleted = await self.pool.run(evict)
+        if deleted:
+            # Evicted entries may still be in memory until they expire, that is harmless
+            logging.debug(f"Evicted {deleted} UUID cache entries")
+        return deleted
+
+    async def compact(self, max_steps: int = None) -> int:
+        """
+        Return the free pages of the file to the file system, a few pages per step so
+        other queries of the cache only ever wait for one small step.
+
+        Parameters:
+            max_steps (int, optional): The maximum amount of steps. Defaults to no limit.
+
+        Returns:
+            int: The amount of returned pages.
+        """
+        pages = int(self._setting("vacuum_pages", DEFAULT_VACUUM_PAGES))
+
+        def step(connection: sqlite3.Connection) -> Tuple[int, int]:
+            before = connection.execute("PRAGMA freelist_count").fetchone()[0]
+            if before:
+                # execute() steps a pragma without result columns once (one page), executescript() runs it fully
+                connection.executescript(f"PRAGMA incremental_vacuum({pages})")
+            return before, connection.execute("PRAGMA freelist_count").fetchone()[0]
+
+        freed = 0
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            before, after = await self.pool.run(step)
+            freed += before - after
+            steps += 1
+            if after == 0 or after == before:
+                break
+            await asyncio.sleep(0)
+        return freed
+
+    async def get_stats(self) -> UuidCacheStats:
+        """
+        Get the amount of entries, the file size and the age distribution of the entries.
+
+        Returns:
+            UuidCacheStats: The statistics.
+        """
+        now = int(time.time())
+
+        def get_stats(connection: sqlite3.Connection) -> UuidCacheStats:
+            total, *newer = connection.execute(
+                _COUNT_CACHE_AGES, [now - max_age for _, max_age in CACHE_AGE_BUCKETS]).fetchone()
+            ages = {}
+            previous = 0
+            for (label, _), count in zip(CACHE_AGE_BUCKETS, newer):
+                ages[label] = count - previous
+                previous = count
+            ages["Older"] = total - previous
+            page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+            return UuidCacheStats(
+                entries=total,
+                unknown_names=connection.execute(_COUNT_UNKNOWN_NAMES).fetchone()[0],
+                file_bytes=connection.execute("PRAGMA page_count").fetchone()[0] * page_size,
+                free_bytes=connection.execute("PRAGMA freelist_count").fetchone()[0] * page_size,
+                ages=ages)
+
+        return await self.pool.run(get_stats)
+
+
+class Repositories:
+    """
+    The repositories of the bot (Meant to be singleton, see ProudCircleDiscordBot).
+
+    Attributes:
+        gexp (GexpRepository): Queries of the GEXP database.
+        links (LinkRepository): Queries of the Discord links (stored in the GEXP database).
+        uuid_cache (UuidCacheRepository): Queries of the UUID cache.
+    """
+
+    def __init__(self, config: TomlConfig):
+        pool_size = int(config.get("database", "pool_size") or DEFAULT_POOL_SIZE)
+        self._pools = [
+            ConnectionPool(DATABASE_PATH, config, pool_size, name="gexp-db"),
+            ConnectionPool(CACHE_PATH, config, max(pool_size // 2, 1), name="cache-db"),
+        ]
+        database_pool, cache_pool = self._pools
+        self.gexp = GexpRepository(database_pool)
+        self.links = LinkRepository(database_pool)
+        self.uuid_cache = UuidCacheRepository(cache_pool, config)
+
+    def close(self) -> None:
+        for pool in self._pools:
+            pool.close()
+        logging.debug("Database pools closed")
@@ -0,0 +1,249 @@
+import json
+import time
+import sqlite3
+import logging
+
+from collections import OrderedDict
+from urllib.parse import urlencode
+from typing import Any, Awaitable, Callable, Dict
+
+from util.local import TomlConfig
+from util.single_flight import SingleFlight
+
+# Default time-to-live per endpoint in seconds, overridden by `[response_cache] <endpoint>_ttl`
+DEFAULT_TTLS: Dict[str, float] = {
+    "guild": 60,
+    "player": 30,
+    "key": 0,
+}
+# Default number of entries kept, overridden by `[response_cache] max_entries` (/player is cached per uuid)
+DEFAULT_MAX_ENTRIES: int = 1024
+
+
+class _CacheItem:
+    """
+    A cached value and the (wall clock) time at which it expires.
+    """
+
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+
+    @property
+    def is_alive(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class ResponseCache:
+    """
+    TTL cache with request coalescing (single-flight) for API responses.
+
+    Entries are keyed by endpoint and query parameters. While a request is in flight,
+    identical requests don't go to the network but wait for the same future.
+
+    The cache is bounded: when an entry is added to a full cache, expired entries are
+    swept and, if it's still full, the least recently used entries are evicted.
+
+    Persistence is optional: when a path is given, live entries are loaded from an SQLite
+    file on `load` and written back on `save`. Persisted values must have `status`,
+    `headers` and `body` attributes and are rebuilt with the `factory` callable.
+
+    Attributes:
+        config (TomlConfig): The bot configuration, TTLs are read from the `response_cache` section.
+        path (str | None): The path of the on-disk cache, or None to keep the cache in memory only.
+        hits (int): The number of lookups served from the cache or an in-flight request.
+        misses (int): The number of lookups that went to the network.
+
+    Methods:
+        ttl: Gets the time-to-live of an endpoint.
+        make_key: Builds the cache key of a request.
+        max_entries: Gets the number of entries the cache keeps.
+        get: Gets a live entry.
+        lookup: Gets a live entry and counts the lookup as a hit or miss.
+        sweep: Removes the expired entries.
+        fetch: Gets a live entry, joins an in-flight request or fetches the value.
+        load / save: Restore and persist the cache.
+    """
+
+    def __init__(self, config: TomlConfig, factory: Callable[[int, Dict, bytes], Any] = None, path: str = None):
+        self.config = config
+        self.factory = factory
+        self.path = path
+        self.hits: int = 0
+        self.misses: int = 0
+        self._items: Dict[str, _CacheItem] = OrderedDict()
+        self._requests: SingleFlight = SingleFlight(abort_error=ConnectionError)
+
+    def __len__(self):
+        return len(self._items)
+
+    def ttl(self, endpoint: str) -> float:
+        """
+        Get the time-to-live of an endpoint's responses.
+
+        Parameters:
+            endpoint (str): The endpoint path, e.g. "/guild".
+
+        Returns:
+            float: The time-to-live in seconds (0 disables caching for the endpoint).
+        """
+        name = endpoint.strip("/")
+        value = self.config.get("response_cache", f"{name}_ttl")
+        if value is None:
+            value = DEFAULT_TTLS.get(name, 0)
+        return float(value)
+
+    def max_entries(self) -> int:
+        value = self.config.get("response_cache", "max_entries")
+        return DEFAULT_MAX_ENTRIES if value is None else int(value)
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        return f"{endpoint}?{urlencode(sorted((key, str(value)) for key, value in params.items()))}"
+
+    def get(self, key: str):
+        """
+        Get a live cache entry.
+
+        Parameters:
+            key (str): The cache key.
+
+        Returns:
+            The cached value, or None if there is no live entry.
+        """
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if not item.is_alive:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return item.value
+
+    def lookup(self, key: str):
+        """
+        Get a live cache entry and count the lookup as a hit, or as a miss if there is none.
+
+        Parameters:
+            key (str): The cache key.
+
+        Returns:
+            The cached value, or None if there is no live entry.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+
+    def sweep(self) -> int:
+        """
+        Remove the expired entries.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        dead = [key for key, item in self._items.items() if not item.is_alive]
+        for key in dead:
+            del self._items[key]
+        return len(dead)
+
+    def _store(self, key: str, item: _CacheItem) -> None:
+        self._items[key] = item
+        self._items.move_to_end(key)
+        max_entries = self.max_entries()
+        if len(self._items) > max_entries:
+            self.sweep()
+        while len(self._items) > max_entries:
+            self._items.popitem(last=False)
+
+    async def fetch(self, key: str, ttl: float, fetcher: Callable[[], Awaitable[Any]],
+                    cacheable: Callable[[Any], bool] = None):
+        """
+        Get a live entry, join an identical in-flight request, or fetch the value.
+
+        Parameters:
+            key (str): The cache key.
+            ttl (float): The time-to-live of the fetched value.
+            fetcher (Callable[[], Awaitable[Any]]): Fetches the value when it isn't cached.
+            cacheable (Callable[[Any], bool], optional): Decides if a fetched value may be cached.
+
+        Returns:
+            The cached, shared or freshly fetched value.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if key in self._requests:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        async def fetch() -> Any:
+            fetched = await fetcher()
+            if ttl > 0 and (cacheable is None or cacheable(fetched)):
+                self._store(key, _CacheItem(fetched, time.time() + ttl))
+            return fetched
+
+        return await self._requests.run(key, fetch)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute("""
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY NOT NULL,
+            expires REAL NOT NULL,
+            status INTEGER NOT NULL,
+            headers TEXT NOT NULL,
+            body BLOB NOT NULL
+        );
+        """)
+        return connection
+
+    def load(self) -> None:
+        """
+        Restore the live entries of the on-disk cache (if persistence is enabled).
+
+        Returns:
+            None
+        """
+        if self.path is None or self.factory is None:
+            return
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT key, expires, status, headers, body FROM responses WHERE expires > ? ORDER BY expires",
+                (time.time(),))
+            for key, expires, status, headers, body in rows:
+                self._store(key, _CacheItem(self.factory(status, json.loads(headers), body), expires))
+        finally:
+            connection.close()
+        logging.debug(f"Loaded {len(self._items)} cached API response(s)")
+
+    def save(self) -> None:
+        """
+        Write the live entries to the on-disk cache (if persistence is enabled).
+
+        Returns:
+            None
+        """
+        if self.path is None:
+            return
+        self.sweep()
+        rows = [
+            (key, item.expires_at, item.value.status, json.dumps(dict(item.value.headers)), item.value.body)
+            for key, item in self._items.items()
+        ]
+        connection = self._connect()
+        try:
+            connection.execute("DELETE FROM responses")
+            connection.executemany(
+                "INSERT INTO responses (key, expires, status, headers, body) VALUES (?, ?, ?, ?, ?)", rows)
+            connection.commit()
+        finally:
+            connection.close()
+        logging.debug(f"Saved {len(rows)} cached API response(s)")
@@ -0,0 +1,137 @@
+"""
+In-memory LRU cache for the results of GEXP queries.
+
+GEXP data only changes when a sync commits, so results are valid until then. Every
+cache of GEXP query results (this one and the leaderboards) reads the same
+SyncGeneration: a sync that changed rows bumps it once, and every cache drops the
+results of older generations. Identical lookups that arrive while one is being
+computed wait for the same computation (single-flight).
+"""
+
+import logging
+import collections
+
+from typing import Any, Awaitable, Callable, Hashable
+
+from util.single_flight import SingleFlight
+
+DEFAULT_CAPACITY: int = 1024
+
+# Marks a key that is not cached (None is a valid cached result, e.g. "no record")
+_MISSING = object()
+
+
+class SyncGeneration:
+    """
+    The generation of the GEXP data (Meant to be singleton, see ProudCircleDiscordBot).
+
+    Attributes:
+        value (int): The current generation.
+
+    Methods:
+        bump: Starts a new generation (after a sync changed the data).
+    """
+
+    def __init__(self):
+        self.value: int = 0
+
+    def bump(self) -> None:
+        """
+        Start a new generation, every cached GEXP result is outdated.
+
+        Returns:
+            None
+        """
+        self.value += 1
+        logging.debug(f"GEXP data changed (generation {self.value})")
+
+
+class ResultCache:
+    """
+    LRU cache of query results, dropped when the sync generation changes.
+
+    Attributes:
+        sync_generation (SyncGeneration): The generation of the GEXP data.
+        capacity (int): The maximum amount of cached results.
+        hits (int): The number of lookups served from the cache or an in-flight computation.
+        misses (int): The number of lookups that were computed.
+
+    Methods:
+        get: Gets a result of the current generation.
+        fetch: Gets a cached result, joins an in-flight computation or computes the result.
+    """
+
+    def __init__(self, sync_generation: SyncGeneration, capacity: int = DEFAULT_CAPACITY):
+        self.sync_generation = sync_generation
+        self.capacity = capacity
+        self.hits: int = 0
+        self.misses: int = 0
+        self._items: "collections.OrderedDict[Hashable, Any]" = collections.OrderedDict()
+        # The generation of the cached items
+        self._items_generation: int = sync_generation.value
+        # Computations in flight by (key, generation)
+        self._computations: SingleFlight = SingleFlight()
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def generation(self) -> int:
+        return self.sync_generation.value
+
+    def get(self, key: Hashable, default=None):
+        """
+        Get a cached result of the current generation.
+
+        Parameters:
+            key (Hashable): The cache key, e.g. (command, uuid, period).
+            default: The value returned if the key isn't cached.
+
+        Returns:
+            The cached result, or `default`.
+        """
+        if self._items_generation != self.generation:
+            self._items.clear()
+            self._items_generation = self.generation
+        value = self._items.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._items.move_to_end(key)
+        return value
+
+    def _store(self, key: Hashable, value) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    async def fetch(self, key: Hashable, compute: Callable[[], Awaitable[Any]]):
+        """
+        Get a cached result, join an identical in-flight computation, or compute the result.
+
+        Parameters:
+            key (Hashable): The cache key, e.g. (command, uuid, period).
+            compute (Callable[[], Awaitable[Any]]): Computes the result when it isn't cached.
+
+        Returns:
+            The cached, shared or freshly computed result.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        generation = self.generation
+        flight_key = (key, generation)
+        if flight_key in self._computations:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        async def compute_and_store() -> Any:
+            computed = await compute()
+            # A sync committed while the result was computed, don't keep the outdated result
+            if generation == self.generation:
+                self._store(key, computed)
+            return computed
+
+        return await self._computations.run(flight_key, compute_and_store)
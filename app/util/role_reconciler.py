@@ -0,0 +1,177 @@
+"""
+Reconciles the GEXP division and weekly rank roles of the linked Discord members.
+
+The roles every member should have are derived from the leaderboards:
+    - the division of their lifetime GEXP (the highest `required_amount` of
+      xp_divisions_reqs.json they reached, found with bisect)
+    - Champion (#1), Celestial (#2 - #3) or Legend (#4 - #10) for their rank on
+      the weekly leaderboard of the last completed ISO week
+
+Only roles managed by the reconciler are ever added or removed. A member whose roles
+are already correct costs no API call, every other member is updated with a single
+`member.edit(roles=...)` call.
+"""
+
+import bisect
+import datetime
+import logging
+
+import discord
+
+from typing import Dict, List, Set, Tuple, Union
+
+from util.uuider import normalize_uuid
+
+# (last rank, config key in `role_ids`) of the weekly rank roles, best first
+WEEKLY_RANK_ROLES: Tuple[Tuple[int, str], ...] = ((1, "champion"), (3, "celestial"), (10, "legend"))
+
+
+class ReconcileResult:
+    """
+    The outcome of a role reconciliation.
+
+    Attributes:
+        checked (int): The amount of linked members found in the Discord server.
+        updated (int): The amount of members whose roles were changed.
+        unchanged (int): The amount of members whose roles were already correct.
+        errors (int): The amount of members that couldn't be updated.
+    """
+
+    def __init__(self):
+        self.checked: int = 0
+        self.updated: int = 0
+        self.unchanged: int = 0
+        self.errors: int = 0
+
+    def __repr__(self):
+        return f"ReconcileResult(checked={self.checked}, updated={self.updated}, " \
+               f"unchanged={self.unchanged}, errors={self.errors})"
+
+
+class RoleReconciler:
+    """
+    Computes the managed roles of members and the changes needed to get there.
+
+    Attributes:
+        thresholds (List[int]): The `required_amount` of every division, ascending.
+        division_role_ids (List[int]): The role ID of every division, in the order of `thresholds`.
+        weekly_role_ids (List[Tuple[int, int]]): The (last rank, role ID) of every configured weekly rank role.
+        managed_role_ids (Set[int]): Every role ID the reconciler adds or removes.
+
+    Methods:
+        division_role: Gets the division role of a lifetime total.
+        weekly_role: Gets the weekly rank role of a rank.
+        desired_roles: Gets the managed roles a member should have.
+        plan: Gets the managed roles to add and to remove.
+        reconcile: Updates the managed roles of every linked member of a Discord server.
+    """
+
+    def __init__(self, division_data: Union[dict, None], weekly_role_ids: Dict[str, Union[int, None]]):
+        roles = sorted((division_data or {}).get("roles", []), key=lambda role: role["required_amount"])
+        self.thresholds: List[int] = [int(role["required_amount"]) for role in roles]
+        self.division_role_ids: List[int] = [int(role["role_id"]) for role in roles]
+        self.weekly_role_ids: List[Tuple[int, int]] = [
+            (last_rank, int(weekly_role_ids[key])) for last_rank, key in WEEKLY_RANK_ROLES
+            if weekly_role_ids.get(key) is not None]
+        self.managed_role_ids: Set[int] = set(self.division_role_ids) | {role_id for _, role_id in self.weekly_role_ids}
+
+    def division_role(self, lifetime_total: int) -> Union[int, None]:
+        """
+        Get the role of the highest division reached with a lifetime total.
+
+        Parameters:
+            lifetime_total (int): The lifetime GEXP of the member.
+
+        Returns:
+            Union[int, None]: The role ID, or None if no division was reached.
+        """
+        index = bisect.bisect_right(self.thresholds, lifetime_total) - 1
+        return self.division_role_ids[index] if index >= 0 else None
+
+    def weekly_role(self, rank: Union[int, None]) -> Union[int, None]:
+        """
+        Get the weekly rank role of a weekly leaderboard rank.
+
+        Parameters:
+            rank (Union[int, None]): The rank of the member, or None if they aren't ranked.
+
+        Returns:
+            Union[int, None]: The role ID, or None if the rank doesn't earn a role.
+        """
+        if rank is None:
+            return None
+        for last_rank, role_id in self.weekly_role_ids:
+            if rank <= last_rank:
+                return role_id
+        return None
+
+    def desired_roles(self, lifetime_total: int, weekly_rank: Union[int, None]) -> Set[int]:
+        """
+        Get the managed roles a member should have.
+
+        Parameters:
+            lifetime_total (int): The lifetime GEXP of the member.
+            weekly_rank (Union[int, None]): The rank of the member on the weekly leaderboard.
+
+        Returns:
+            Set[int]: The role IDs.
+        """
+        return {role_id for role_id in (self.division_role(lifetime_total), self.weekly_role(weekly_rank))
+                if role_id is not None}
+
+    def plan(self, current_role_ids: Set[int], desired_role_ids: Set[int]) -> Tuple[Set[int], Set[int]]:
+        """
+        Get the managed roles to add and to remove (unmanaged roles are never touched).
+
+        Parameters:
+            current_role_ids (Set[int]): The role IDs the member has.
+            desired_role_ids (Set[int]): The managed role IDs the member should have.
+
+        Returns:
+            Tuple[Set[int], Set[int]]: The role IDs to add and the role IDs to remove.
+        """
+        current_managed = current_role_ids & self.managed_role_ids
+        return desired_role_ids - current_managed, current_managed - desired_role_ids
+
+    async def reconcile(self, guild: discord.Guild, links, leaderboards) -> ReconcileResult:
+        """
+        Update the managed roles of every linked member of a Discord server.
+
+        Parameters:
+            guild (discord.Guild): The Discord server.
+            links (List[_DiscordLink]): The Discord links of the players.
+            leaderboards (LeaderboardEngine): The leaderboards to read the totals and ranks from.
+
+        Returns:
+            ReconcileResult: The amount of updated and unchanged members and errors.
+        """
+        result = ReconcileResult()
+        lifetime = await leaderboards.get("lifetime")
+        last_week = await leaderboards.get("weekly", datetime.date.today() - datetime.timedelta(days=7))
+        for link in links:
+            # Discord IDs are stored as text
+            member = guild.get_member(int(link.discord_id))
+            if member is None:
+                continue
+            result.checked += 1
+            # Links store the UUID as Mojang returned it (undashed)
+            player_uuid = normalize_uuid(link.uuid)
+            rank = last_week.rank(player_uuid)
+            desired = self.desired_roles(lifetime.totals.get(player_uuid, 0), None if rank is None else rank[0])
+            add, remove = self.plan({role.id for role in member.roles}, desired)
+            if not add and not remove:
+                result.unchanged += 1
+                continue
+            roles = [role for role in member.roles if not role.is_default() and role.id not in remove]
+            new_roles = [guild.get_role(role_id) for role_id in add]
+            if None in new_roles:
+                logging.warning(f"Role(s) {sorted(add)} of {member} don't exist in {guild}")
+                result.errors += 1
+                continue
+            try:
+                await member.edit(roles=roles + new_roles, reason="GEXP division/weekly rank update")
+                result.updated += 1
+            except discord.HTTPException as e:
+                logging.warning(f"Could not update the roles of {member}: {e}")
+                result.errors += 1
+        return result
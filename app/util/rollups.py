@@ -0,0 +1,162 @@
+"""
+Maintains the GEXP rollup tables (expWeekly, expMonthly, expYearly, expLifetime and
+expCumulative, see util.schema).
+
+During a sync every changed daily row contributes its delta (new amount - old amount)
+to the totals of its week, month, year and the lifetime total, and to the running
+totals of its day and every later day, in the same transaction as the daily rows
+themselves. `rebuild` recomputes every total from expDaily, to set the tables up and
+to repair them.
+
+To rebuild the tables of a database by hand, run from the `app` folder:
+    python -m util.rollups [--database ../data/db/proudcircle.db]
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import argparse
+import datetime
+import collections
+
+from typing import Dict, Tuple
+
+from util.schema import day_date, week_key, month_key
+
+# A new running total starts at the running total of the player's previous stored day
+_INSERT_CUMULATIVE = """
+INSERT OR IGNORE INTO expCumulative (playerId, day, total)
+SELECT ?1, ?2, COALESCE(
+    (SELECT total FROM expCumulative WHERE playerId = ?1 AND day < ?2 ORDER BY day DESC LIMIT 1), 0)
+"""
+_UPDATE_CUMULATIVE = "UPDATE expCumulative SET total = total + ? WHERE playerId = ? AND day >= ?"
+# The rollup tables and their period key column, in the order of `period_keys`
+ROLLUP_TABLES: Tuple[Tuple[str, str], ...] = (("expWeekly", "week"), ("expMonthly", "month"), ("expYearly", "year"))
+
+
+def period_keys(day: int) -> Tuple[int, int, int]:
+    """
+    Get the week, month and year key of a day.
+
+    Parameters:
+        day (int): The day number.
+
+    Returns:
+        Tuple[int, int, int]: The (week, month, year) keys.
+    """
+    date = day_date(day)
+    return week_key(date), month_key(date), date.year
+
+
+def period_key(period: str, date: datetime.date) -> int:
+    """
+    Get the key of the week, month or year of a date.
+
+    Parameters:
+        period (str): "week" (ISO week), "month" or "year".
+        date (datetime.date): The date.
+
+    Returns:
+        int: The key of the period, as stored in its rollup table.
+    """
+    if period == "week":
+        return week_key(date)
+    if period == "month":
+        return month_key(date)
+    return date.year
+
+
+def apply_deltas(connection: sqlite3.Connection, deltas: Dict[Tuple[int, int], int]) -> None:
+    """
+    Add the changes of daily rows to the rollup totals (without committing).
+
+    Parameters:
+        connection (sqlite3.Connection): The connection of the sync transaction.
+        deltas (Dict[Tuple[int, int], int]): The change of the amount per (playerId, day).
+
+    Returns:
+        None
+    """
+    totals = [collections.Counter() for _ in ROLLUP_TABLES]
+    lifetime = collections.Counter()
+    keys_per_day: Dict[int, Tuple[int, int, int]] = {}
+    for (player_id, day), delta in deltas.items():
+        # Zero deltas still create the period's row (like `rebuild` does for days without GEXP)
+        keys = keys_per_day.get(day)
+        if keys is None:
+            keys = keys_per_day[day] = period_keys(day)
+        for counter, key in zip(totals, keys):
+            counter[player_id, key] += delta
+        lifetime[player_id] += delta
+
+    for (table, column), counter in zip(ROLLUP_TABLES, totals):
+        connection.executemany(f"""
+        INSERT INTO {table} (playerId, {column}, amount) VALUES (?, ?, ?)
+        ON CONFLICT (playerId, {column}) DO UPDATE SET amount = amount + excluded.amount
+        """, [(player_id, key, delta) for (player_id, key), delta in counter.items()])
+    connection.executemany("""
+    INSERT INTO expLifetime (playerId, amount) VALUES (?, ?)
+    ON CONFLICT (playerId) DO UPDATE SET amount = amount + excluded.amount
+    """, lifetime.items())
+
+    # Every new day is inserted with the running total in front of it first, then every
+    # delta is added to its day and the later days (which includes the new days after it)
+    ordered = sorted(deltas.items())
+    connection.executemany(_INSERT_CUMULATIVE, [key for key, _ in ordered])
+    connection.executemany(_UPDATE_CUMULATIVE, [(delta, player_id, day)
+                                                 for (player_id, day), delta in ordered if delta != 0])
+
+
+def rebuild(connection: sqlite3.Connection) -> None:
+    """
+    Recompute (and commit) every rollup total from expDaily.
+
+    Parameters:
+        connection (sqlite3.Connection): The connection to the GEXP database.
+
+    Returns:
+        None
+    """
+    started = time.perf_counter()
+    for name, position in (("week_key", 0), ("month_key", 1), ("year_key", 2)):
+        connection.create_function(name, 1, lambda day, _position=position: period_keys(day)[_position],
+                                   deterministic=True)
+    try:
+        for (table, column), function in zip(ROLLUP_TABLES, ("week_key", "month_key", "year_key")):
+            connection.execute(f"DELETE FROM {table}")
+            connection.execute(f"""
+            INSERT INTO {table} (playerId, {column}, amount)
+            SELECT playerId, {function}(day) AS period, SUM(amount) FROM expDaily GROUP BY playerId, period
+            """)
+        connection.execute("DELETE FROM expLifetime")
+        connection.execute("INSERT INTO expLifetime (playerId, amount) "
+                           "SELECT playerId, SUM(amount) FROM expDaily GROUP BY playerId")
+        connection.execute("DELETE FROM expCumulative")
+        connection.execute("INSERT INTO expCumulative (playerId, day, total) "
+                           "SELECT playerId, day, SUM(amount) OVER (PARTITION BY playerId ORDER BY day) FROM expDaily")
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    logging.info(f"Rebuilt the GEXP rollup tables in {time.perf_counter() - started:.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the GEXP rollup tables")
+    parser.add_argument("--database", default=os.path.join("..", "data", "db", "proudcircle.db"))
+    arguments = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if not os.path.exists(arguments.database):
+        parser.error(f"No database at {arguments.database}")
+    connection = sqlite3.connect(arguments.database)
+    connection.execute("PRAGMA busy_timeout = 5000")
+    try:
+        rebuild(connection)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Schema (v2) of the GEXP database.
+
+    players     Maps the 16 raw bytes of a player's UUID to a small integer id.
+    guilds      Maps a Hypixel guild ID to a small integer id.
+    expDaily    The GEXP of a player per day, keyed by (playerId, day) in a WITHOUT
+                ROWID table, so the primary key *is* the table and point lookups and
+                per-player ranges read a single b-tree.
+    expWeekly   The GEXP of a player per ISO week, per month, per year and in total,
+    expMonthly  kept up to date by util.rollups. A period total is one primary key read.
+    expYearly
+    expLifetime
+    expCumulative   The running total of a player's GEXP up to and including each day,
+                    kept up to date by util.rollups. The total of any date range is the
+                    running total at its end minus the one before its start.
+
+Days are stored as day numbers (days since 1970-01-01) instead of ISO date text.
+Weeks are stored as ISO year * 100 + ISO week (e.g. 202342) and months as
+year * 100 + month (e.g. 202310).
+
+The `user_version` pragma holds the schema version:
+    2   players, guilds and expDaily (see util.migrate_v2)
+    3   rollup tables
+    4   expCumulative
+
+This module has no side effects on import (unlike util.local), so the migration
+tool can use it on its own.
+"""
+
+import uuid
+import sqlite3
+import datetime
+
+from typing import Union
+
+SCHEMA_VERSION: int = 4
+_EPOCH_ORDINAL: int = datetime.date(1970, 1, 1).toordinal()
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS players (
+        id INTEGER PRIMARY KEY NOT NULL,
+        uuid BLOB NOT NULL UNIQUE
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS guilds (
+        id INTEGER PRIMARY KEY NOT NULL,
+        guildId TEXT NOT NULL UNIQUE
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS expDaily (
+        playerId INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        guild INTEGER,
+        PRIMARY KEY (playerId, day)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS expWeekly (
+        playerId INTEGER NOT NULL,
+        week INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        PRIMARY KEY (playerId, week)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS expMonthly (
+        playerId INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        PRIMARY KEY (playerId, month)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS expYearly (
+        playerId INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        PRIMARY KEY (playerId, year)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS expLifetime (
+        playerId INTEGER PRIMARY KEY NOT NULL,
+        amount INTEGER NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS expCumulative (
+        playerId INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        PRIMARY KEY (playerId, day)
+    ) WITHOUT ROWID;
+    """,
+    # Key/value state of the GEXP sync (e.g. its schedule and the migration progress)
+    """
+    CREATE TABLE IF NOT EXISTS syncState (
+        key TEXT PRIMARY KEY NOT NULL,
+        value TEXT NOT NULL
+    );
+    """,
+]
+
+
+def create_schema(connection: sqlite3.Connection) -> None:
+    """
+    Create the v2 tables that don't exist yet (without committing).
+
+    Parameters:
+        connection (sqlite3.Connection): The connection to the GEXP database.
+
+    Returns:
+        None
+    """
+    for command in SCHEMA:
+        connection.execute(command)
+
+
+def day_number(date: Union[datetime.date, str]) -> int:
+    """
+    Convert a date (or ISO date string) to its day number.
+
+    Parameters:
+        date (Union[datetime.date, str]): The date.
+
+    Returns:
+        int: The days since 1970-01-01.
+    """
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date)
+    return date.toordinal() - _EPOCH_ORDINAL
+
+
+def day_date(day: int) -> datetime.date:
+    """
+    Convert a day number back to its date.
+
+    Parameters:
+        day (int): The days since 1970-01-01.
+
+    Returns:
+        datetime.date: The date.
+    """
+    return datetime.date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def week_key(date: datetime.date) -> int:
+    """
+    Get the key of the ISO week of a date.
+
+    Parameters:
+        date (datetime.date): The date.
+
+    Returns:
+        int: The ISO year * 100 + the ISO week number.
+    """
+    iso_year, iso_week, _ = date.isocalendar()
+    return iso_year * 100 + iso_week
+
+
+def month_key(date: datetime.date) -> int:
+    """
+    Get the key of the month of a date.
+
+    Parameters:
+        date (datetime.date): The date.
+
+    Returns:
+        int: The year * 100 + the month.
+    """
+    return date.year * 100 + date.month
+
+
+def uuid_bytes(player_uuid: str) -> bytes:
+    """
+    Convert a (dashed or undashed) UUID string to the 16 bytes stored in `players`.
+
+    Parameters:
+        player_uuid (str): The UUID.
+
+    Returns:
+        bytes: The raw UUID.
+
+    Raises:
+        ValueError: If the string is not a valid UUID.
+    """
+    return uuid.UUID(player_uuid).bytes
+
+
+def uuid_string(raw: bytes) -> str:
+    """
+    Convert the 16 bytes stored in `players` back to a dashed UUID string.
+
+    Parameters:
+        raw (bytes): The raw UUID.
+
+    Returns:
+        str: The lowercase, dashed UUID.
+    """
+    return str(uuid.UUID(bytes=raw))
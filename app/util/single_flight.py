@@ -0,0 +1,127 @@
+"""
+Coalescing of identical concurrent async work (single-flight).
+
+While a computation for a key is in flight, identical lookups don't start their own but
+wait for the same future. Used by the response cache, the /gexp result cache, the
+leaderboards and the player resolver.
+"""
+
+import asyncio
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, Type, Union
+
+
+class SingleFlight:
+    """
+    In-flight futures by key.
+
+    `run` covers the usual case (one caller computes, identical callers wait). Work that
+    resolves several keys at once, or that isn't owned by a caller, registers its futures
+    with `begin` and resolves them with `resolve` or `fail`.
+
+    A waiter is never cancelled by the owner of the work: if the owner is cancelled, the
+    waiters get an `abort_error` instead (they `asyncio.shield` the shared future, so a
+    cancelled waiter doesn't cancel the work either).
+
+    Attributes:
+        abort_error (Type[Exception]): Raised to the waiters of work whose owner was cancelled.
+
+    Methods:
+        get: Gets the future of a key that is in flight.
+        begin: Registers a key as in flight.
+        resolve: Resolves the future of a key with its result.
+        fail: Resolves the future of a key with an exception.
+        run: Joins the work in flight for a key, or computes it.
+    """
+
+    def __init__(self, abort_error: Type[Exception] = RuntimeError):
+        self.abort_error = abort_error
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self):
+        return len(self._futures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._futures
+
+    def get(self, key: Hashable) -> Union[asyncio.Future, None]:
+        return self._futures.get(key)
+
+    def begin(self, key: Hashable) -> asyncio.Future:
+        """
+        Register a key as in flight, identical lookups will wait for its future.
+
+        Parameters:
+            key (Hashable): The key.
+
+        Returns:
+            asyncio.Future: The future to settle with `resolve` or `fail`.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        return future
+
+    def _end(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._futures.get(key) is future:
+            del self._futures[key]
+
+    def resolve(self, key: Hashable, future: asyncio.Future, value) -> None:
+        """
+        Hand the result to the waiters of a key and take the key out of flight.
+
+        Parameters:
+            key (Hashable): The key.
+            future (asyncio.Future): The future `begin` returned for the key.
+            value: The result.
+
+        Returns:
+            None
+        """
+        self._end(key, future)
+        if not future.done():
+            future.set_result(value)
+
+    def fail(self, key: Hashable, future: asyncio.Future, error: BaseException) -> None:
+        """
+        Hand an exception to the waiters of a key and take the key out of flight.
+
+        Parameters:
+            key (Hashable): The key.
+            future (asyncio.Future): The future `begin` returned for the key.
+            error (BaseException): The exception, a cancellation is replaced by `abort_error`.
+
+        Returns:
+            None
+        """
+        self._end(key, future)
+        if future.done():
+            return
+        if not isinstance(error, Exception):
+            # Cancellation of the owner must not cancel the lookups waiting for it
+            error = self.abort_error("The shared work was aborted")
+        future.set_exception(error)
+        # Waiters may not exist, don't log "exception was never retrieved"
+        future.exception()
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]):
+        """
+        Wait for the work in flight for a key, or compute it while identical lookups wait.
+
+        Parameters:
+            key (Hashable): The key.
+            compute (Callable[[], Awaitable[Any]]): Computes the result when nothing is in flight.
+
+        Returns:
+            The shared or freshly computed result.
+        """
+        future = self._futures.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = self.begin(key)
+        try:
+            value = await compute()
+        except BaseException as e:
+            self.fail(key, future, e)
+            raise
+        self.resolve(key, future, value)
+        return value
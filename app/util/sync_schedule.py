@@ -0,0 +1,117 @@
+import time
+import logging
+
+from typing import Union
+
+from util.local import IngestResult, TomlConfig
+from util.repository import GexpRepository
+
+DEFAULT_INTERVAL_MINUTES: float = 60
+DEFAULT_MIN_INTERVAL_MINUTES: float = 15
+DEFAULT_MAX_INTERVAL_MINUTES: float = 120
+# Changed rows per synced member and hour above which the interval is shortened, and below which it is lengthened
+DEFAULT_HIGH_CHANGE_RATIO: float = 0.25
+DEFAULT_LOW_CHANGE_RATIO: float = 0.05
+DEFAULT_ADJUST_FACTOR: float = 1.5
+# The shortest time a change rate is measured over (a manual sync right after another one)
+MIN_RATE_SECONDS: float = 60
+# Keys of the `syncState` table
+LAST_SUCCESS_KEY: str = "gexp_last_success"
+INTERVAL_KEY: str = "gexp_interval"
+
+
+class AdaptiveSyncSchedule:
+    """
+    Adaptive interval for the GEXP sync.
+
+    After every successful sync the interval is adjusted by how fast GEXP changed since the
+    previous one (changed rows per member and hour): when it changes quickly (evenings, events)
+    syncs are run more often, when little changes the schedule backs off. The interval always stays within the configured bounds.
+
+    The time of the last successful sync and the current interval are persisted in the
+    GEXP database (through the repository pool, never on the event loop), so a restarted
+    bot knows whether a sync is overdue. `load` restores them.
+
+    Settings (`[gexp_logger]` section, intervals in minutes):
+        min_interval_minutes, max_interval_minutes, high_change_ratio, low_change_ratio, adjust_factor
+
+    Attributes:
+        config (TomlConfig): The bot configuration, read on every adjustment so reloads apply.
+        gexp (GexpRepository): The repository the schedule is persisted through.
+        interval (float): The current interval in seconds.
+        last_success (float | None): The epoch time of the last successful sync.
+
+    Methods:
+        load: Restores the persisted schedule.
+        record_success: Adjusts the interval after a successful sync and persists it.
+        seconds_until_due: How long to wait until the next sync is due.
+    """
+
+    def __init__(self, config: TomlConfig, gexp: GexpRepository):
+        self.config = config
+        self.gexp = gexp
+        self.last_success: Union[float, None] = None
+        self.interval: float = self._clamp(DEFAULT_INTERVAL_MINUTES * 60)
+
+    async def load(self) -> None:
+        """
+        Restore the time of the last successful sync and the interval from the database.
+
+        Returns:
+            None
+        """
+        last_success = await self.gexp.get_sync_state(LAST_SUCCESS_KEY)
+        interval = await self.gexp.get_sync_state(INTERVAL_KEY)
+        self.last_success = None if last_success is None else float(last_success)
+        self.interval = self._clamp(DEFAULT_INTERVAL_MINUTES * 60 if interval is None else float(interval))
+
+    def _setting(self, key: str, default: float) -> float:
+        value = self.config.get("gexp_logger", key)
+        return float(default if value is None else value)
+
+    def _clamp(self, interval: float) -> float:
+        min_interval = self._setting("min_interval_minutes", DEFAULT_MIN_INTERVAL_MINUTES) * 60
+        max_interval = self._setting("max_interval_minutes", DEFAULT_MAX_INTERVAL_MINUTES) * 60
+        return min(max(interval, min_interval), max_interval)
+
+    async def record_success(self, ingest_result: IngestResult) -> float:
+        """
+        Adjust the interval to the rate of changed rows since the last successful sync and persist the schedule.
+
+        Parameters:
+            ingest_result (IngestResult): The result of the sync.
+
+        Returns:
+            float: The new interval in seconds.
+        """
+        # New days without GEXP appear for every member at midnight, only changed amounts are activity
+        changed_rows = ingest_result.changed
+        now = time.time()
+        elapsed = self.interval if self.last_success is None else now - self.last_success
+        change_ratio = changed_rows / max(ingest_result.members, 1) / (max(elapsed, MIN_RATE_SECONDS) / 3600)
+        factor = self._setting("adjust_factor", DEFAULT_ADJUST_FACTOR)
+        if change_ratio >= self._setting("high_change_ratio", DEFAULT_HIGH_CHANGE_RATIO):
+            interval = self.interval / factor
+        elif change_ratio <= self._setting("low_change_ratio", DEFAULT_LOW_CHANGE_RATIO):
+            interval = self.interval * factor
+        else:
+            interval = self.interval
+        self.interval = self._clamp(interval)
+        self.last_success = now
+        logging.debug(f"GexpLogger: {changed_rows} changed row(s) in {elapsed / 60:.0f} minutes "
+                      f"({change_ratio:.2f} per member and hour), "
+                      f"next sync in {self.interval / 60:.1f} minutes")
+
+        await self.gexp.set_sync_state({LAST_SUCCESS_KEY: self.last_success, INTERVAL_KEY: self.interval})
+        return self.interval
+
+    def seconds_until_due(self) -> float:
+        """
+        Get how long to wait until the next sync is due.
+
+        Returns:
+            float: The seconds until the next sync (0 if it is overdue or no sync ever succeeded).
+        """
+        if self.last_success is None:
+            return 0.0
+        return max(self.last_success + self.interval - time.time(), 0.0)
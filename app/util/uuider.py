@@ -1,3 +1,8 @@
+import re
+
+_UUID = re.compile(r"[0-9a-fA-F]{32}")
+
+
 def add_hyphens_to_uuid(uuid_string):
     formatted_uuid = '{}-{}-{}-{}-{}'.format(
         uuid_string[:8],
@@ -7,3 +12,19 @@ def add_hyphens_to_uuid(uuid_string):
         uuid_string[20:]
     )
     return formatted_uuid
+
+
+def normalize_uuid(uuid_string):
+    """
+    Normalize a UUID to the lowercase, hyphenated form stored in the databases.
+
+    Accepts both the dashed and the trimmed (32 character) representations.
+    """
+    return add_hyphens_to_uuid(uuid_string.replace('-', '').lower())
+
+
+def is_uuid(value):
+    """
+    Check whether a value is a UUID (dashed or trimmed) rather than a player name.
+    """
+    return _UUID.fullmatch(value.replace('-', '')) is not None
@@ -0,0 +1,102 @@
+"""
+Shared helpers for the benchmark scripts.
+
+`util.local` creates the bot's databases and config relative to the working
+directory (`../data`) as soon as it is imported, so every benchmark first moves
+into a throw-away copy of that layout. Nothing in the real `data` folder is touched.
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import tempfile
+import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_DIR = os.path.join(REPO_ROOT, "app")
+
+
+def enter_sandbox() -> str:
+    """
+    Create a temporary `app`/`data` layout, chdir into it and make the bot's modules importable.
+
+    Returns:
+        str: The root folder of the sandbox.
+    """
+    root = tempfile.mkdtemp(prefix="pcbot-bench-")
+    os.makedirs(os.path.join(root, "app"))
+    os.makedirs(os.path.join(root, "data", "db"))
+    for filename in ["xp_divisions_reqs.json", "weekly_points_reqs.json"]:
+        shutil.copy(os.path.join(REPO_ROOT, "data", filename), os.path.join(root, "data", filename))
+    os.chdir(os.path.join(root, "app"))
+    sys.path.insert(0, APP_DIR)
+    return root
+
+
+def make_uuid(rng: random.Random) -> str:
+    return "%032x" % rng.getrandbits(128)
+
+
+def make_guild_payload(member_count: int = 125, seed: int = 0, today: datetime.date = None) -> dict:
+    """
+    Build a synthetic `/guild` endpoint payload with a seven day expHistory per member.
+    """
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    members = []
+    for _ in range(member_count):
+        members.append({
+            "uuid": make_uuid(rng),
+            "rank": rng.choice(["Member", "Elite", "Officer"]),
+            "joined": 1600000000000 + rng.randrange(10 ** 11),
+            "questParticipation": rng.randrange(500),
+            "expHistory": {
+                (today - datetime.timedelta(days=day)).isoformat(): rng.choice([0, rng.randrange(250000)])
+                for day in range(7)
+            }
+        })
+    return {
+        "success": True,
+        "guild": {
+            "_id": "%024x" % rng.getrandbits(96),
+            "name": f"Guild {seed}",
+            "coins": 0,
+            "created": 1500000000000,
+            "members": members,
+            "ranks": [{"name": "Member", "default": True, "priority": 1}],
+            "exp": rng.randrange(10 ** 9),
+        }
+    }
+
+
+def dump_payload(payload: dict) -> bytes:
+    return json.dumps(payload).encode("utf-8")
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def populate_history(connection, payload: dict, history_days: int, amount=lambda day: day) -> None:
+    """
+    Store `history_days` of (older) GEXP history for every member of a payload in the v2 tables.
+
+    The days covered by the payload itself (the last seven) are left out, so the first
+    sync of the payload still inserts them.
+    """
+    from util.schema import create_schema, day_number
+
+    create_schema(connection)
+    today = day_number(datetime.date.today())
+    for member in payload["guild"]["members"]:
+        player_id = connection.execute("INSERT INTO players (uuid) VALUES (?)",
+                                       (bytes.fromhex(member["uuid"]),)).lastrowid
+        connection.executemany("INSERT INTO expDaily (playerId, day, amount) VALUES (?, ?, ?)",
+                               [(player_id, today - day, amount(day)) for day in range(7, history_days)])
+    connection.commit()
@@ -0,0 +1,268 @@
+"""
+Local stand-in for the Hypixel and Mojang APIs, for offline load testing.
+
+Serves realistic responses from generated data:
+    GET  /guild?id=<guild id>                        Hypixel guild (members with a 7 day expHistory)
+    GET  /player?uuid=<uuid>                         Hypixel player (with a DISCORD social media link)
+    GET  /key                                        Hypixel API key information
+    GET  /users/profiles/minecraft/<name>            Mojang name -> profile
+    GET  /session/minecraft/profile/<uuid>           Mojang uuid -> profile
+    POST /profiles/minecraft                         Mojang bulk name -> profiles (max 10 names)
+
+Hypixel responses carry `ratelimit-*` headers and answer 429 once the window's quota
+is used up. Latency, jitter and the rate of injected 5xx errors are configurable.
+
+Point the bot at it with (settings.conf):
+    [api]
+    hypixel_url = "http://127.0.0.1:8080"
+    mojang_api_url = "http://127.0.0.1:8080"
+    mojang_session_url = "http://127.0.0.1:8080"
+
+The guild IDs of the generated guilds are printed on startup (use them as `bot.guild_ids`),
+every player's Discord link is "<name>#0001".
+
+Usage (from the repository root):
+    python benchmarks/api_standin.py [--port 8080] [--guilds 3] [--members 125] [--latency-ms 80]
+        [--jitter-ms 40] [--error-rate 0.01] [--rate-limit 120] [--window 60] [--change-rate 0.1]
+"""
+
+import time
+import random
+import asyncio
+import argparse
+import datetime
+
+from aiohttp import web
+from typing import Dict, List
+
+from _sandbox import make_uuid
+
+MOJANG_BULK_LIMIT: int = 10
+
+
+class StandinWorld:
+    """
+    Generated guilds and players served by the stand-in.
+
+    Attributes:
+        guilds (Dict[str, dict]): The guild objects of the `/guild` endpoint, by guild ID.
+        players (Dict[str, str]): The player name per (undashed) UUID.
+        uuids (Dict[str, str]): The UUID per lowercase player name.
+    """
+
+    def __init__(self, guild_count: int = 1, member_count: int = 125, seed: int = 0, change_rate: float = 0.1):
+        self.rng = random.Random(seed)
+        self.change_rate = change_rate
+        self.guilds: Dict[str, dict] = {}
+        self.players: Dict[str, str] = {}
+        self.uuids: Dict[str, str] = {}
+        today = datetime.date.today()
+        for guild_index in range(guild_count):
+            guild_id = "%024x" % self.rng.getrandbits(96)
+            members = []
+            for _ in range(member_count):
+                uuid = make_uuid(self.rng)
+                name = f"Player_{len(self.players)}"
+                self.players[uuid] = name
+                self.uuids[name.lower()] = uuid
+                members.append({
+                    "uuid": uuid,
+                    "rank": self.rng.choice(["Member", "Elite", "Officer"]),
+                    "joined": 1600000000000 + self.rng.randrange(10 ** 11),
+                    "questParticipation": self.rng.randrange(500),
+                    "expHistory": {
+                        (today - datetime.timedelta(days=day)).isoformat(): self.rng.choice(
+                            [0, self.rng.randrange(250000)])
+                        for day in range(7)
+                    }
+                })
+            self.guilds[guild_id] = {
+                "_id": guild_id,
+                "name": f"Standin Guild {guild_index}",
+                "coins": 0,
+                "created": 1500000000000,
+                "members": members,
+                "ranks": [{"name": "Member", "default": True, "priority": 1}],
+                "exp": self.rng.randrange(10 ** 9),
+            }
+
+    def tick(self, guild: dict) -> None:
+        """
+        Let a share of the guild's members earn GEXP today, so consecutive syncs see changes.
+        """
+        today = datetime.date.today().isoformat()
+        for member in guild["members"]:
+            history = member["expHistory"]
+            if today not in history:
+                # A new day: shift the history window
+                oldest = min(history)
+                del history[oldest]
+                history[today] = 0
+            if self.rng.random() < self.change_rate:
+                history[today] += self.rng.randrange(100, 5000)
+
+
+class ApiStandin:
+    """
+    The aiohttp application serving the stand-in endpoints.
+
+    Attributes:
+        world (StandinWorld): The generated data.
+        latency (float): The base latency of every response in seconds.
+        jitter (float): The maximum random extra latency in seconds.
+        error_rate (float): The share of requests answered with a 5xx error.
+        rate_limit (int): The Hypixel requests allowed per window.
+        window (float): The length of a rate-limit window in seconds.
+        requests (Dict[str, int]): The amount of requests served per endpoint.
+    """
+
+    def __init__(self, world: StandinWorld, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0,
+                 rate_limit: int = 120, window: float = 60):
+        self.world = world
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.window = window
+        self.requests: Dict[str, int] = {}
+        self._window_start = time.monotonic()
+        self._window_used = 0
+        self._runner = None
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get("/guild", self.guild)
+        self.app.router.add_get("/player", self.player)
+        self.app.router.add_get("/key", self.key)
+        self.app.router.add_get("/users/profiles/minecraft/{name}", self.mojang_profile)
+        self.app.router.add_get("/session/minecraft/profile/{uuid}", self.mojang_session_profile)
+        self.app.router.add_post("/profiles/minecraft", self.mojang_bulk)
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.requests[route] = self.requests.get(route, 0) + 1
+        await asyncio.sleep(self.latency + random.random() * self.jitter)
+        if random.random() < self.error_rate:
+            return web.json_response({"success": False, "cause": "Injected error"},
+                                     status=random.choice([500, 502, 503]))
+        return await handler(request)
+
+    def _hypixel_response(self, request: web.Request, payload: dict, status: int = 200) -> web.Response:
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._window_used = 0
+        reset = max(int(self._window_start + self.window - now), 0)
+        if request.headers.get("API-Key") is None:
+            payload, status = {"success": False, "cause": "Invalid API key"}, 403
+        elif self._window_used >= self.rate_limit:
+            payload, status = {"success": False, "cause": "Key throttle", "throttle": True}, 429
+        else:
+            self._window_used += 1
+        headers = {
+            "ratelimit-limit": str(self.rate_limit),
+            "ratelimit-remaining": str(max(self.rate_limit - self._window_used, 0)),
+            "ratelimit-reset": str(reset),
+        }
+        if status == 429:
+            headers["retry-after"] = str(reset)
+        return web.json_response(payload, status=status, headers=headers)
+
+    async def guild(self, request: web.Request) -> web.Response:
+        guild = self.world.guilds.get(request.query.get("id", ""))
+        if guild is not None:
+            self.world.tick(guild)
+        return self._hypixel_response(request, {"success": True, "guild": guild})
+
+    async def player(self, request: web.Request) -> web.Response:
+        uuid = request.query.get("uuid", "").replace("-", "").lower()
+        name = self.world.players.get(uuid)
+        player = None
+        if name is not None:
+            player = {
+                "uuid": uuid,
+                "displayname": name,
+                "playername": name.lower(),
+                "socialMedia": {"links": {"DISCORD": f"{name}#0001"}},
+            }
+        return self._hypixel_response(request, {"success": True, "player": player})
+
+    async def key(self, request: web.Request) -> web.Response:
+        record = {"key": request.headers.get("API-Key"), "owner": None, "limit": self.rate_limit,
+                  "queriesInPastMin": self._window_used, "totalQueries": sum(self.requests.values())}
+        return self._hypixel_response(request, {"success": True, "record": record})
+
+    def _profile(self, uuid: str) -> dict:
+        return {"id": uuid, "name": self.world.players[uuid]}
+
+    async def mojang_profile(self, request: web.Request) -> web.Response:
+        uuid = self.world.uuids.get(request.match_info["name"].lower())
+        if uuid is None:
+            return web.json_response({"path": request.path, "errorMessage": "Couldn't find any profile with name"},
+                                     status=404)
+        return web.json_response(self._profile(uuid))
+
+    async def mojang_session_profile(self, request: web.Request) -> web.Response:
+        uuid = request.match_info["uuid"].replace("-", "").lower()
+        if uuid not in self.world.players:
+            return web.Response(status=204)
+        return web.json_response({**self._profile(uuid), "properties": []})
+
+    async def mojang_bulk(self, request: web.Request) -> web.Response:
+        names: List[str] = await request.json()
+        if not isinstance(names, list) or len(names) > MOJANG_BULK_LIMIT:
+            return web.json_response({"error": "IllegalArgumentException",
+                                      "errorMessage": f"Not more that {MOJANG_BULK_LIMIT} profile name per call "
+                                                      f"is allowed."}, status=400)
+        profiles = [self._profile(self.world.uuids[name.lower()]) for name in names
+                    if name.lower() in self.world.uuids]
+        return web.json_response(profiles)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Start serving in the running event loop.
+
+        Returns:
+            str: The base URL of the stand-in.
+        """
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+async def serve(arguments) -> None:
+    world = StandinWorld(arguments.guilds, arguments.members, change_rate=arguments.change_rate)
+    standin = ApiStandin(world, arguments.latency_ms, arguments.jitter_ms, arguments.error_rate,
+                         arguments.rate_limit, arguments.window)
+    base_url = await standin.start(arguments.host, arguments.port)
+    print(f"Serving the Hypixel/Mojang stand-in on {base_url}")
+    print(f"guild_ids = {list(world.guilds)}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standin.stop()
+        print(f"Requests served: {standin.requests}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--guilds", type=int, default=3)
+    parser.add_argument("--members", type=int, default=125)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=120)
+    parser.add_argument("--window", type=float, default=60)
+    parser.add_argument("--change-rate", type=float, default=0.1)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,127 @@
+"""
+Event-loop lag during a GEXP sync, before and after moving database work to the GexpWriter thread.
+
+"before" replays the old GexpLogger.sync_member_exp_history path: one SELECT and one
+INSERT/UPDATE per (member, date) pair, run synchronously inside the coroutine against an
+un-indexed legacy expHistory table. "after" hands the raw payload to a GexpWriter.
+
+While each sync runs, a heartbeat coroutine sleeps for a fixed tick and records how late
+it wakes up. That delay is what gateway heartbeats and slash commands experience.
+
+Usage (from the repository root):
+    python benchmarks/event_loop_lag.py [--history-days 365] [--members 125] [--syncs 3]
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import argparse
+import datetime
+
+from _sandbox import enter_sandbox, make_guild_payload, dump_payload, percentile, populate_history
+
+TICK_SECONDS = 0.005
+
+
+def populate(connection: sqlite3.Connection, payload: dict, history_days: int) -> None:
+    today = datetime.date.today()
+    rows = []
+    for member in payload["guild"]["members"]:
+        _uuid = member["uuid"]
+        dashed = f"{_uuid[:8]}-{_uuid[8:12]}-{_uuid[12:16]}-{_uuid[16:20]}-{_uuid[20:]}"
+        for day in range(7, history_days):
+            rows.append((0, (today - datetime.timedelta(days=day)).isoformat(), dashed, day))
+    connection.executemany("INSERT INTO expHistory (timestamp, date, uuid, amount) VALUES (?, ?, ?, ?)", rows)
+    connection.commit()
+
+
+def legacy_sync(cursor: sqlite3.Cursor, guild_data: dict) -> None:
+    for member in guild_data["guild"]["members"]:
+        _uuid = member["uuid"]
+        _uuid = f"{_uuid[:8]}-{_uuid[8:12]}-{_uuid[12:16]}-{_uuid[16:20]}-{_uuid[20:]}"
+        for date, amount in member["expHistory"].items():
+            cursor.execute("SELECT * FROM expHistory WHERE uuid=? AND date=?", (_uuid, date))
+            result = cursor.fetchone()
+            if result is None:
+                cursor.execute("INSERT INTO expHistory (timestamp, date, uuid, amount) VALUES (?, ?, ?, ?)",
+                               (int(time.time()), date, _uuid, amount))
+            elif result[4] != amount:
+                cursor.execute("UPDATE expHistory SET timestamp=?, amount=? WHERE uuid=? AND date=?",
+                               (int(time.time()), amount, _uuid, date))
+    cursor.connection.commit()
+
+
+async def measure(sync_coroutine_factory, syncs: int):
+    lags = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    for index in range(syncs):
+        await sync_coroutine_factory(index)
+    elapsed = time.perf_counter() - started
+    done.set()
+    await heartbeat_task
+    return elapsed, lags
+
+
+def report(label: str, elapsed: float, lags) -> None:
+    print(f"{label:<8} wall {elapsed * 1000:9.1f}ms | loop lag p50 {percentile(lags, 0.5) * 1000:7.2f}ms "
+          f"p99 {percentile(lags, 0.99) * 1000:8.2f}ms max {max(lags) * 1000:8.2f}ms")
+
+
+async def main(arguments) -> None:
+    enter_sandbox()
+    from util.local import LOCAL_DATA
+    from util.gexp_writer import GexpWriter
+
+    payloads = [make_guild_payload(arguments.members, seed=0) for _ in range(arguments.syncs)]
+    # Change a few amounts between runs so every sync has real work to do
+    for index, payload in enumerate(payloads):
+        for member in payload["guild"]["members"][::5]:
+            date = next(iter(member["expHistory"]))
+            member["expHistory"][date] += index + 1
+
+    legacy_path = os.path.join("..", "data", "db", "legacy.db")
+    legacy = sqlite3.connect(legacy_path)
+    legacy.execute("""
+    CREATE TABLE expHistory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        uuid TEXT NOT NULL,
+        amount INTEGER NOT NULL
+    )""")
+    populate(legacy, payloads[0], arguments.history_days)
+    populate_history(LOCAL_DATA.gexp_db.connection, payloads[0], arguments.history_days)
+
+    async def before(index):
+        legacy_sync(legacy.cursor(), payloads[index])
+
+    writer = GexpWriter(LOCAL_DATA.gexp_db)
+    writer.start()
+
+    async def after(index):
+        await writer.ingest(dump_payload(payloads[index]))
+
+    print(f"{arguments.members} members, {arguments.history_days} days of history, {arguments.syncs} syncs")
+    report("before", *await measure(before, arguments.syncs))
+    report("after", *await measure(after, arguments.syncs))
+    writer.stop()
+    legacy.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--members", type=int, default=125)
+    parser.add_argument("--syncs", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""
+Peak memory and time-to-first-member of guild payload parsing.
+
+"before" is the old path: the whole body is decoded with json.loads and the members
+are walked from the resulting dicts (which stay alive for the whole sync).
+"after" feeds the body to GuildPayloadParser in download-sized chunks and keeps only
+the compact MemberRecords. The sync streams the body without keeping a copy of it
+(HypixelClient.iter_body doesn't cache streamed bodies), so only one chunk is alive.
+The incremental parser trades CPU time (it is about 2-3x slower than json.loads)
+for a peak memory that doesn't grow with the size of the guild.
+
+The synthetic payload holds several guilds of different sizes, every guild is parsed
+separately like a multi-guild sync would.
+
+Usage (from the repository root):
+    python benchmarks/guild_parsing.py [--guilds 8] [--members 125] [--chunk-size 16384]
+"""
+
+import json
+import time
+import argparse
+import tracemalloc
+
+from _sandbox import enter_sandbox, make_guild_payload, dump_payload
+
+
+def run_before(bodies):
+    first_member = None
+    start = time.perf_counter()
+    members = 0
+    for body in bodies:
+        # The decoded guild stays alive while its members are synced
+        guild_data = json.loads(body)
+        for member in guild_data["guild"]["members"]:
+            if first_member is None:
+                # json.loads needs the complete body before the first member is available
+                first_member = (time.perf_counter() - start, len(body))
+            members += len(member["expHistory"]) > 0
+    return time.perf_counter() - start, first_member, members
+
+
+def run_after(bodies, chunk_size):
+    # Imported by `main`, so the module itself isn't counted in the traced memory
+    from util.guild_parser import GuildPayloadParser
+    first_member = None
+    start = time.perf_counter()
+    members = 0
+    for body in bodies:
+        parser = GuildPayloadParser()
+        for offset in range(0, len(body), chunk_size):
+            # Only the records of the current chunk are alive while they are ingested
+            records = parser.feed(body[offset:offset + chunk_size])
+            if records and first_member is None:
+                first_member = (time.perf_counter() - start, parser.bytes_received)
+            members += len(records)
+        parser.close()
+    return time.perf_counter() - start, first_member, members
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    elapsed, first_member, members = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, first_member, members, peak
+
+
+def main(arguments) -> None:
+    enter_sandbox()
+    import util.guild_parser  # noqa: F401
+    bodies = [dump_payload(make_guild_payload(arguments.members * (1 + index % 4), seed=index))
+              for index in range(arguments.guilds)]
+    total_size = sum(len(body) for body in bodies)
+    print(f"{arguments.guilds} guilds, {total_size / 1024:.0f} KiB of payload, {arguments.chunk_size} byte chunks")
+    for label, result in [("before", measure(run_before, bodies)),
+                          ("after", measure(run_after, bodies, arguments.chunk_size))]:
+        elapsed, (first_member, first_member_bytes), members, peak = result
+        print(f"{label:<8} {members} members | total {elapsed * 1000:7.1f}ms | first member after "
+              f"{first_member * 1000:5.2f}ms and {first_member_bytes / 1024:4.0f} KiB of body | "
+              f"peak memory {peak / 1024:5.0f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--guilds", type=int, default=8)
+    parser.add_argument("--members", type=int, default=125)
+    parser.add_argument("--chunk-size", type=int, default=16384)
+    main(parser.parse_args())
@@ -0,0 +1,72 @@
+"""
+Resolving a guild roster's names to UUIDs: sequential MCIGN calls versus the PlayerResolver.
+
+Both run against the local API stand-in (with its simulated latency). "mcign" resolves
+the names one after another with blocking MCIGN lookups (run in a thread so the
+stand-in keeps serving), like the cogs used to. "resolver" hands every name to
+PlayerResolver.resolve_many on an empty UUID cache, which gathers them into bulk
+requests of up to 10 names. "cached" resolves the roster again from the UUID cache.
+
+Usage (from the repository root):
+    python benchmarks/player_resolution.py [--members 125] [--latency-ms 80] [--jitter-ms 40]
+"""
+
+import time
+import asyncio
+import argparse
+
+from _sandbox import enter_sandbox
+from api_standin import StandinWorld, ApiStandin
+
+
+def report(label: str, seconds: float, requests: int, resolved: int, total: int) -> None:
+    print(f"{label:<8} {seconds * 1000:8.1f}ms | {requests:4d} Mojang requests | {resolved}/{total} resolved")
+
+
+async def main(arguments) -> None:
+    enter_sandbox()
+    from util.local import LOCAL_DATA
+    from util.mcign import MCIGN
+    from util.hypixel import HypixelClient
+    from util.repository import Repositories
+    from util.player_resolver import PlayerResolver
+
+    world = StandinWorld(1, arguments.members)
+    standin = ApiStandin(world, arguments.latency_ms, arguments.jitter_ms)
+    base_url = await standin.start()
+    LOCAL_DATA.config.config["api"] = {"mojang_api_url": base_url, "mojang_session_url": base_url}
+    names = list(world.players.values())
+    print(f"{len(names)} names, {arguments.latency_ms:g}ms latency (+ up to {arguments.jitter_ms:g}ms jitter)")
+
+    def sequential():
+        return [MCIGN(name).uuid for name in names]
+
+    before = sum(standin.requests.values())
+    start = time.perf_counter()
+    uuids = await asyncio.to_thread(sequential)
+    report("mcign", time.perf_counter() - start, sum(standin.requests.values()) - before,
+           sum(uuid is not None for uuid in uuids), len(names))
+
+    client = HypixelClient(LOCAL_DATA.config)
+    await client.start()
+    repositories = Repositories(LOCAL_DATA.config)
+    resolver = PlayerResolver(client, repositories.uuid_cache, LOCAL_DATA.config)
+    try:
+        for label in ("resolver", "cached"):
+            before = resolver.requests
+            start = time.perf_counter()
+            players = await resolver.resolve_many(names)
+            report(label, time.perf_counter() - start, resolver.requests - before,
+                   sum(player is not None for player in players.values()), len(names))
+    finally:
+        await client.close()
+        repositories.close()
+        await standin.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=125)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,128 @@
+"""
+Database size and lookup cost of the legacy expHistory table versus schema v2.
+
+Builds a legacy database (dashed TEXT UUIDs, ISO date TEXT, AUTOINCREMENT ids and the
+UNIQUE (uuid, date) index), measures it, migrates a copy with util.migrate_v2 and
+measures again. Lookups are the queries of `/gexp daily` (one player, one day) and of
+a player's history over the last 30 days.
+
+Usage (from the repository root):
+    python benchmarks/schema_v2.py [--members 1000] [--history-days 730] [--lookups 2000]
+"""
+
+import os
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import datetime
+
+from _sandbox import enter_sandbox, make_guild_payload, percentile
+
+LEGACY_SCHEMA = """
+CREATE TABLE expHistory (
+    id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    guildId TEXT,
+    UNIQUE (uuid, date)
+)
+"""
+
+
+def dashed(_uuid: str) -> str:
+    return f"{_uuid[:8]}-{_uuid[8:12]}-{_uuid[12:16]}-{_uuid[16:20]}-{_uuid[20:]}"
+
+
+def build_legacy(path: str, payload: dict, history_days: int) -> None:
+    connection = sqlite3.connect(path)
+    connection.execute(LEGACY_SCHEMA)
+    today = datetime.date.today()
+    guild_id = payload["guild"]["_id"]
+    rows = []
+    # Rows were written day by day, all members at once
+    for day in range(history_days - 1, -1, -1):
+        date = (today - datetime.timedelta(days=day)).isoformat()
+        for member in payload["guild"]["members"]:
+            rows.append((1690000000, date, dashed(member["uuid"]), day * 7 % 250000, guild_id))
+    connection.executemany("INSERT INTO expHistory (timestamp, date, uuid, amount, guildId) VALUES (?, ?, ?, ?, ?)",
+                           rows)
+    connection.commit()
+    connection.execute("VACUUM")
+    connection.close()
+
+
+def time_lookups(connection: sqlite3.Connection, point, history, keys, lookups: int):
+    rng = random.Random(1)
+    point_times, history_times = [], []
+    for _ in range(lookups):
+        key, day, first = rng.choice(keys)
+        start = time.perf_counter()
+        connection.execute(point, (key, day)).fetchone()
+        point_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        connection.execute(history, (key, first, day)).fetchall()
+        history_times.append(time.perf_counter() - start)
+    return point_times, history_times
+
+
+def report(label: str, path: str, point_times, history_times) -> None:
+    print(f"{label:<7} {os.path.getsize(path) / 1024 / 1024:7.1f} MiB | "
+          f"daily p50 {percentile(point_times, 0.5) * 1e6:6.1f}us p95 {percentile(point_times, 0.95) * 1e6:6.1f}us | "
+          f"30 day history p50 {percentile(history_times, 0.5) * 1e6:6.1f}us "
+          f"p95 {percentile(history_times, 0.95) * 1e6:6.1f}us")
+
+
+def main(arguments) -> None:
+    root = enter_sandbox()
+    from util import migrate_v2
+    from util.schema import day_number
+
+    payload = make_guild_payload(arguments.members, seed=0)
+    members = payload["guild"]["members"]
+    legacy_path = os.path.join(root, "data", "db", "legacy.db")
+    build_legacy(legacy_path, payload, arguments.history_days)
+    print(f"{arguments.members} members, {arguments.history_days} days of history, {arguments.lookups} lookups")
+
+    rng = random.Random(0)
+    days = [rng.randrange(30, arguments.history_days) for _ in range(200)]
+    today = datetime.date.today()
+    legacy_keys = []
+    v2_keys = []
+    for day in days:
+        member = rng.choice(members)
+        date, first = today - datetime.timedelta(days=day), today - datetime.timedelta(days=day + 29)
+        legacy_keys.append((dashed(member["uuid"]), date.isoformat(), first.isoformat()))
+        v2_keys.append((bytes.fromhex(member["uuid"]), day_number(date), day_number(first)))
+
+    connection = sqlite3.connect(legacy_path)
+    report("legacy", legacy_path, *time_lookups(
+        connection, "SELECT date, amount FROM expHistory WHERE (uuid = ?) AND (date = ?)",
+        "SELECT date, amount FROM expHistory WHERE (uuid = ?) AND (date BETWEEN ? AND ?) ORDER BY date",
+        legacy_keys, arguments.lookups))
+    connection.close()
+
+    v2_path = os.path.join(root, "data", "db", "v2.db")
+    shutil.copy(legacy_path, v2_path)
+    connection = sqlite3.connect(v2_path)
+    start = time.perf_counter()
+    migrate_v2.migrate(connection)
+    print(f"migration took {time.perf_counter() - start:.1f}s")
+    report("v2", v2_path, *time_lookups(
+        connection,
+        "SELECT day, amount FROM expDaily WHERE playerId = (SELECT id FROM players WHERE uuid = ?) AND day = ?",
+        "SELECT day, amount FROM expDaily WHERE playerId = (SELECT id FROM players WHERE uuid = ?) "
+        "AND day BETWEEN ? AND ? ORDER BY day",
+        [(key, day, first) for key, day, first in v2_keys], arguments.lookups))
+    connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--history-days", type=int, default=730)
+    parser.add_argument("--lookups", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,136 @@
+"""
+Reader latency and sync cost on a large GEXP database, before and after connection tuning.
+
+"before" uses plain sqlite3.connect connections (rollback journal, synchronous=FULL,
+default page cache). "after" uses util.local.connect_database (WAL, synchronous=NORMAL,
+mmap, a larger page cache and in-memory temp storage).
+
+A writer thread replays syncs like the GexpWriter does: one transaction per sync that
+stays open while the payload "downloads" (members are written in batches with a pause
+in between) and is committed at the end. Meanwhile a reader thread runs the queries of
+the /gexp commands (a player's recent GEXP, and a top-10 over the last 30 days) and
+records how long each takes, including time spent waiting on locks.
+
+Usage (from the repository root):
+    python benchmarks/sqlite_tuning.py [--members 1000] [--history-days 730] [--syncs 5]
+"""
+
+import os
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import datetime
+import threading
+
+from _sandbox import enter_sandbox, make_guild_payload, percentile, populate_history
+
+BATCH_MEMBERS = 25
+BATCH_PAUSE_SECONDS = 0.02
+
+
+def build_database(path: str, schema, payload: dict, history_days: int) -> None:
+    connection = sqlite3.connect(path)
+    for (sql,) in schema:
+        connection.execute(sql)
+    populate_history(connection, payload, history_days, amount=lambda day: day * 7 % 250000)
+    connection.close()
+
+
+def run(label: str, connect, gexp_db, payload: dict, syncs: int) -> None:
+    from util.guild_parser import parse_guild_payload
+    from util.local import close_database
+    from util.schema import day_number
+
+    members = payload["guild"]["members"]
+    uuids = [bytes.fromhex(m["uuid"]) for m in members]
+    since = day_number(datetime.date.today() - datetime.timedelta(days=30))
+    done = threading.Event()
+    point_reads, top_reads, sync_times = [], [], []
+    errors = [0]
+
+    def writer():
+        connection = connect()
+        rng = random.Random(1)
+        try:
+            for _ in range(syncs):
+                # Every sync changes today's amount of a fifth of the members
+                for member in rng.sample(members, len(members) // 5):
+                    date = max(member["expHistory"])
+                    member["expHistory"][date] += rng.randrange(1, 1000)
+                records = parse_guild_payload(json.dumps(payload))
+                start = time.perf_counter()
+                for offset in range(0, len(records), BATCH_MEMBERS):
+                    gexp_db.ingest_guild_members(records[offset:offset + BATCH_MEMBERS], connection=connection)
+                    time.sleep(BATCH_PAUSE_SECONDS)
+                connection.commit()
+                sync_times.append(time.perf_counter() - start)
+        finally:
+            connection.close()
+            done.set()
+
+    def reader():
+        connection = connect()
+        rng = random.Random(2)
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                connection.execute("SELECT SUM(amount) FROM expDaily WHERE playerId = "
+                                   "(SELECT id FROM players WHERE uuid = ?) AND day >= ?",
+                                   (rng.choice(uuids), since)).fetchone()
+                point_reads.append(time.perf_counter() - start)
+                if len(point_reads) % 20 == 0:
+                    start = time.perf_counter()
+                    connection.execute("SELECT playerId, SUM(amount) AS total FROM expDaily WHERE day >= ? "
+                                       "GROUP BY playerId ORDER BY total DESC LIMIT 10", (since,)).fetchall()
+                    top_reads.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                errors[0] += 1
+        connection.close()
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    optimize = connect()
+    start = time.perf_counter()
+    close_database(optimize)
+    shutdown = time.perf_counter() - start
+    print(f"{label:<7} sync avg {sum(sync_times) / len(sync_times) * 1000:7.1f}ms | "
+          f"point read p50 {percentile(point_reads, 0.5) * 1000:6.2f}ms p95 {percentile(point_reads, 0.95) * 1000:6.2f}ms "
+          f"max {max(point_reads) * 1000:7.1f}ms ({len(point_reads)} reads, {errors[0]} lock errors) | "
+          f"top-10 p50 {percentile(top_reads, 0.5) * 1000:6.1f}ms | shutdown {shutdown * 1000:5.1f}ms")
+
+
+def main(arguments) -> None:
+    root = enter_sandbox()
+    from util.local import LOCAL_DATA, connect_database
+
+    gexp_db = LOCAL_DATA.gexp_db
+    schema = gexp_db.connection.execute(
+        "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY type = 'table' DESC").fetchall()
+    payload = make_guild_payload(arguments.members, seed=0)
+    base_path = os.path.join(root, "data", "db", "base.db")
+    build_database(base_path, schema, payload, arguments.history_days)
+    size = os.path.getsize(base_path)
+    print(f"{arguments.members} members, {arguments.history_days} days of history "
+          f"({size / 1024 / 1024:.0f} MiB), {arguments.syncs} syncs")
+
+    for label, connect in [("before", lambda path: sqlite3.connect(path)),
+                           ("after", lambda path: connect_database(path, LOCAL_DATA.config))]:
+        path = os.path.join(root, "data", "db", f"{label}.db")
+        shutil.copy(base_path, path)
+        run(label, lambda: connect(path), gexp_db, payload, arguments.syncs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--history-days", type=int, default=730)
+    parser.add_argument("--syncs", type=int, default=5)
+    main(parser.parse_args())